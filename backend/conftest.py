@@ -0,0 +1,28 @@
+"""
+backend 根目录测试脚本共享的 pytest fixtures
+"""
+
+import pytest
+
+from src.broker.broker import MessageBroker
+
+
+@pytest.fixture(scope="module")
+def shared_broker():
+    """整个模块共享的 broker 实例（每个测试模块只创建一次）"""
+    MessageBroker._instance = None
+    broker = MessageBroker.get_instance()
+    yield broker
+    # 清理
+    broker.shutdown()
+    MessageBroker._instance = None
+
+
+@pytest.fixture
+def broker_instance(shared_broker):
+    """复用共享 broker，测试结束后注销本测试注册的类型并清除订阅者"""
+    baseline_types = shared_broker.get_registered_type_set()
+    yield shared_broker
+    for message_type in shared_broker.get_registered_type_set() - baseline_types:
+        shared_broker.unregister_message_type(message_type)
+    shared_broker.clear_subscribers()
@@ -0,0 +1,71 @@
+"""
+后端 HTTP 测试脚本共享的工具函数
+
+提供复用 keep-alive 连接的 requests 会话，以及轮询接口直到满足条件的辅助函数。
+"""
+import time
+from typing import Any, Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def create_session(pool_maxsize: int = 4) -> requests.Session:
+    """
+    创建 HTTP 会话：所有请求复用 keep-alive 连接（不重试，失败立即返回）
+    
+    Args:
+        pool_maxsize: 连接池最大连接数（并发请求时调大）
+        
+    Returns:
+        requests.Session: 会话对象
+    """
+    session = requests.Session()
+    session.headers['Connection'] = 'keep-alive'
+    session.mount(
+        'http://',
+        HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=Retry(total=0))
+    )
+    return session
+
+
+SESSION = create_session()
+
+
+def poll_until(
+    url: str,
+    predicate: Callable[[Any], Any],
+    timeout: float = 10.0,
+    interval: float = 0.05,
+    session: Optional[requests.Session] = None
+) -> Optional[Any]:
+    """
+    每隔 interval 秒请求 url，直到 predicate(响应 JSON) 为真或超时
+    
+    请求失败、响应不是 JSON 或 predicate 访问不到预期字段时视为条件未满足，继续轮询。
+    
+    Args:
+        url: 轮询的接口地址
+        predicate: 判断响应 JSON 是否满足条件的函数
+        timeout: 超时时间（秒）
+        interval: 轮询间隔（秒）
+        session: 使用的会话，默认为共享的 SESSION
+        
+    Returns:
+        满足条件时的响应 JSON；超时返回 None
+    """
+    session = session or SESSION
+    deadline = time.perf_counter_ns() + int(timeout * 1e9)
+    while True:
+        try:
+            response = session.get(url, timeout=5)
+            if response.ok:
+                data = response.json()
+                if predicate(data):
+                    return data
+        except (requests.RequestException, KeyError, ValueError):
+            pass
+        if time.perf_counter_ns() >= deadline:
+            return None
+        time.sleep(interval)
@@ -13,6 +13,12 @@ from datetime import datetime
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
 
+try:
+    import ormsgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
 try:
     from broker.broker import MessageBroker
     from broker.models import MessageData, CameraInfo
@@ -97,6 +103,22 @@ async def _initialize_broker():
 
 
 
+async def _send_message(websocket: WebSocket, payload: Dict[str, Any], use_msgpack: bool = False):
+    """
+    发送消息到WebSocket客户端
+    
+    Args:
+        websocket: WebSocket连接
+        payload: 消息内容
+        use_msgpack: 是否以 MessagePack 二进制帧发送（客户端以 ?fmt=msgpack 请求），
+            否则发送 JSON 文本帧
+    """
+    if use_msgpack:
+        await websocket.send_bytes(ormsgpack.packb(payload))
+    else:
+        await websocket.send_json(payload)
+
+
 def _make_serializable(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     确保字典中的所有值都是 JSON 可序列化的
@@ -362,6 +384,9 @@ async def broker_stream(websocket: WebSocket):
         "data": { ... },  # 原始消息数据（仅消息更新）
         "cameras": [...]  # 摄像头ID列表
     }
+    
+    连接时带查询参数 ?fmt=msgpack 且已安装 ormsgpack 时，消息以 MessagePack
+    二进制帧发送，否则以 JSON 文本帧发送。
     """
     global _active_connections, _data_manager
     
@@ -370,6 +395,9 @@ async def broker_stream(websocket: WebSocket):
     # 标记是否已注册回调
     callback_registered = False
     
+    # 消息编码格式（默认 JSON）
+    use_msgpack = MSGPACK_AVAILABLE and websocket.query_params.get("fmt") == "msgpack"
+    
     try:
         # 确保 broker 已初始化
         await _initialize_broker()
@@ -406,7 +434,7 @@ async def broker_stream(websocket: WebSocket):
                 }
                 
                 # 发送到客户端
-                await websocket.send_json(response)
+                await _send_message(websocket, response, use_msgpack)
                 logger.info(
                     f"Sent {managed_msg.message_type} to client: "
                     f"{len(managed_msg.cameras)} cameras, priority={managed_msg.priority}"
@@ -426,7 +454,7 @@ async def broker_stream(websocket: WebSocket):
             return
         
         # 发送当前状态
-        await _send_current_state(websocket)
+        await _send_current_state(websocket, use_msgpack)
         
         # 保持连接活跃，等待客户端断开或发送消息
         try:
@@ -438,16 +466,16 @@ async def broker_stream(websocket: WebSocket):
                     
                     # 处理客户端命令
                     if message.strip() == "refresh":
-                        await _send_current_state(websocket)
+                        await _send_current_state(websocket, use_msgpack)
                     elif message.strip() == "stats":
                         # 发送 DataManager 统计信息
                         if _data_manager:
                             stats = _data_manager.get_stats()
-                            await websocket.send_json({
+                            await _send_message(websocket, {
                                 "type": "stats",
                                 "timestamp": datetime.now().isoformat(),
                                 "data": stats
-                            })
+                            }, use_msgpack)
                     
                 except asyncio.TimeoutError:
                     # 超时是正常的，继续等待
@@ -488,7 +516,7 @@ async def broker_stream(websocket: WebSocket):
             logger.info("所有客户端已断开，传感器数据流已停止")
 
 
-async def _send_current_state(websocket: WebSocket):
+async def _send_current_state(websocket: WebSocket, use_msgpack: bool = False):
     """发送当前状态到WebSocket客户端"""
     try:
         broker = MessageBroker.get_instance()
@@ -532,7 +560,7 @@ async def _send_current_state(websocket: WebSocket):
                 "cameras": list(all_cameras)
             }
         
-        await websocket.send_json(current_state)
+        await _send_message(websocket, current_state, use_msgpack)
         logger.info("Sent current state to WebSocket client")
         
     except Exception as e:
@@ -547,7 +575,7 @@ async def _send_current_state(websocket: WebSocket):
                 },
                 "cameras": []
             }
-            await websocket.send_json(error_message)
+            await _send_message(websocket, error_message, use_msgpack)
         except:
             pass
 
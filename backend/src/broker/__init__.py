@@ -21,6 +21,7 @@ from .handlers import (
     AngleMessageHandler,
     AIAlertMessageHandler,
     PassthroughHandler,
+    build_validator,
 )
 from .mapper import CameraMapper
 from .errors import (
@@ -32,8 +33,13 @@ from .errors import (
 )
 from .logging_config import (
     configure_broker_logging,
+    init_broker_logging,
+    set_broker_log_level,
+    flush_broker_logging,
     get_broker_logger,
     BrokerLoggerAdapter,
+    BinaryBrokerHandler,
+    read_binary_log,
     create_message_logger,
     create_subscriber_logger,
     setup_default_logging,
@@ -51,6 +57,7 @@ __all__ = [
     "AngleMessageHandler",
     "AIAlertMessageHandler",
     "PassthroughHandler",
+    "build_validator",
     "CameraMapper",
     "BrokerError",
     "ValidationError",
@@ -58,8 +65,13 @@ __all__ = [
     "PublishError",
     "ErrorHandler",
     "configure_broker_logging",
+    "init_broker_logging",
+    "set_broker_log_level",
+    "flush_broker_logging",
     "get_broker_logger",
     "BrokerLoggerAdapter",
+    "BinaryBrokerHandler",
+    "read_binary_log",
     "create_message_logger",
     "create_subscriber_logger",
     "setup_default_logging",
@@ -4,10 +4,14 @@ Message Broker Core Implementation
 全局消息代理（单例模式），负责消息的发布、订阅和分发。
 """
 
+import asyncio
 import logging
+import sys
 import threading
 import time
-from typing import Any, Callable, Dict, List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Deque, Dict, FrozenSet, List, Optional, Tuple
 from datetime import datetime
 
 from .models import (
@@ -23,8 +27,79 @@ from .errors import (
     ErrorHandler,
 )
 
+try:
+    from fastrlock.rlock import FastRLock as _RLock
+    FASTRLOCK_AVAILABLE = True
+except ImportError:
+    _RLock = threading.RLock
+    FASTRLOCK_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# subscribe_stream 缓冲区溢出警告的最短间隔（秒）
+_STREAM_DROP_WARNING_INTERVAL = 5.0
+
+# 消息类型处理器必须实现的方法
+_REQUIRED_HANDLER_METHODS = ("validate", "process", "get_type_name")
+
+# 已确认实现全部必需方法的处理器类（按类缓存接口检查结果）
+_HANDLER_IFACE_CACHE: Dict[type, bool] = {}
+
+
+def _missing_handler_method(handler: Any) -> Optional[str]:
+    """
+    检查处理器是否实现了必需的接口
+    
+    类本身提供全部方法时缓存结果，同一处理器类再次注册只需一次字典查找。
+    
+    Args:
+        handler: 消息类型处理器实例
+        
+    Returns:
+        Optional[str]: 第一个缺少的方法名，接口完整时返回 None
+    """
+    cls = type(handler)
+    if _HANDLER_IFACE_CACHE.get(cls):
+        return None
+    
+    for name in _REQUIRED_HANDLER_METHODS:
+        if not callable(getattr(handler, name, None)):
+            return name
+    
+    # 方法可能是实例属性，只有类本身实现时才缓存
+    if all(callable(getattr(cls, name, None)) for name in _REQUIRED_HANDLER_METHODS):
+        _HANDLER_IFACE_CACHE[cls] = True
+    return None
+
+
+# 消息类型名称 -> uint16 类型ID（进程内按首次出现顺序分配，0 表示无消息类型）
+# 二进制消息日志按该ID记录消息类型，ID 与名称的对应表由日志处理器写入日志旁的表文件
+_MESSAGE_TYPE_IDS: Dict[str, int] = {}
+_MESSAGE_TYPE_IDS_LOCK = threading.Lock()
+
+
+def get_message_type_id(message_type: str) -> int:
+    """
+    获取消息类型的类型ID
+    
+    首次出现的类型按顺序分配新ID（从 1 开始），
+    MessageBroker.register_message_type 注册时会预先分配。
+    ID 只在当前进程内有效。
+    
+    Args:
+        message_type: 消息类型名称
+        
+    Returns:
+        int: 类型ID
+    """
+    type_id = _MESSAGE_TYPE_IDS.get(message_type)
+    if type_id is None:
+        with _MESSAGE_TYPE_IDS_LOCK:
+            type_id = _MESSAGE_TYPE_IDS.setdefault(
+                message_type, len(_MESSAGE_TYPE_IDS) + 1
+            )
+    return type_id
+
 
 class MessageBroker:
     """
@@ -67,12 +142,20 @@ class MessageBroker:
         # 消息类型处理器注册表
         self._message_handlers: Dict[str, Any] = {}
         
-        # 订阅者管理（message_type -> list of SubscriptionInfo）
-        self._subscribers: Dict[str, List[SubscriptionInfo]] = {}
+        # 订阅者管理（message_type -> tuple of SubscriptionInfo）
+        # 写时复制：订阅/取消订阅替换整个元组，发布时直接读取当前元组快照
+        self._subscribers: Dict[str, Tuple[SubscriptionInfo, ...]] = {}
         
         # 线程安全锁
-        self._subscription_lock = threading.RLock()
-        self._handler_lock = threading.RLock()
+        # _subscription_lock 保护类型锁的创建和注册时订阅者条目的初始化；
+        # 每个类型条目的写入（订阅、取消订阅、清除）都在该类型自己的锁下进行
+        # （安装了 fastrlock 时使用其 C 实现的可重入锁，获取/释放开销更低）
+        self._subscription_lock = _RLock()
+        self._type_locks: Dict[str, Any] = {}
+        self._handler_lock = _RLock()
+        
+        # 订阅者回调分发线程池（None 表示在发布线程中同步调用）
+        self._dispatch_pool: Optional[ThreadPoolExecutor] = None
         
         # 摄像头映射器（延迟初始化）
         self._camera_mapper: Optional[Any] = None
@@ -81,10 +164,10 @@ class MessageBroker:
         self._error_handler = ErrorHandler(logger)
         
         # 统计信息
+        # subscribers_count 由 get_stats() 根据订阅者元组实时计算
         self._stats = {
             "messages_published": 0,
             "messages_failed": 0,
-            "subscribers_count": 0,
         }
         
         logger.info("MessageBroker initialized")
@@ -115,6 +198,9 @@ class MessageBroker:
         Raises:
             MessageTypeError: 如果消息类型已存在且 allow_override=False
         """
+        # 驻留类型名：作为字典键时与调用方的字符串字面量同一对象，查找走身份比较快速路径
+        message_type = sys.intern(message_type)
+        
         with self._handler_lock:
             # 检查是否已注册
             if message_type in self._message_handlers:
@@ -128,27 +214,24 @@ class MessageBroker:
                 )
             
             # 验证 handler 实现了必需的接口
-            if not hasattr(handler, 'validate') or not callable(handler.validate):
+            missing_method = _missing_handler_method(handler)
+            if missing_method is not None:
                 raise MessageTypeError(
-                    f"Handler for '{message_type}' must implement validate() method"
-                )
-            if not hasattr(handler, 'process') or not callable(handler.process):
-                raise MessageTypeError(
-                    f"Handler for '{message_type}' must implement process() method"
-                )
-            if not hasattr(handler, 'get_type_name') or not callable(handler.get_type_name):
-                raise MessageTypeError(
-                    f"Handler for '{message_type}' must implement get_type_name() method"
+                    f"Handler for '{message_type}' must implement {missing_method}() method"
                 )
             
             # 注册处理器
             self._message_handlers[message_type] = handler
             
+            # 预先分配类型ID（二进制消息日志使用）
+            get_message_type_id(message_type)
+            
             # 初始化该类型的订阅者列表（如果不存在）
             # 注意：如果是覆盖，保留现有订阅者（向后兼容）
             with self._subscription_lock:
                 if message_type not in self._subscribers:
-                    self._subscribers[message_type] = []
+                    self._subscribers[message_type] = ()
+                self._type_locks.setdefault(message_type, _RLock())
             
             logger.info(
                 f"Registered message type: {message_type} "
@@ -165,6 +248,33 @@ class MessageBroker:
         self._camera_mapper = mapper
         logger.info("Camera mapper set")
     
+    def set_async_dispatch(self, enabled: bool, max_workers: int = 4) -> None:
+        """
+        设置订阅者回调是否在线程池中异步调用
+        
+        启用后 publish() 只负责把回调提交到线程池即返回，慢订阅者不再阻塞发布者；
+        PublishResult.subscribers_notified 为已提交的订阅者数量。
+        注意：多个工作线程时不保证同一订阅者按发布顺序收到消息 (Requirement 2.5)，
+        需要严格顺序时请保持同步分发（默认）。
+        
+        Args:
+            enabled: 是否启用异步分发
+            max_workers: 线程池工作线程数
+        """
+        pool = self._dispatch_pool
+        if enabled:
+            if pool is None:
+                self._dispatch_pool = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix="broker"
+                )
+                logger.info("Async subscriber dispatch enabled (workers: %d)", max_workers)
+        elif pool is not None:
+            self._dispatch_pool = None
+            # 等待已提交的回调执行完毕
+            pool.shutdown(wait=True)
+            logger.info("Async subscriber dispatch disabled")
+    
     def get_error_handler(self) -> ErrorHandler:
         """
         获取错误处理器
@@ -182,6 +292,9 @@ class MessageBroker:
         """
         发布消息
         
+        broker 不会修改传入的 data 字典，调用方可以在多次发布之间复用同一个字典。
+        订阅者收到的 message.data 与调用方传入的是同一对象，订阅者不应修改它。
+        
         Args:
             message_type: 消息类型
             data: 消息数据
@@ -233,10 +346,16 @@ class MessageBroker:
             
             processing_time = time.time() - start_time
             
-            logger.info(
-                f"Published message {message.message_id} of type {message_type}, "
-                f"notified {notified_count} subscribers in {processing_time:.4f}s"
-            )
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Published message %s of type %s, notified %d subscribers in %.4fs",
+                    message.message_id, message_type, notified_count, processing_time,
+                    extra={
+                        "message_id": message.message_id,
+                        "message_type": message_type,
+                        "subscribers_notified": notified_count,
+                    }
+                )
             
             return PublishResult(
                 success=True,
@@ -247,9 +366,102 @@ class MessageBroker:
             
         except Exception as e:
             self._stats["messages_failed"] += 1
-            logger.error(f"Failed to publish message: {e}", exc_info=True)
+            logger.error("Failed to publish message: %s", e, exc_info=True)
             raise PublishError(f"Failed to publish message: {e}")
     
+    def publish_batch(
+        self,
+        message_type: str,
+        data_list: List[Dict[str, Any]]
+    ) -> List[PublishResult]:
+        """
+        批量发布同一类型的多条消息
+        
+        处理器只查找一次，订阅者快照只获取一次；每个订阅者按顺序收到本批次
+        全部有效消息后再通知下一个订阅者。验证失败的消息不会分发，
+        也不影响同批次的其他消息。
+        
+        Args:
+            message_type: 消息类型
+            data_list: 消息数据列表
+            
+        Returns:
+            List[PublishResult]: 与 data_list 一一对应的发布结果
+            
+        Raises:
+            PublishError: 如果发布失败
+        """
+        start_time = time.time()
+        
+        try:
+            # 检查消息类型是否已注册
+            handler = self._message_handlers.get(message_type)
+            if handler is None:
+                raise PublishError(
+                    f"Message type '{message_type}' is not registered"
+                )
+            
+            validate = handler.validate
+            process = handler.process
+            handle_validation_error = self._error_handler.handle_validation_error
+            
+            results: List[Optional[PublishResult]] = [None] * len(data_list)
+            valid_indices: List[int] = []
+            valid_messages: List[MessageData] = []
+            
+            # 验证并处理每条消息
+            for index, data in enumerate(data_list):
+                message = MessageData(
+                    type=message_type,
+                    data=data,
+                    timestamp=datetime.now()
+                )
+                validation_result = validate(data)
+                
+                if not validation_result.valid:
+                    self._stats["messages_failed"] += 1
+                    handle_validation_error(message, validation_result)
+                    results[index] = PublishResult(
+                        success=False,
+                        message_id=message.message_id,
+                        subscribers_notified=0,
+                        errors=validation_result.errors
+                    )
+                    continue
+                
+                process(data)
+                valid_indices.append(index)
+                valid_messages.append(message)
+            
+            # 通知订阅者
+            notified_counts = self._notify_subscribers_batch(message_type, valid_messages)
+            
+            for index, message, notified_count in zip(
+                valid_indices, valid_messages, notified_counts
+            ):
+                results[index] = PublishResult(
+                    success=True,
+                    message_id=message.message_id,
+                    subscribers_notified=notified_count,
+                    errors=[]
+                )
+            
+            self._stats["messages_published"] += len(valid_messages)
+            
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Published batch of %d/%d messages of type %s in %.4fs",
+                    len(valid_messages), len(data_list), message_type,
+                    time.time() - start_time
+                )
+            
+            return results
+            
+        except Exception as e:
+            self._stats["messages_failed"] += 1
+            logger.error("Failed to publish message batch: %s", e, exc_info=True)
+            raise PublishError(f"Failed to publish message batch: {e}")
+    
     def subscribe(
         self, 
         message_type: str, 
@@ -275,14 +487,15 @@ class MessageBroker:
         if not callable(callback):
             raise SubscriptionError("Callback must be callable")
         
-        with self._subscription_lock:
-            # 检查消息类型是否已注册
-            if message_type not in self._message_handlers:
-                raise SubscriptionError(
-                    f"Message type '{message_type}' is not registered. "
-                    f"Available types: {list(self._message_handlers.keys())}"
-                )
-            
+        # 检查消息类型是否已注册
+        if message_type not in self._message_handlers:
+            raise SubscriptionError(
+                f"Message type '{message_type}' is not registered. "
+                f"Available types: {list(self._message_handlers.keys())}"
+            )
+        
+        # 只锁定该消息类型，不同类型的订阅互不阻塞
+        with self._get_type_lock(message_type):
             # 创建订阅信息
             subscription = SubscriptionInfo(
                 subscription_id=f"sub_{message_type}_{id(callback)}_{time.time()}",
@@ -290,17 +503,15 @@ class MessageBroker:
                 callback=callback
             )
             
-            # 添加到订阅者列表
-            if message_type not in self._subscribers:
-                self._subscribers[message_type] = []
-            
-            self._subscribers[message_type].append(subscription)
-            self._stats["subscribers_count"] += 1
+            # 添加到订阅者列表（构建新元组后替换引用）
+            subscribers = self._subscribers.get(message_type, ()) + (subscription,)
+            self._subscribers[message_type] = subscribers
             
             logger.info(
-                f"Subscriber {subscription.subscription_id} registered "
-                f"for message type '{message_type}' "
-                f"(total subscribers for this type: {len(self._subscribers[message_type])})"
+                "Subscriber %s registered for message type '%s' "
+                "(total subscribers for this type: %d)",
+                subscription.subscription_id, message_type,
+                len(subscribers)
             )
             
             return subscription.subscription_id
@@ -323,23 +534,24 @@ class MessageBroker:
         Returns:
             bool: 是否成功取消订阅
         """
-        with self._subscription_lock:
-            if message_type not in self._subscribers:
-                logger.warning(
-                    f"Cannot unsubscribe {subscription_id}: "
-                    f"message type '{message_type}' not found"
-                )
-                return False
-            
-            # 查找并移除订阅
-            subscribers = self._subscribers[message_type]
+        if message_type not in self._subscribers:
+            logger.warning(
+                f"Cannot unsubscribe {subscription_id}: "
+                f"message type '{message_type}' not found"
+            )
+            return False
+        
+        with self._get_type_lock(message_type):
+            # 查找并移除订阅（构建新元组后替换引用）
+            subscribers = self._subscribers.get(message_type, ())
             for i, sub in enumerate(subscribers):
                 if sub.subscription_id == subscription_id:
-                    subscribers.pop(i)
-                    self._stats["subscribers_count"] -= 1
+                    subscribers = subscribers[:i] + subscribers[i + 1:]
+                    self._subscribers[message_type] = subscribers
                     logger.info(
-                        f"Unsubscribed {subscription_id} from '{message_type}' "
-                        f"(remaining subscribers for this type: {len(subscribers)})"
+                        "Unsubscribed %s from '%s' "
+                        "(remaining subscribers for this type: %d)",
+                        subscription_id, message_type, len(subscribers)
                     )
                     return True
             
@@ -348,6 +560,86 @@ class MessageBroker:
             )
             return False
     
+    async def subscribe_stream(
+        self,
+        message_type: str,
+        batch_size: int = 16,
+        max_pending: int = 1024
+    ) -> AsyncIterator[List[MessageData]]:
+        """
+        以异步迭代器订阅消息类型，按批次取出消息
+        
+        注册的回调只把消息追加到有界环形缓冲区（deque.append 是原子操作，
+        发布线程无需加锁），并且只在缓冲区由空变为非空时唤醒一次消费协程；
+        消费协程被唤醒后按 batch_size 分批取出全部积压消息。积压超过
+        max_pending 条时丢弃最旧的消息，并记录 WARNING 日志（每
+        _STREAM_DROP_WARNING_INTERVAL 秒最多一条，汇总期间丢弃的数量）。
+        迭代结束（break、异常或任务取消）时自动取消订阅。
+        
+        用法::
+        
+            async for batch in broker.subscribe_stream('direction_result'):
+                for message in batch:
+                    ...
+        
+        Args:
+            message_type: 消息类型
+            batch_size: 每批最多包含的消息数
+            max_pending: 缓冲区最多保留的未取出消息数
+            
+        Yields:
+            List[MessageData]: 按发布顺序排列的一批消息
+            
+        Raises:
+            SubscriptionError: 如果消息类型未注册
+        """
+        loop = asyncio.get_running_loop()
+        pending: Deque[MessageData] = deque(maxlen=max_pending)
+        ready = asyncio.Event()
+        # 是否已安排唤醒（消费协程取出消息前清除）
+        wakeup_scheduled = False
+        # 缓冲区已满时被丢弃的消息数，以及已在日志中报告的数量
+        dropped = 0
+        reported = 0
+        last_report = -_STREAM_DROP_WARNING_INTERVAL
+        
+        def enqueue(message: MessageData) -> None:
+            nonlocal wakeup_scheduled, dropped
+            if len(pending) == max_pending:
+                dropped += 1
+            pending.append(message)
+            if not wakeup_scheduled:
+                wakeup_scheduled = True
+                loop.call_soon_threadsafe(ready.set)
+        
+        def report_dropped(force: bool = False) -> None:
+            nonlocal reported, last_report
+            now = time.monotonic()
+            count = dropped - reported
+            if count and (force or now - last_report >= _STREAM_DROP_WARNING_INTERVAL):
+                logger.warning(
+                    "Stream subscriber %s for '%s' fell behind: dropped %d oldest "
+                    "messages (max_pending=%d, total dropped: %d)",
+                    subscription_id, message_type, count, max_pending, dropped
+                )
+                reported += count
+                last_report = now
+        
+        subscription_id = self.subscribe(message_type, enqueue)
+        try:
+            while True:
+                await ready.wait()
+                ready.clear()
+                # 先清除标志再取消息：之后追加的消息会安排新的唤醒
+                wakeup_scheduled = False
+                report_dropped()
+                while pending:
+                    count = min(batch_size, len(pending))
+                    yield [pending.popleft() for _ in range(count)]
+        finally:
+            self.unsubscribe(message_type, subscription_id)
+            report_dropped(force=True)
+    
     def _notify_subscribers(
         self, 
         message_type: str, 
@@ -369,21 +661,33 @@ class MessageBroker:
         Returns:
             int: 成功通知的订阅者数量
         """
-        # 获取订阅者列表的快照（线程安全）
-        with self._subscription_lock:
-            if message_type not in self._subscribers:
-                logger.debug(f"No subscribers for message type: {message_type}")
-                return 0
-            
-            # 创建订阅者列表的副本，避免在通知过程中列表被修改
-            subscribers = self._subscribers[message_type].copy()
+        # 获取订阅者元组的快照：元组不可变，写操作只替换引用，
+        # 因此读取无需加锁，也不会被并发的订阅/取消订阅修改
+        subscribers = self._subscribers.get(message_type)
+        if subscribers is None:
+            logger.debug("No subscribers for message type: %s", message_type)
+            return 0
         
         if not subscribers:
-            logger.debug(f"Empty subscriber list for message type: {message_type}")
+            logger.debug("Empty subscriber list for message type: %s", message_type)
             return 0
         
+        # 异步分发：提交到线程池后立即返回
         notified_count = 0
+        pool = self._dispatch_pool
+        if pool is not None:
+            notified_count = self._submit_to_pool(
+                pool, self._invoke_subscriber, subscribers, message
+            )
+            if notified_count == len(subscribers):
+                return notified_count
+            # 线程池已被并发的 set_async_dispatch(False) 关闭，剩余订阅者同步通知
+            subscribers = subscribers[notified_count:]
+        
         failed_count = 0
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        # 循环外绑定错误处理方法，避免每个订阅者重复查找属性
+        handle_subscriber_error = self._error_handler.handle_subscriber_error
         
         # 按顺序通知每个订阅者
         for subscription in subscribers:
@@ -391,15 +695,16 @@ class MessageBroker:
                 # 调用订阅者回调
                 subscription.callback(message)
                 notified_count += 1
-                logger.debug(
-                    f"Notified subscriber {subscription.subscription_id} "
-                    f"for message {message.message_id}"
-                )
+                if debug_enabled:
+                    logger.debug(
+                        "Notified subscriber %s for message %s",
+                        subscription.subscription_id, message.message_id
+                    )
             except Exception as e:
                 # 订阅者错误不应影响其他订阅者 (Requirement 9.5)
                 failed_count += 1
                 # 使用 ErrorHandler 处理订阅者错误
-                self._error_handler.handle_subscriber_error(
+                handle_subscriber_error(
                     subscription.subscription_id,
                     e,
                     message.message_id
@@ -407,12 +712,156 @@ class MessageBroker:
         
         if failed_count > 0:
             logger.warning(
-                f"Message {message.message_id}: {notified_count} subscribers notified, "
-                f"{failed_count} failed"
+                "Message %s: %d subscribers notified, %d failed",
+                message.message_id, notified_count, failed_count
             )
         
         return notified_count
     
+    @staticmethod
+    def _submit_to_pool(
+        pool: ThreadPoolExecutor,
+        invoke: Callable[[SubscriptionInfo, Any], None],
+        subscribers: Tuple[SubscriptionInfo, ...],
+        payload: Any
+    ) -> int:
+        """
+        将订阅者回调依次提交到线程池
+        
+        发布者读取线程池引用后，线程池可能被并发的 set_async_dispatch(False)
+        关闭，此时 submit() 抛出 RuntimeError；提交在此处停止，由调用方
+        同步通知剩余的订阅者，发布不会因此失败。
+        
+        Args:
+            pool: 分发线程池
+            invoke: 在线程池中执行的调用函数
+            subscribers: 订阅者元组
+            payload: 传给调用函数的消息或消息列表
+            
+        Returns:
+            int: 成功提交的订阅者数量（即 subscribers 中前多少个已提交）
+        """
+        for index, subscription in enumerate(subscribers):
+            try:
+                pool.submit(invoke, subscription, payload)
+            except RuntimeError:
+                return index
+        return len(subscribers)
+    
+    def _notify_subscribers_batch(
+        self,
+        message_type: str,
+        messages: List[MessageData]
+    ) -> List[int]:
+        """
+        将一批消息通知给所有订阅者
+        
+        外层遍历订阅者、内层遍历消息，保证每个订阅者按发布顺序收到消息
+        (Requirement 2.5)；订阅者错误被隔离 (Requirement 9.5)。
+        
+        Args:
+            message_type: 消息类型
+            messages: 消息列表
+            
+        Returns:
+            List[int]: 每条消息成功通知的订阅者数量
+        """
+        notified_counts = [0] * len(messages)
+        subscribers = self._subscribers.get(message_type)
+        if not subscribers or not messages:
+            return notified_counts
+        
+        # 异步分发：每个订阅者一个任务，任务内按顺序处理整批消息
+        pool = self._dispatch_pool
+        if pool is not None:
+            submitted = self._submit_to_pool(
+                pool, self._invoke_subscriber_batch, subscribers, messages
+            )
+            if submitted == len(subscribers):
+                return [submitted] * len(messages)
+            # 线程池已被并发的 set_async_dispatch(False) 关闭，剩余订阅者同步通知
+            notified_counts = [submitted] * len(messages)
+            subscribers = subscribers[submitted:]
+        
+        handle_subscriber_error = self._error_handler.handle_subscriber_error
+        for subscription in subscribers:
+            callback = subscription.callback
+            for index, message in enumerate(messages):
+                try:
+                    callback(message)
+                    notified_counts[index] += 1
+                except Exception as e:
+                    handle_subscriber_error(
+                        subscription.subscription_id,
+                        e,
+                        message.message_id
+                    )
+        
+        return notified_counts
+    
+    def _invoke_subscriber_batch(
+        self,
+        subscription: SubscriptionInfo,
+        messages: List[MessageData]
+    ) -> None:
+        """
+        在分发线程池中按顺序把一批消息交给同一订阅者
+        
+        Args:
+            subscription: 订阅信息
+            messages: 消息列表
+        """
+        callback = subscription.callback
+        handle_subscriber_error = self._error_handler.handle_subscriber_error
+        for message in messages:
+            try:
+                callback(message)
+            except Exception as e:
+                handle_subscriber_error(
+                    subscription.subscription_id,
+                    e,
+                    message.message_id
+                )
+    
+    def _invoke_subscriber(
+        self,
+        subscription: SubscriptionInfo,
+        message: MessageData
+    ) -> None:
+        """
+        在分发线程池中调用订阅者回调
+        
+        订阅者错误被隔离并交给 ErrorHandler 处理 (Requirement 9.5)。
+        
+        Args:
+            subscription: 订阅信息
+            message: 消息数据
+        """
+        try:
+            subscription.callback(message)
+        except Exception as e:
+            self._error_handler.handle_subscriber_error(
+                subscription.subscription_id,
+                e,
+                message.message_id
+            )
+    
+    def _get_type_lock(self, message_type: str) -> Any:
+        """
+        获取消息类型的订阅锁（不存在时创建）
+        
+        Args:
+            message_type: 消息类型
+            
+        Returns:
+            该消息类型的可重入锁
+        """
+        lock = self._type_locks.get(message_type)
+        if lock is None:
+            with self._subscription_lock:
+                lock = self._type_locks.setdefault(message_type, _RLock())
+        return lock
+    
     def get_stats(self) -> Dict[str, Any]:
         """
         获取统计信息
@@ -420,7 +869,9 @@ class MessageBroker:
         Returns:
             Dict[str, Any]: 统计信息
         """
-        return self._stats.copy()
+        stats = self._stats.copy()
+        stats["subscribers_count"] = self.get_subscriber_count()
+        return stats
     
     def is_type_registered(self, message_type: str) -> bool:
         """
@@ -473,6 +924,18 @@ class MessageBroker:
         with self._handler_lock:
             return list(self._message_handlers.keys())
     
+    def get_registered_type_set(self) -> FrozenSet[str]:
+        """
+        获取已注册的消息类型集合
+        
+        适合需要多次做成员判断的场景（O(1) 查找）。
+        
+        Returns:
+            FrozenSet[str]: 消息类型集合
+        """
+        with self._handler_lock:
+            return frozenset(self._message_handlers)
+    
     def get_handler(self, message_type: str) -> Optional[Any]:
         """
         获取指定消息类型的处理器
@@ -496,11 +959,12 @@ class MessageBroker:
         Returns:
             int: 订阅者数量
         """
-        with self._subscription_lock:
-            if message_type:
-                return len(self._subscribers.get(message_type, []))
-            else:
-                return sum(len(subs) for subs in self._subscribers.values())
+        if message_type:
+            return len(self._subscribers.get(message_type, ()))
+        
+        # subscribe/unsubscribe 只持有各自类型的订阅锁写入条目（可能新增键），
+        # 先一次性复制值列表再求和，遍历期间字典大小变化不会影响统计
+        return sum(len(subs) for subs in list(self._subscribers.values()))
     
     def get_subscribers(self, message_type: str) -> List[Dict[str, Any]]:
         """
@@ -512,11 +976,22 @@ class MessageBroker:
         Returns:
             List[Dict[str, Any]]: 订阅者信息列表
         """
+        return [sub.to_dict() for sub in self._subscribers.get(message_type, ())]
+    
+    def clear_subscribers(self) -> None:
+        """
+        清除所有订阅者，保留已注册的消息类型和处理器
+        
+        用于在复用单例实例时（例如测试之间）重置订阅状态。
+        """
         with self._subscription_lock:
-            if message_type not in self._subscribers:
-                return []
-            
-            return [sub.to_dict() for sub in self._subscribers[message_type]]
+            message_types = list(self._subscribers)
+        
+        # 每个类型在其订阅锁下清空，避免并发的 subscribe 基于旧元组写回已清除的订阅者
+        for message_type in message_types:
+            with self._get_type_lock(message_type):
+                self._subscribers[message_type] = ()
+        logger.info("Cleared all subscribers")
     
     def initialize_handlers(
         self,
@@ -566,9 +1041,15 @@ class MessageBroker:
     def shutdown(self) -> None:
         """关闭消息代理，清理资源"""
         logger.info("Shutting down MessageBroker")
+        self.set_async_dispatch(False)
         with self._subscription_lock:
-            self._subscribers.clear()
+            message_types = list(self._subscribers)
+        
+        # 每个类型在其订阅锁下移除；类型锁本身保留，
+        # 其他线程可能仍持有这些锁，替换锁对象会破坏互斥
+        for message_type in message_types:
+            with self._get_type_lock(message_type):
+                self._subscribers.pop(message_type, None)
         with self._handler_lock:
             self._message_handlers.clear()
-        self._stats["subscribers_count"] = 0
         logger.info("MessageBroker shutdown complete")
@@ -3,11 +3,35 @@ Custom exceptions for the Message Broker module.
 """
 
 import logging
+import os
 import time
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 from .models import MessageData, ValidationResult
 
 
+# 短于该阈值的退避延迟可用忙等代替 sleep，避免调度器唤醒抖动（仅测试使用）
+_SPIN_BACKOFF_THRESHOLD = 0.005
+_SPIN_BACKOFF = os.getenv("BROKER_SPIN_BACKOFF", "false").lower() == "true"
+
+
+def _backoff_wait(delay: float) -> None:
+    """
+    等待退避延迟
+    
+    启用 BROKER_SPIN_BACKOFF 且延迟很短时忙等 time.monotonic()，
+    否则使用 time.sleep()。生产环境默认不启用，不会空转 CPU。
+    
+    Args:
+        delay: 延迟时间（秒）
+    """
+    if _SPIN_BACKOFF and delay < _SPIN_BACKOFF_THRESHOLD:
+        end = time.monotonic() + delay
+        while time.monotonic() < end:
+            pass
+    else:
+        time.sleep(delay)
+
+
 class BrokerError(Exception):
     """消息代理基础异常"""
     pass
@@ -66,7 +90,8 @@ class ErrorHandler:
             logger: 日志记录器，如果不提供则创建新的
         """
         self._logger = logger or logging.getLogger(__name__)
-        self._cache: dict = {}  # 简单的缓存机制
+        # 简单的缓存机制：operation_name -> (成功时的 monotonic 时间, 结果)
+        self._cache: Dict[str, Tuple[float, Any]] = {}
     
     def handle_validation_error(
         self, 
@@ -87,9 +112,12 @@ class ErrorHandler:
             message: 消息数据
             error: 验证结果
         """
+        if not self._logger.isEnabledFor(logging.ERROR):
+            return
+        
         self._logger.error(
-            f"Validation failed for message {message.message_id} "
-            f"of type '{message.type}': {error.errors}",
+            "Validation failed for message %s of type '%s': %s",
+            message.message_id, message.type, error.errors,
             extra={
                 "message_id": message.message_id,
                 "message_type": message.type,
@@ -108,13 +136,15 @@ class ErrorHandler:
         operation_name: str,
         error: Exception,
         max_retries: int = 3,
-        initial_delay: float = 0.1
+        initial_delay: float = 0.1,
+        ttl_seconds: Optional[float] = None
     ) -> Optional[Any]:
         """
         处理数据库错误
         
         使用指数退避策略重试数据库操作。如果所有重试都失败，
-        尝试返回缓存数据或空结果。
+        尝试返回缓存数据或空结果。如果指定了 ttl_seconds 且缓存仍在
+        有效期内，直接返回缓存结果而不再重试。
         
         实现要求：
         - Requirements 8.3: 记录错误日志
@@ -127,6 +157,7 @@ class ErrorHandler:
             error: 原始异常
             max_retries: 最大重试次数（默认 3）
             initial_delay: 初始延迟时间（秒，默认 0.1）
+            ttl_seconds: 缓存有效期（秒），为 None 时总是重试（默认 None）
             
         Returns:
             Optional[Any]: 操作结果，如果失败则返回缓存或 None
@@ -141,6 +172,15 @@ class ErrorHandler:
             exc_info=True
         )
         
+        # 缓存仍在有效期内时跳过重试
+        if ttl_seconds is not None:
+            cached = self._cache.get(operation_name)
+            if cached is not None and time.monotonic() - cached[0] < ttl_seconds:
+                self._logger.info(
+                    f"Returning fresh cached result for operation '{operation_name}'"
+                )
+                return cached[1]
+        
         # 尝试重试
         for attempt in range(max_retries):
             try:
@@ -151,7 +191,7 @@ class ErrorHandler:
                 result = operation()
                 
                 # 成功后缓存结果
-                self._cache[operation_name] = result
+                self._cache[operation_name] = (time.monotonic(), result)
                 
                 self._logger.info(
                     f"Operation '{operation_name}' succeeded on retry {attempt + 1}"
@@ -178,7 +218,7 @@ class ErrorHandler:
                     f"Retry {attempt + 1} failed for '{operation_name}', "
                     f"waiting {delay:.2f}s before next attempt"
                 )
-                time.sleep(delay)
+                _backoff_wait(delay)
         
         # 不应该到达这里，但为了安全返回缓存
         return self._get_cached_result(operation_name)
@@ -240,7 +280,7 @@ class ErrorHandler:
             self._logger.info(
                 f"Returning cached result for operation '{operation_name}'"
             )
-            return self._cache[operation_name]
+            return self._cache[operation_name][1]
         
         self._logger.warning(
             f"No cached result available for operation '{operation_name}', "
@@ -5,7 +5,7 @@ Message Type Handlers
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
 import logging
 
 from .models import ValidationResult, ProcessedMessage, MessageData
@@ -14,9 +14,84 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 
+def _validate_intensity(value: Any) -> Optional[str]:
+    """
+    验证强度值
+    
+    Args:
+        value: 强度值
+        
+    Returns:
+        Optional[str]: 警告信息，验证通过时返回 None
+    """
+    try:
+        intensity = float(value)
+    except (TypeError, ValueError):
+        return "Invalid intensity value, should be a number"
+    
+    if intensity < 0:
+        return "Intensity should be non-negative"
+    return None
+
+
+def build_validator(
+    schema: Dict[str, Dict[str, Any]]
+) -> Callable[[Dict[str, Any]], ValidationResult]:
+    """
+    根据固定的字段模式生成验证函数
+    
+    字段选项在创建时解析为检查列表，验证时只遍历该列表，避免在每次发布时
+    重新读取模式选项。适用于动态注册的、字段结构固定的消息类型。
+    
+    模式中每个字段支持的选项：
+    - required: 是否必需（默认 False）
+    - type: isinstance 检查的类型或类型元组（可选，字段存在时检查）
+    - missing_error: 缺少字段时的错误信息
+    - type_error: 类型不符时的错误信息
+    
+    使用示例：
+        validate = build_validator({
+            'custom_field': {'required': True},
+            'value': {'type': (int, float)},
+        })
+    
+    Args:
+        schema: 字段名到字段选项的映射
+        
+    Returns:
+        Callable: 接收消息数据并返回 ValidationResult 的验证函数
+    """
+    # (字段名, 缺少时的错误信息或 None, 期望类型或 None, 类型错误信息)
+    checks = tuple(
+        (
+            name,
+            options.get('missing_error', f"Missing required field: '{name}'")
+            if options.get('required', False) else None,
+            options.get('type'),
+            options.get('type_error', f"Field '{name}' has invalid type"),
+        )
+        for name, options in schema.items()
+    )
+    
+    def validate(data: Dict[str, Any]) -> ValidationResult:
+        errors = []
+        for name, missing_error, expected_type, type_error in checks:
+            if name not in data:
+                if missing_error is not None:
+                    errors.append(missing_error)
+            elif expected_type is not None and not isinstance(data[name], expected_type):
+                errors.append(type_error)
+        return ValidationResult(valid=not errors, errors=errors, warnings=[])
+    
+    return validate
+
+
 class MessageTypeHandler(ABC):
     """消息类型处理器抽象基类"""
     
+    # 基类不定义实例属性；子类声明 __slots__ 即可省去实例 __dict__
+    __slots__ = ()
+    
     @abstractmethod
     def validate(self, data: Dict[str, Any]) -> ValidationResult:
         """
@@ -57,9 +132,10 @@ class MessageTypeHandler(ABC):
 class DirectionMessageHandler(MessageTypeHandler):
     """方向消息处理器"""
     
-    VALID_COMMANDS = {
+    VALID_COMMANDS = frozenset({
         'forward', 'backward', 'turn_left', 'turn_right', 'stationary'
-    }
+    })
+    _VALID_COMMANDS_TEXT = ', '.join(VALID_COMMANDS)
     
     def validate(self, data: Dict[str, Any]) -> ValidationResult:
         """
@@ -78,7 +154,7 @@ class DirectionMessageHandler(MessageTypeHandler):
         elif data['command'] not in self.VALID_COMMANDS:
             errors.append(
                 f"Invalid command '{data['command']}'. "
-                f"Must be one of: {', '.join(self.VALID_COMMANDS)}"
+                f"Must be one of: {self._VALID_COMMANDS_TEXT}"
             )
         
         if 'timestamp' not in data:
@@ -86,12 +162,9 @@ class DirectionMessageHandler(MessageTypeHandler):
         
         # 可选字段验证
         if 'intensity' in data:
-            try:
-                intensity = float(data['intensity'])
-                if intensity < 0:
-                    warnings.append("Intensity should be non-negative")
-            except (TypeError, ValueError):
-                warnings.append("Invalid intensity value, should be a number")
+            intensity_warning = _validate_intensity(data['intensity'])
+            if intensity_warning:
+                warnings.append(intensity_warning)
         
         return ValidationResult(
             valid=len(errors) == 0,
@@ -132,6 +205,7 @@ class AngleMessageHandler(MessageTypeHandler):
     
     MIN_ANGLE = -180.0
     MAX_ANGLE = 360.0
+    _ANGLE_RANGE_TEXT = f"[{MIN_ANGLE}, {MAX_ANGLE}]"
     
     def validate(self, data: Dict[str, Any]) -> ValidationResult:
         """
@@ -153,7 +227,7 @@ class AngleMessageHandler(MessageTypeHandler):
                 if angle < self.MIN_ANGLE or angle > self.MAX_ANGLE:
                     errors.append(
                         f"Angle {angle} is out of valid range "
-                        f"[{self.MIN_ANGLE}, {self.MAX_ANGLE}]"
+                        f"{self._ANGLE_RANGE_TEXT}"
                     )
             except (TypeError, ValueError):
                 errors.append("Invalid angle value, should be a number")
@@ -251,7 +325,7 @@ class PassthroughHandler(MessageTypeHandler):
             timestamp=datetime.now()
         )
         
-        logger.debug(f"Passthrough handler processed message type: {self._message_type}")
+        logger.debug("Passthrough handler processed message type: %s", self._message_type)
         
         return ProcessedMessage(
             original=message,
@@ -269,7 +343,8 @@ class PassthroughHandler(MessageTypeHandler):
 class AIAlertMessageHandler(MessageTypeHandler):
     """AI 报警消息处理器（预留接口）"""
     
-    VALID_SEVERITIES = {'low', 'medium', 'high', 'critical'}
+    VALID_SEVERITIES = frozenset({'low', 'medium', 'high', 'critical'})
+    _VALID_SEVERITIES_TEXT = ', '.join(VALID_SEVERITIES)
     
     def validate(self, data: Dict[str, Any]) -> ValidationResult:
         """
@@ -292,7 +367,7 @@ class AIAlertMessageHandler(MessageTypeHandler):
         elif data['severity'] not in self.VALID_SEVERITIES:
             errors.append(
                 f"Invalid severity '{data['severity']}'. "
-                f"Must be one of: {', '.join(self.VALID_SEVERITIES)}"
+                f"Must be one of: {self._VALID_SEVERITIES_TEXT}"
             )
         
         if 'timestamp' not in data:
@@ -10,21 +10,118 @@ Logging Configuration for Message Broker
 - Requirements 8.4: 支持可配置日志级别
 """
 
+import atexit
+import copy
 import logging
 import logging.config
+import logging.handlers
+import queue
+import struct
 import sys
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 import json
 
+from .broker import get_message_type_id
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# logging 模块默认的调用者定位文件（用于恢复 funcName/lineno 采集）
+_DEFAULT_SRCFILE = logging._srcfile
+
+# 关闭调用者采集时 logging 填入 LogRecord.pathname 的占位值
+_UNKNOWN_CALLER_FILE = "(unknown file)"
+
+
+def set_record_introspection(enabled: bool) -> None:
+    """
+    开启或关闭 LogRecord 的调用者/线程/进程信息采集
+
+    关闭后每条日志不再遍历调用栈填充 funcName/lineno，
+    也不再查询线程名、进程 ID，可显著降低高频日志的开销。
+    该设置作用于整个进程的 logging 模块（包括 uvicorn 等第三方日志记录器）。
+
+    Args:
+        enabled: 是否采集调用者、线程和进程信息
+    """
+    logging._srcfile = _DEFAULT_SRCFILE if enabled else None
+    logging.logThreads = enabled
+    logging.logProcesses = enabled
+    logging.logMultiprocessing = enabled
+
+
+def is_record_introspection_enabled() -> bool:
+    """
+    查询 LogRecord 的调用者信息采集是否开启
+
+    Returns:
+        bool: 是否采集调用者信息
+    """
+    return logging._srcfile is not None
+
+
+def _dumps(value: Any) -> str:
+    """将值序列化为 JSON 字符串（优先使用 orjson）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value).decode("utf-8")
+    return json.dumps(value, ensure_ascii=False)
+
 
 class StructuredFormatter(logging.Formatter):
     """
     结构化日志格式化器
     
     将日志输出为 JSON 格式，便于日志分析和监控。
+    安装了 orjson 时使用其 C 实现序列化，否则回退到标准库 json。
+    
+    固定字段的 JSON 骨架按 (级别, 日志记录器) 预先序列化并缓存，
+    每条记录只需序列化变化的值并拼接字符串。
+    未采集调用者信息的记录（见 set_record_introspection）不输出
+    module/function/line 字段。
     """
     
+    # 固定输出的基础字段
+    BASE_FIELDS = frozenset([
+        "timestamp", "level", "logger", "message", "module", "function", "line"
+    ])
+    
+    # 优先输出的上下文字段
+    CONTEXT_FIELDS = ("message_id", "message_type", "subscriber_id", "operation")
+    
+    # LogRecord 的内置属性，不作为 extra 字段输出
+    RESERVED_ATTRS = frozenset([
+        "name", "msg", "args", "created", "filename", "funcName",
+        "levelname", "levelno", "lineno", "module", "msecs",
+        "message", "pathname", "process", "processName",
+        "relativeCreated", "thread", "threadName", "exc_info",
+        "exc_text", "stack_info", "getMessage", "message_id",
+        "message_type", "subscriber_id", "operation"
+    ])
+    
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # (levelno, logger name) -> 预序列化的 level/logger 片段
+        self._header_cache: Dict[tuple, str] = {}
+    
+    def _get_header(self, record: logging.LogRecord) -> str:
+        """获取缓存的 level/logger JSON 片段"""
+        key = (record.levelno, record.name)
+        header = self._header_cache.get(key)
+        if header is None:
+            header = (
+                f',"level":{_dumps(record.levelname)}'
+                f',"logger":{_dumps(record.name)}'
+                ',"message":'
+            )
+            self._header_cache[key] = header
+        return header
+    
     def format(self, record: logging.LogRecord) -> str:
         """
         格式化日志记录为 JSON
@@ -35,43 +132,55 @@ class StructuredFormatter(logging.Formatter):
         Returns:
             str: JSON 格式的日志字符串
         """
-        log_data = {
-            "timestamp": datetime.fromtimestamp(record.created).isoformat(),
-            "level": record.levelname,
-            "logger": record.name,
-            "message": record.getMessage(),
-            "module": record.module,
-            "function": record.funcName,
-            "line": record.lineno,
-        }
-        
         # 添加额外的上下文信息
-        if hasattr(record, "message_id"):
-            log_data["message_id"] = record.message_id
-        if hasattr(record, "message_type"):
-            log_data["message_type"] = record.message_type
-        if hasattr(record, "subscriber_id"):
-            log_data["subscriber_id"] = record.subscriber_id
-        if hasattr(record, "operation"):
-            log_data["operation"] = record.operation
+        extra_data: Dict[str, Any] = {}
+        for key in self.CONTEXT_FIELDS:
+            if hasattr(record, key):
+                extra_data[key] = getattr(record, key)
         
         # 添加异常信息
         if record.exc_info:
-            log_data["exception"] = self.formatException(record.exc_info)
+            extra_data["exception"] = self.formatException(record.exc_info)
         
         # 添加所有 extra 字段
         for key, value in record.__dict__.items():
-            if key not in [
-                "name", "msg", "args", "created", "filename", "funcName",
-                "levelname", "levelno", "lineno", "module", "msecs",
-                "message", "pathname", "process", "processName",
-                "relativeCreated", "thread", "threadName", "exc_info",
-                "exc_text", "stack_info", "getMessage", "message_id",
-                "message_type", "subscriber_id", "operation"
-            ]:
-                log_data[key] = value
+            if key not in self.RESERVED_ATTRS:
+                extra_data[key] = value
+        
+        timestamp = datetime.fromtimestamp(record.created).isoformat()
+        has_caller = record.pathname != _UNKNOWN_CALLER_FILE
+        
+        # extra 字段覆盖了基础字段时，按完整字典序列化以保持覆盖语义
+        if not self.BASE_FIELDS.isdisjoint(extra_data):
+            log_data = {
+                "timestamp": timestamp,
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+            }
+            if has_caller:
+                log_data["module"] = record.module
+                log_data["function"] = record.funcName
+                log_data["line"] = record.lineno
+            log_data.update(extra_data)
+            return _dumps(log_data)
+        
+        parts = [
+            '{"timestamp":"', timestamp, '"',
+            self._get_header(record), _dumps(record.getMessage()),
+        ]
+        if has_caller:
+            parts += [
+                ',"module":', _dumps(record.module),
+                ',"function":', _dumps(record.funcName),
+                ',"line":', str(record.lineno),
+            ]
+        if extra_data:
+            parts.append(",")
+            parts.append(_dumps(extra_data)[1:-1])
+        parts.append("}")
         
-        return json.dumps(log_data, ensure_ascii=False)
+        return "".join(parts)
 
 
 class SimpleFormatter(logging.Formatter):
@@ -88,10 +197,384 @@ class SimpleFormatter(logging.Formatter):
         )
 
 
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    """
+    进程内队列处理器
+    
+    只在发送线程中合并消息参数，保留异常信息和 extra 字段，
+    由后台监听线程中的目标处理器完成最终格式化。
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class _BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    批量写入的滚动文件处理器
+    
+    使用 64KB 写缓冲，且每条记录写入后不立即 flush，
+    由外层的 _FileBatchHandler 在一批记录写完后统一 flush。
+    """
+    
+    BUFFER_SIZE = 64 * 1024
+    
+    def _open(self):
+        return open(
+            self.baseFilename,
+            self.mode,
+            buffering=self.BUFFER_SIZE,
+            encoding=self.encoding,
+            errors=self.errors,
+        )
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+# 文件日志缓存的最长时间（秒）：超过后即使未满一批也写入文件
+_FILE_FLUSH_INTERVAL = 1.0
+
+
+class _FileBatchHandler(logging.handlers.MemoryHandler):
+    """
+    文件日志批量处理器
+    
+    缓存日志记录，达到容量、遇到 ERROR 及以上级别或距上次写入超过
+    _FILE_FLUSH_INTERVAL 秒时一次性写入目标文件，并在每批结束时只 flush 一次，
+    避免逐条 write()/flush() 系统调用。
+    """
+    
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._last_flush = time.monotonic()
+    
+    def shouldFlush(self, record: logging.LogRecord) -> bool:
+        return (
+            super().shouldFlush(record)
+            or time.monotonic() - self._last_flush >= _FILE_FLUSH_INTERVAL
+        )
+    
+    def flush(self) -> None:
+        super().flush()
+        with self.lock:
+            if self.target is not None:
+                self.target.flush()
+            self._last_flush = time.monotonic()
+
+
+class _FlushingQueueListener(logging.handlers.QueueListener):
+    """
+    空闲时写出缓存的队列监听器
+    
+    队列在 _FILE_FLUSH_INTERVAL 秒内没有新记录时 flush 所有处理器，
+    日志量很小时缓存的记录也能及时写入文件（tail -f 可见，进程被强制结束时不丢失）。
+    """
+    
+    def dequeue(self, block: bool) -> Any:
+        if not block:
+            return self.queue.get(block=False)
+        while True:
+            try:
+                return self.queue.get(timeout=_FILE_FLUSH_INTERVAL)
+            except queue.Empty:
+                for handler in self.handlers:
+                    handler.flush()
+
+
+# 文件日志的后台写入线程（由 configure_broker_logging 创建）
+_file_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _stop_file_listener() -> None:
+    """停止文件日志后台线程，写出队列中剩余的日志并关闭文件"""
+    global _file_listener
+    if _file_listener is None:
+        return
+    
+    _file_listener.stop()
+    for handler in _file_listener.handlers:
+        target = getattr(handler, "target", None)
+        handler.close()
+        if target is not None:
+            target.close()
+    _file_listener = None
+
+
+atexit.register(_stop_file_listener)
+
+
+def _create_queued_file_handler(
+    filename: str,
+    file_formatter: logging.Formatter,
+) -> logging.Handler:
+    """
+    创建经由队列写入的文件日志处理器
+    
+    日志记录先放入内存队列，由后台 QueueListener 线程写入文件，
+    发布/订阅等调用方不会阻塞在文件 write()/flush() 上。
+    后台线程再按批（256 条、遇到 ERROR 或缓存超过 1 秒）写入文件，减少系统调用次数；
+    队列空闲时也会写出缓存的记录。
+    
+    Args:
+        filename: 日志文件路径
+        file_formatter: 文件输出使用的格式化器
+        
+    Returns:
+        logging.Handler: 挂载到日志记录器上的队列处理器
+    """
+    global _file_listener
+    
+    file_handler = _BufferedRotatingFileHandler(
+        filename,
+        maxBytes=10485760,  # 10MB
+        backupCount=5,
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(file_formatter)
+    
+    batch_handler = _FileBatchHandler(
+        capacity=256,
+        flushLevel=logging.ERROR,
+        target=file_handler,
+    )
+    
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _file_listener = _FlushingQueueListener(log_queue, batch_handler)
+    _file_listener.start()
+    
+    return _InProcessQueueHandler(log_queue)
+
+
+def flush_broker_logging() -> None:
+    """
+    将队列中尚未写出的文件日志全部写入文件
+    
+    适用于需要立即读取日志文件内容的场景（例如测试）。
+    """
+    if _file_listener is None:
+        return
+    
+    # stop() 会处理完队列中的全部记录，随后重新启动后台线程
+    _file_listener.stop()
+    for handler in _file_listener.handlers:
+        handler.flush()
+    _file_listener.start()
+
+
+def _message_id_to_int(message_id: Any) -> int:
+    """将消息ID（UUID 字符串）转换为 uint64（取 UUID 低 64 位）"""
+    if not message_id:
+        return 0
+    try:
+        return int(message_id[-17:].replace("-", ""), 16)
+    except (TypeError, ValueError):
+        return hash(message_id) & 0xFFFFFFFFFFFFFFFF
+
+
+def _type_table_path(filename: str) -> str:
+    """二进制日志对应的类型表文件路径"""
+    return filename + ".types"
+
+
+class BinaryBrokerHandler(logging.Handler):
+    """
+    二进制消息日志处理器
+    
+    将携带 message_type 的发布/订阅遥测记录写成定长二进制记录，
+    完全跳过文本格式化，适用于高频消息场景。未携带 message_type
+    的日志记录会被忽略。
+    
+    记录格式（小端，22 字节）：
+    - timestamp_ns: uint64  记录创建时间（纳秒）
+    - level:        uint8   日志级别数值
+    - type_id:      uint16  消息类型ID（见 broker.get_message_type_id）
+    - message_id:   uint64  消息ID（UUID 低 64 位）
+    - subscribers:  uint16  已通知的订阅者数量
+    - flags:        uint8   bit0: 带异常信息
+    
+    类型ID只在写入进程内有效，因此 ID 与名称的对应表写入日志旁的
+    "<filename>.types" 文件（每行一个 JSON 对象：生效的字节偏移、ID、名称）。
+    每种类型在本处理器中第一次写入前追加一行；追加到已有日志时，
+    偏移保证读取时旧记录仍按旧的对应表解码。
+    """
+    
+    RECORD_STRUCT = struct.Struct("<QBHQHB")
+    FLAG_EXCEPTION = 0x01
+    
+    def __init__(self, filename: str, mode: str = "ab"):
+        """
+        初始化二进制日志处理器
+        
+        Args:
+            filename: 二进制日志文件路径
+            mode: 文件打开模式（默认追加）
+        """
+        super().__init__()
+        self._stream = open(filename, mode, buffering=64 * 1024)
+        self._type_stream = open(
+            _type_table_path(filename),
+            "a" if "a" in mode else "w",
+            encoding="utf-8",
+        )
+        self._buffer = bytearray(self.RECORD_STRUCT.size)
+        # 下一条记录在日志文件中的字节偏移
+        self._offset = self._stream.seek(0, 2)
+        # 本处理器已写入类型表的类型ID
+        self._written_type_ids: set = set()
+    
+    def _write_type_entry(self, type_id: int, message_type: str) -> None:
+        """将类型ID与名称的对应关系追加到类型表（从当前偏移起生效）"""
+        self._type_stream.write(
+            _dumps({"offset": self._offset, "id": type_id, "name": message_type}) + "\n"
+        )
+        self._type_stream.flush()
+        self._written_type_ids.add(type_id)
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        message_type = getattr(record, "message_type", None)
+        if message_type is None:
+            return
+        
+        try:
+            type_id = get_message_type_id(message_type)
+            if type_id not in self._written_type_ids:
+                self._write_type_entry(type_id, message_type)
+            
+            self.RECORD_STRUCT.pack_into(
+                self._buffer,
+                0,
+                int(record.created * 1e9),
+                record.levelno,
+                type_id,
+                _message_id_to_int(getattr(record, "message_id", None)),
+                min(getattr(record, "subscribers_notified", 0), 0xFFFF),
+                self.FLAG_EXCEPTION if record.exc_info else 0,
+            )
+            self._stream.write(self._buffer)
+            self._offset += self.RECORD_STRUCT.size
+        except Exception:
+            self.handleError(record)
+    
+    def flush(self) -> None:
+        with self.lock:
+            if self._stream and not self._stream.closed:
+                self._stream.flush()
+    
+    def close(self) -> None:
+        with self.lock:
+            try:
+                if self._stream and not self._stream.closed:
+                    self._stream.flush()
+                    self._stream.close()
+                if self._type_stream and not self._type_stream.closed:
+                    self._type_stream.close()
+            finally:
+                super().close()
+
+
+def _read_type_table(filename: str) -> Dict[int, List[tuple]]:
+    """
+    读取二进制日志的类型表
+    
+    Args:
+        filename: 二进制日志文件路径
+        
+    Returns:
+        Dict[int, List[tuple]]: 类型ID -> 按偏移排序的 (生效偏移, 名称) 列表；
+        类型表不存在时为空字典
+    """
+    table: Dict[int, List[tuple]] = {}
+    try:
+        with open(_type_table_path(filename), encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                table.setdefault(entry["id"], []).append((entry["offset"], entry["name"]))
+    except FileNotFoundError:
+        return {}
+    
+    for entries in table.values():
+        entries.sort()
+    return table
+
+
+def read_binary_log(filename: str) -> List[Dict[str, Any]]:
+    """
+    读取 BinaryBrokerHandler 写入的二进制日志
+    
+    消息类型名称按日志旁的类型表解码，与写入日志的进程无关；
+    类型表缺失或没有对应条目时 message_type 为 None。
+    
+    Args:
+        filename: 二进制日志文件路径
+        
+    Returns:
+        List[Dict[str, Any]]: 解码后的记录列表
+    """
+    type_table = _read_type_table(filename)
+    
+    with open(filename, "rb") as f:
+        data = f.read()
+    
+    record_size = BinaryBrokerHandler.RECORD_STRUCT.size
+    records = []
+    for index, (timestamp_ns, level, type_id, message_id, subscribers, flags) in enumerate(
+        BinaryBrokerHandler.RECORD_STRUCT.iter_unpack(data)
+    ):
+        # 取在该记录偏移处已生效的最新对应关系
+        offset = index * record_size
+        message_type = None
+        for entry_offset, name in type_table.get(type_id, ()):
+            if entry_offset > offset:
+                break
+            message_type = name
+        
+        records.append({
+            "timestamp_ns": timestamp_ns,
+            "level": logging.getLevelName(level),
+            "message_type": message_type,
+            "message_id": message_id,
+            "subscribers_notified": subscribers,
+            "has_exception": bool(flags & BinaryBrokerHandler.FLAG_EXCEPTION),
+        })
+    return records
+
+
+# 最近一次 configure_broker_logging 应用的处理器配置（不含日志级别）
+_applied_handler_config: Optional[tuple] = None
+
+# 由 configure_broker_logging 配置处理器的日志记录器名称（"" 为根记录器）
+_BROKER_LOGGER_NAMES = ("src.broker", "broker", "")
+
+_VALID_LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+
+def _normalize_log_level(log_level: str) -> str:
+    """将日志级别转换为大写，无效级别回退为 INFO"""
+    log_level = log_level.upper()
+    if log_level not in _VALID_LOG_LEVELS:
+        log_level = "INFO"
+    return log_level
+
+
 def configure_broker_logging(
     log_level: str = "INFO",
     use_structured: bool = False,
-    log_file: Optional[str] = None
+    log_file: Optional[str] = None,
+    include_caller_info: Optional[bool] = None,
+    binary_log_file: Optional[str] = None
 ) -> None:
     """
     配置消息代理的日志系统
@@ -105,12 +588,19 @@ def configure_broker_logging(
         log_level: 日志级别 (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         use_structured: 是否使用结构化日志（JSON 格式）
         log_file: 日志文件路径（可选）
+        include_caller_info: 是否采集调用者函数名/行号及线程、进程信息。
+            该设置作用于整个进程的 logging 模块：默认 None 不修改当前设置；
+            False 关闭采集以降低高频日志开销，True 重新开启
+        binary_log_file: 二进制消息日志文件路径（可选），
+            用于记录高频发布遥测（见 BinaryBrokerHandler）
     """
+    global _applied_handler_config
+    
+    if include_caller_info is not None:
+        set_record_introspection(include_caller_info)
+    
     # 验证日志级别
-    valid_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
-    log_level = log_level.upper()
-    if log_level not in valid_levels:
-        log_level = "INFO"
+    log_level = _normalize_log_level(log_level)
     
     # 选择格式化器
     if use_structured:
@@ -130,16 +620,24 @@ def configure_broker_logging(
         }
     }
     
-    # 如果指定了日志文件，添加文件处理器
+    # 重新配置前停止上一次的文件写入线程（dictConfig 会关闭现有处理器）
+    _stop_file_listener()
+    
+    # 如果指定了日志文件，添加经由队列异步写入的文件处理器
     if log_file:
         handlers["file"] = {
-            "class": "logging.handlers.RotatingFileHandler",
+            "()": _create_queued_file_handler,
             "level": log_level,
-            "formatter": "default",
             "filename": log_file,
-            "maxBytes": 10485760,  # 10MB
-            "backupCount": 5,
-            "encoding": "utf-8",
+            "file_formatter": formatter_class(**formatter_config),
+        }
+    
+    # 如果指定了二进制日志文件，添加二进制消息日志处理器
+    if binary_log_file:
+        handlers["binary"] = {
+            "()": BinaryBrokerHandler,
+            "level": log_level,
+            "filename": binary_log_file,
         }
     
     # 日志配置字典
@@ -174,6 +672,9 @@ def configure_broker_logging(
     
     # 应用配置
     logging.config.dictConfig(config)
+    _applied_handler_config = (
+        use_structured, log_file, include_caller_info, binary_log_file
+    )
     
     # 记录配置信息
     logger = logging.getLogger("src.broker")
@@ -183,6 +684,62 @@ def configure_broker_logging(
     )
 
 
+def init_broker_logging(
+    log_level: str = "INFO",
+    use_structured: bool = False,
+    log_file: Optional[str] = None,
+    include_caller_info: Optional[bool] = None,
+    binary_log_file: Optional[str] = None
+) -> None:
+    """
+    初始化消息代理的日志系统（幂等）
+    
+    处理器配置与上一次相同时只调整日志级别，不重建处理器和格式化器；
+    否则执行完整的 configure_broker_logging。
+    
+    Args:
+        log_level: 日志级别 (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        use_structured: 是否使用结构化日志（JSON 格式）
+        log_file: 日志文件路径（可选）
+        include_caller_info: 是否采集调用者函数名/行号及线程、进程信息
+            （None 不修改当前设置）
+        binary_log_file: 二进制消息日志文件路径（可选）
+    """
+    handler_config = (
+        use_structured, log_file, include_caller_info, binary_log_file
+    )
+    if handler_config == _applied_handler_config:
+        set_broker_log_level(log_level)
+        return
+    
+    configure_broker_logging(
+        log_level=log_level,
+        use_structured=use_structured,
+        log_file=log_file,
+        include_caller_info=include_caller_info,
+        binary_log_file=binary_log_file
+    )
+
+
+def set_broker_log_level(log_level: str) -> None:
+    """
+    调整消息代理日志级别，保留已配置的处理器和格式化器
+    
+    实现要求：
+    - Requirements 8.4: 支持可配置日志级别
+    
+    Args:
+        log_level: 日志级别 (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+    """
+    level = _normalize_log_level(log_level)
+    
+    for name in _BROKER_LOGGER_NAMES:
+        logger = logging.getLogger(name)
+        logger.setLevel(level)
+        for handler in logger.handlers:
+            handler.setLevel(level)
+
+
 def get_broker_logger(name: str) -> logging.Logger:
     """
     获取消息代理的日志记录器
@@ -4,6 +4,8 @@ MessageBroker 核心功能测试
 测试消息代理的单例模式、消息类型注册、发布订阅机制等核心功能。
 """
 
+import asyncio
+import logging
 import pytest
 import threading
 import time
@@ -131,6 +133,7 @@ class TestMessageTypeRegistration:
         
         assert broker.is_type_registered("test_type")
         assert "test_type" in broker.get_registered_types()
+        assert "test_type" in broker.get_registered_type_set()
     
     def test_register_duplicate_type_fails(self, broker):
         """测试重复注册相同类型会失败"""
@@ -519,6 +522,238 @@ class TestThreadSafety:
         assert broker.get_subscriber_count("test_type") == 0
 
 
+    def test_subscription_changes_during_publish_use_snapshot(self, broker):
+        """测试通知过程中订阅/取消订阅不影响当前消息的订阅者快照"""
+        handler = MockMessageHandler("test_type")
+        broker.register_message_type("test_type", handler)
+        
+        calls = []
+        late_sub_ids = []
+        
+        def first_callback(msg):
+            calls.append("first")
+            # 通知过程中新增订阅并取消后一个订阅者
+            late_sub_ids.append(
+                broker.subscribe("test_type", lambda m: calls.append("late"))
+            )
+            broker.unsubscribe("test_type", second_id)
+        
+        def second_callback(msg):
+            calls.append("second")
+        
+        broker.subscribe("test_type", first_callback)
+        second_id = broker.subscribe("test_type", second_callback)
+        
+        result = broker.publish("test_type", {"value": "test"})
+        
+        # 本次发布使用发布开始时的快照
+        assert calls == ["first", "second"]
+        assert result.subscribers_notified == 2
+        assert broker.get_subscriber_count("test_type") == 2
+
+
+class TestPublishBatch:
+    """测试批量发布"""
+    
+    def test_publish_batch_preserves_order(self, broker):
+        """测试批量发布按顺序通知每个订阅者"""
+        handler = MockMessageHandler("test_type")
+        broker.register_message_type("test_type", handler)
+        
+        received_1 = []
+        received_2 = []
+        broker.subscribe("test_type", lambda msg: received_1.append(msg.data["value"]))
+        broker.subscribe("test_type", lambda msg: received_2.append(msg.data["value"]))
+        
+        results = broker.publish_batch("test_type", [{"value": i} for i in range(5)])
+        
+        assert len(results) == 5
+        assert all(r.success and r.subscribers_notified == 2 for r in results)
+        assert received_1 == [0, 1, 2, 3, 4]
+        assert received_2 == [0, 1, 2, 3, 4]
+        assert broker.get_stats()["messages_published"] == 5
+    
+    def test_publish_batch_skips_invalid_messages(self, broker):
+        """测试批量发布中的无效消息不分发且不影响其他消息"""
+        handler = MockMessageHandler("test_type")
+        broker.register_message_type("test_type", handler)
+        
+        received = []
+        
+        def bad_callback(msg):
+            raise Exception("Subscriber error")
+        
+        broker.subscribe("test_type", bad_callback)
+        broker.subscribe("test_type", received.append)
+        
+        results = broker.publish_batch("test_type", [
+            {"value": 1},
+            {"invalid": "data"},
+            {"value": 3},
+        ])
+        
+        assert [r.success for r in results] == [True, False, True]
+        assert results[1].errors
+        assert [r.subscribers_notified for r in results] == [1, 0, 1]
+        assert [msg.data["value"] for msg in received] == [1, 3]
+        assert broker.get_stats()["messages_failed"] == 1
+    
+    def test_publish_batch_to_unregistered_type_fails(self, broker):
+        """测试批量发布到未注册类型失败"""
+        with pytest.raises(PublishError):
+            broker.publish_batch("unknown_type", [{"value": 1}])
+
+
+class TestSubscribeStream:
+    """测试按批次消费的异步订阅流"""
+    
+    @pytest.mark.asyncio
+    async def test_stream_yields_batches_in_order(self, broker):
+        """测试积压消息按发布顺序分批取出"""
+        handler = MockMessageHandler("test_type")
+        broker.register_message_type("test_type", handler)
+        
+        stream = broker.subscribe_stream("test_type", batch_size=4)
+        # 第一次迭代时注册订阅，此时尚无消息
+        first = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        assert broker.get_subscriber_count("test_type") == 1
+        
+        broker.publish_batch("test_type", [{"value": i} for i in range(10)])
+        
+        batches = [await asyncio.wait_for(first, timeout=1.0)]
+        while sum(map(len, batches)) < 10:
+            batches.append(await asyncio.wait_for(stream.__anext__(), timeout=1.0))
+        
+        assert [len(batch) for batch in batches] == [4, 4, 2]
+        assert [msg.data["value"] for batch in batches for msg in batch] == list(range(10))
+        
+        await stream.aclose()
+        assert broker.get_subscriber_count("test_type") == 0
+    
+    @pytest.mark.asyncio
+    async def test_stream_receives_from_other_thread(self, broker):
+        """测试在其他线程中发布的消息唤醒消费协程"""
+        handler = MockMessageHandler("test_type")
+        broker.register_message_type("test_type", handler)
+        
+        received = []
+        
+        async def consume():
+            async for batch in broker.subscribe_stream("test_type"):
+                received.extend(msg.data["value"] for msg in batch)
+                if len(received) >= 3:
+                    break
+        
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0)
+        
+        publisher = threading.Thread(
+            target=lambda: [broker.publish("test_type", {"value": i}) for i in range(3)]
+        )
+        publisher.start()
+        await asyncio.wait_for(task, timeout=1.0)
+        publisher.join()
+        
+        assert received == [0, 1, 2]
+        assert broker.get_subscriber_count("test_type") == 0
+    
+    @pytest.mark.asyncio
+    async def test_stream_drops_oldest_when_full(self, broker, caplog):
+        """测试积压超过上限时丢弃最旧的消息并记录警告"""
+        handler = MockMessageHandler("test_type")
+        broker.register_message_type("test_type", handler)
+        
+        stream = broker.subscribe_stream("test_type", batch_size=16, max_pending=3)
+        first = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        
+        with caplog.at_level(logging.WARNING, logger="src.broker.broker"):
+            broker.publish_batch("test_type", [{"value": i} for i in range(5)])
+            batch = await asyncio.wait_for(first, timeout=1.0)
+        
+        assert [msg.data["value"] for msg in batch] == [2, 3, 4]
+        warnings = [r for r in caplog.records if r.levelno == logging.WARNING]
+        assert len(warnings) == 1
+        assert "dropped 2 oldest messages" in warnings[0].getMessage()
+        await stream.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_stream_unregistered_type_fails(self, broker):
+        """测试订阅未注册类型失败"""
+        with pytest.raises(SubscriptionError):
+            await broker.subscribe_stream("unknown_type").__anext__()
+
+
+class TestAsyncDispatch:
+    """测试线程池异步分发"""
+    
+    def test_async_dispatch_delivers_messages(self, broker):
+        """测试异步分发时订阅者在线程池中收到消息"""
+        handler = MockMessageHandler("test_type")
+        broker.register_message_type("test_type", handler)
+        broker.set_async_dispatch(True, max_workers=2)
+        
+        received = threading.Event()
+        callback_threads = []
+        
+        def callback(msg):
+            callback_threads.append(threading.current_thread().name)
+            received.set()
+        
+        broker.subscribe("test_type", callback)
+        result = broker.publish("test_type", {"value": "test"})
+        
+        assert result.success
+        assert result.subscribers_notified == 1
+        assert received.wait(timeout=2.0)
+        assert callback_threads[0].startswith("broker")
+    
+    def test_async_dispatch_error_isolation(self, broker):
+        """测试异步分发时订阅者错误被隔离"""
+        handler = MockMessageHandler("test_type")
+        broker.register_message_type("test_type", handler)
+        broker.set_async_dispatch(True)
+        
+        good_received = []
+        
+        def bad_callback(msg):
+            raise Exception("Subscriber error")
+        
+        broker.subscribe("test_type", bad_callback)
+        broker.subscribe("test_type", good_received.append)
+        
+        broker.publish("test_type", {"value": "test"})
+        
+        # 关闭异步分发会等待已提交的回调完成
+        broker.set_async_dispatch(False)
+        
+        assert len(good_received) == 1
+    
+    def test_publish_falls_back_when_pool_shut_down(self, broker):
+        """测试发布者持有的线程池已被关闭时，改为同步通知订阅者"""
+        handler = MockMessageHandler("test_type")
+        broker.register_message_type("test_type", handler)
+        broker.set_async_dispatch(True)
+        
+        received = []
+        broker.subscribe("test_type", received.append)
+        broker.subscribe("test_type", received.append)
+        
+        # 模拟 set_async_dispatch(False) 与发布并发：线程池已开始关闭，发布者仍持有其引用
+        broker._dispatch_pool.shutdown(wait=True)
+        
+        result = broker.publish("test_type", {"value": "single"})
+        assert result.success
+        assert result.subscribers_notified == 2
+        
+        results = broker.publish_batch("test_type", [{"value": "a"}, {"value": "b"}])
+        assert [r.subscribers_notified for r in results] == [2, 2]
+        
+        # 回退为同步通知，发布返回时回调均已执行
+        assert len(received) == 6
+
+
 class TestShutdown:
     """测试关闭和清理"""
     
@@ -535,6 +770,43 @@ class TestShutdown:
         
         assert broker.get_subscriber_count() == 0
         assert len(broker.get_registered_types()) == 0
+    
+    def test_clear_subscribers_keeps_types(self, broker):
+        """测试清除订阅者保留已注册的消息类型"""
+        handler = MockMessageHandler("test_type")
+        broker.register_message_type("test_type", handler)
+        broker.subscribe("test_type", lambda msg: None)
+        
+        broker.clear_subscribers()
+        
+        assert broker.get_subscriber_count() == 0
+        assert broker.is_type_registered("test_type")
+        
+        # 清除后仍可重新订阅
+        broker.subscribe("test_type", lambda msg: None)
+        assert broker.get_subscriber_count("test_type") == 1
+    
+    def test_clear_subscribers_waits_for_type_lock(self, broker):
+        """测试清除订阅者在该类型的订阅锁下进行，不与并发的订阅交错"""
+        handler = MockMessageHandler("test_type")
+        broker.register_message_type("test_type", handler)
+        broker.subscribe("test_type", lambda msg: None)
+        
+        type_lock = broker._get_type_lock("test_type")
+        type_lock.acquire()
+        try:
+            clearer = threading.Thread(target=broker.clear_subscribers)
+            clearer.start()
+            clearer.join(timeout=0.1)
+            # 订阅锁被占用（模拟进行中的 subscribe），清除必须等待
+            assert clearer.is_alive()
+            assert broker.get_subscriber_count("test_type") == 1
+        finally:
+            type_lock.release()
+        
+        clearer.join(timeout=2.0)
+        assert not clearer.is_alive()
+        assert broker.get_subscriber_count("test_type") == 0
 
 
 if __name__ == "__main__":
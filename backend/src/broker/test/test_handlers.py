@@ -18,6 +18,7 @@ from src.broker.handlers import (
     DirectionMessageHandler,
     AngleMessageHandler,
     AIAlertMessageHandler,
+    build_validator,
 )
 
 
@@ -314,5 +315,48 @@ class TestAIAlertMessageHandler:
         assert handler.get_type_name() == 'ai_alert'
 
 
+class TestBuildValidator:
+    """测试由字段模式生成的验证函数"""
+    
+    @pytest.fixture
+    def validate(self):
+        return build_validator({
+            'name': {'required': True},
+            'value': {
+                'type': (int, float),
+                'type_error': "Field 'value' must be a number",
+            },
+            'unit': {'required': True, 'missing_error': "Missing unit"},
+        })
+    
+    def test_valid_data(self, validate):
+        """测试合法数据"""
+        result = validate({'name': 'x', 'value': 1.5, 'unit': 'm'})
+        assert result.valid is True
+        assert result.errors == []
+    
+    def test_missing_fields(self, validate):
+        """测试缺少必需字段（默认与自定义错误信息）"""
+        result = validate({'value': 1})
+        assert result.valid is False
+        assert result.errors == ["Missing required field: 'name'", "Missing unit"]
+    
+    def test_invalid_type(self, validate):
+        """测试字段类型错误"""
+        result = validate({'name': 'x', 'value': 'abc', 'unit': 'm'})
+        assert result.valid is False
+        assert result.errors == ["Field 'value' must be a number"]
+    
+    def test_optional_field_absent(self, validate):
+        """测试可选字段缺失时不做类型检查"""
+        result = validate({'name': 'x', 'unit': 'm'})
+        assert result.valid is True
+    
+    def test_field_name_is_not_code(self):
+        """测试字段名只作为字典键使用，不会被执行"""
+        validate = build_validator({"a'] or True or ['": {'required': True}})
+        assert validate({}).valid is False
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "-s"])
@@ -5,6 +5,7 @@ from .enums import (
     TaskStatus,
     EventType,
     ErrorType,
+    SensorField,
 )
 
 from .models import (
@@ -22,6 +23,7 @@ from .models import (
     ErrorInfo,
     SystemEvent,
     TaskInfo,
+    SensorFrame,
 )
 
 from .interfaces import (
@@ -57,6 +59,7 @@ __all__ = [
     "TaskStatus",
     "EventType",
     "ErrorType",
+    "SensorField",
     # Models
     "CollectedData",
     "ParsedMetadata",
@@ -72,6 +75,7 @@ __all__ = [
     "ErrorInfo",
     "SystemEvent",
     "TaskInfo",
+    "SensorFrame",
     # Collection Layer Interfaces
     "IDataSource",
     "IMetadataParser",
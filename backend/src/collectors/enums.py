@@ -1,6 +1,6 @@
 """Enumeration types for the Data Collector Module."""
 
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class CollectionStatus(Enum):
@@ -39,3 +39,25 @@ class ErrorType(Enum):
     VALIDATION = "validation"
     PROCESSING = "processing"
     STORAGE = "storage"
+
+
+class SensorField(IntEnum):
+    """传感器数据帧 (SensorFrame.arr) 中各数值字段的下标"""
+    ACC_X = 0
+    ACC_Y = 1
+    ACC_Z = 2
+    GYRO_X = 3
+    GYRO_Y = 4
+    GYRO_Z = 5
+    ANGLE_X = 6
+    ANGLE_Y = 7
+    ANGLE_Z = 8
+    MAG_X = 9
+    MAG_Y = 10
+    MAG_Z = 11
+    QUAT_0 = 12
+    QUAT_1 = 13
+    QUAT_2 = 14
+    QUAT_3 = 15
+    TEMPERATURE = 16
+    BATTERY = 17
@@ -18,6 +18,9 @@ class IDataSource(ABC):
     所有具体数据源必须实现此接口。
     """
     
+    # 接口不定义实例属性，使实现类可以通过 __slots__ 省去实例 __dict__
+    __slots__ = ()
+    
     @abstractmethod
     async def connect(self) -> None:
         """建立与数据源的连接
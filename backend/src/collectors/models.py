@@ -2,12 +2,14 @@
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, NamedTuple, Optional
+
+import numpy as np
 
 from .enums import CollectionStatus, TaskStatus, EventType, ErrorType
 
 
-@dataclass
+@dataclass(slots=True)
 class CollectedData:
     """采集到的原始数据及其元数据"""
     source_id: str
@@ -157,3 +159,37 @@ class MotionCommand:
     is_motion_start: bool  # 是否是运动开始
     raw_direction: str  # 原始方向字符串
     metadata: Dict[str, Any]
+
+
+# 传感器数据帧中各数值字段对应的数据字典键（按 SensorField 下标排列）
+SENSOR_FRAME_FIELDS = (
+    '加速度X(g)', '加速度Y(g)', '加速度Z(g)',
+    '角速度X(°/s)', '角速度Y(°/s)', '角速度Z(°/s)',
+    '角度X(°)', '角度Y(°)', '角度Z(°)',
+    '磁场X(uT)', '磁场Y(uT)', '磁场Z(uT)',
+    '四元数0()', '四元数1()', '四元数2()', '四元数3()',
+    '温度(°C)', '电量(%)',
+)
+
+
+class SensorFrame(NamedTuple):
+    """
+    传感器数据帧
+    
+    数值字段存为一维 float64 数组，按 SensorField 下标访问（缺失值为 NaN）；
+    中文键数据字典只在序列化或兼容旧代码时通过 as_legacy_dict() 生成。
+    """
+    arr: np.ndarray
+    ts: float
+    
+    def as_legacy_dict(self) -> Dict[str, Optional[float]]:
+        """
+        转换为中文键数据字典
+        
+        Returns:
+            Dict[str, Optional[float]]: 字段名 -> 数值（缺失值为 None）
+        """
+        return {
+            field: None if value != value else value
+            for field, value in zip(SENSOR_FRAME_FIELDS, self.arr.tolist())
+        }
@@ -8,10 +8,14 @@ Motion Direction Processor
 
 import logging
 from datetime import datetime
-from typing import Any, Dict, Optional
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from datahandler.algorithms.MotionDirectionCalculator import MotionDirectionCalculator
-from ..models import MotionCommand
+from ..enums import SensorField
+from ..models import SENSOR_FRAME_FIELDS, MotionCommand, SensorFrame
 try:
     from ...broker.broker import MessageBroker
 except ImportError:
@@ -25,6 +29,12 @@ except ImportError:
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 运动计算使用的字段：加速度、角速度、角度各 3 轴（批量处理时按此顺序组成数组列）；
+# 这些字段在数据帧中相邻排列，可按下标一次切片读取
+_MOTION_SLICE = slice(int(SensorField.ACC_X), SensorField.ANGLE_Z + 1)
+MOTION_FIELDS = SENSOR_FRAME_FIELDS[_MOTION_SLICE]
+_pick_motion_fields = itemgetter(*MOTION_FIELDS)
+
 
 class MotionDirectionProcessor:
     """
@@ -80,14 +90,42 @@ class MotionDirectionProcessor:
             'last_update': None,
         }
         
+        # (方向字符串, 旋转字符串) -> 标准化命令；计算器输出的组合很少，
+        # 静止或持续同向运动时每个样本都能直接命中
+        self._command_cache: Dict[Tuple[str, str], str] = {}
+        
         logger.info("MotionDirectionProcessor 已初始化")
     
-    def process(self, sensor_data: Dict[str, Any]) -> MotionCommand:
+    def process(
+        self,
+        sensor_data: Dict[str, Any],
+        timestamp: Optional[float] = None
+    ) -> MotionCommand:
         """
         处理传感器数据并生成运动指令
         
         Args:
             sensor_data: 传感器数据字典，包含加速度、角速度和角度信息
+            timestamp: 采样时间（Unix 时间戳，秒）；为 None 时使用系统时间
+            
+        Returns:
+            MotionCommand: 运动指令对象
+        """
+        return self._process(sensor_data, publish=True, timestamp=timestamp)
+    
+    def _process(
+        self,
+        sensor_data: Dict[str, Any],
+        publish: bool,
+        timestamp: Optional[float] = None
+    ) -> MotionCommand:
+        """
+        处理单条传感器数据字典
+        
+        Args:
+            sensor_data: 传感器数据字典
+            publish: 是否立即发布方向消息
+            timestamp: 采样时间（Unix 时间戳，秒）；为 None 时使用系统时间
             
         Returns:
             MotionCommand: 运动指令对象
@@ -98,83 +136,215 @@ class MotionDirectionProcessor:
             angular_velocity = self._extract_angular_velocity(sensor_data)
             angles = self._extract_angles(sensor_data)
             
-            # 记录原始传感器值
-            logger.debug(
-                f"原始传感器数据 - 加速度: {acceleration}, "
-                f"角速度: {angular_velocity}, 角度: {angles}"
+            return self._calculate_command(
+                acceleration, angular_velocity, angles, publish, timestamp
             )
             
-            # 调用 MotionDirectionCalculator 计算运动方向
-            direction_info = self.calculator.calculate_motion_direction(
-                acceleration=acceleration,
-                angles=angles,
-                angular_velocity=angular_velocity,
-                timestamp=None  # 使用系统时间
-            )
+        except Exception as e:
+            return self._create_failure_command(e, sensor_data)
+    
+    def process_frame(self, frame: SensorFrame) -> MotionCommand:
+        """
+        处理传感器数据帧并生成运动指令
+        
+        运动字段从数据帧数组中按下标一次切片读取，不经过中文键字典；
+        只有出错时才转换为数据字典记录到错误命令中。
+        
+        Args:
+            frame: 传感器数据帧
             
-            # 提取主要运动方向
-            primary_direction = direction_info.get('direction', '静止')
-            rotation = direction_info.get('rotation', '静止')
-            intensity = direction_info.get('intensity', 0.0)
-            angular_intensity = direction_info.get('angular_intensity', 0.0)
+        Returns:
+            MotionCommand: 运动指令对象
+        """
+        try:
+            values = frame.arr[_MOTION_SLICE].tolist()
             
-            # 检测运动开始事件
-            is_motion_start = bool(direction_info.get('motion_start', False))
+            # NaN 表示字段缺失（与字典中值为 None 时一样视为无效数据）
+            missing = [
+                field for field, value in zip(MOTION_FIELDS, values)
+                if value != value
+            ]
+            if missing:
+                raise ValueError(f"运动字段缺失: {missing}")
             
-            # 映射方向字符串到标准化命令
-            command = self._map_direction_to_command(primary_direction, rotation)
+            return self._calculate_command(values[0:3], values[3:6], values[6:9])
             
-            # 创建 MotionCommand 对象
-            motion_command = MotionCommand(
-                command=command,
-                intensity=float(intensity),
-                angular_intensity=float(angular_intensity),
-                timestamp=datetime.now(),
-                is_motion_start=is_motion_start,
-                raw_direction=str(primary_direction),
-                metadata={
-                    'rotation': rotation,
-                    'velocity': direction_info.get('velocity', {}),
-                    'components': direction_info.get('components', {}),
-                    'is_moving': direction_info.get('is_moving', False),
-                }
-            )
+        except Exception as e:
+            return self._create_failure_command(e, frame.as_legacy_dict())
+    
+    def process_batch(
+        self,
+        samples: Sequence[Dict[str, Any]],
+        timestamps: Optional[Sequence[float]] = None
+    ) -> List[MotionCommand]:
+        """
+        批量处理传感器数据
+        
+        整批样本的字段一次提取为 (N, 9) 数组；运动计算器会跨样本累积速度，
+        计算仍按顺序逐条进行。字段缺失或无效时回退为逐条处理，
+        返回与逐条 process() 相同的结果。整批计算完成后，方向消息通过
+        一次 publish_batch() 发布，而不是每个样本发布一次。
+        
+        Args:
+            samples: 按时间顺序排列的传感器数据字典
+            timestamps: 与样本一一对应的采样时间（Unix 时间戳，秒）；
+                为 None 时使用系统时间
             
-            # 记录计算结果
-            logger.info(
-                f"运动指令 - 命令: {command}, 强度: {intensity:.4f}, "
-                f"角强度: {angular_intensity:.4f}, 运动开始: {is_motion_start}"
+        Returns:
+            List[MotionCommand]: 与样本一一对应的运动指令
+        """
+        if timestamps is None:
+            timestamps = [None] * len(samples)
+        elif len(timestamps) != len(samples):
+            raise ValueError(
+                f"时间戳数量 ({len(timestamps)}) 与样本数量 ({len(samples)}) 不一致"
             )
+        
+        try:
+            values = np.array(
+                [_pick_motion_fields(sample) for sample in samples],
+                dtype=np.float64
+            ).reshape(-1, len(MOTION_FIELDS))
+        except (KeyError, TypeError, ValueError):
+            values = None
+        
+        # None 会被转换为 NaN，而逐条处理会把它当作无效数据
+        if values is None or np.isnan(values).any():
+            commands = [
+                self._process(sample, publish=False, timestamp=timestamp)
+                for sample, timestamp in zip(samples, timestamps)
+            ]
+        else:
+            commands = []
+            for sample, row, timestamp in zip(samples, values.tolist(), timestamps):
+                try:
+                    commands.append(
+                        self._calculate_command(
+                            row[0:3], row[3:6], row[6:9], publish=False, timestamp=timestamp
+                        )
+                    )
+                except Exception as e:
+                    commands.append(self._create_failure_command(e, sample))
+        
+        # 错误命令不发布（与逐条处理一致）
+        self._publish_direction_messages(
+            [command for command in commands if 'error' not in command.metadata]
+        )
+        return commands
+    
+    def _calculate_command(
+        self,
+        acceleration: list,
+        angular_velocity: list,
+        angles: list,
+        publish: bool = True,
+        timestamp: Optional[float] = None
+    ) -> MotionCommand:
+        """
+        根据已提取的传感器数值计算运动指令，更新状态并发布方向消息
+        
+        Args:
+            acceleration: [accX, accY, accZ]
+            angular_velocity: [gyroX, gyroY, gyroZ]
+            angles: [angleX, angleY, angleZ]
+            publish: 是否立即发布方向消息（批量处理时由调用方统一发布）
+            timestamp: 采样时间（Unix 时间戳，秒）；为 None 时使用系统时间
             
-            # 更新运动状态
-            self._update_motion_state(motion_command)
-            
-            # 发布方向消息到消息代理
+        Returns:
+            MotionCommand: 运动指令对象
+        """
+        # 记录原始传感器值
+        logger.debug(
+            f"原始传感器数据 - 加速度: {acceleration}, "
+            f"角速度: {angular_velocity}, 角度: {angles}"
+        )
+        
+        # 调用 MotionDirectionCalculator 计算运动方向
+        direction_info = self.calculator.calculate_motion_direction(
+            acceleration=acceleration,
+            angles=angles,
+            angular_velocity=angular_velocity,
+            timestamp=timestamp  # None 时使用系统时间
+        )
+        
+        # 提取主要运动方向
+        primary_direction = direction_info.get('direction', '静止')
+        rotation = direction_info.get('rotation', '静止')
+        intensity = direction_info.get('intensity', 0.0)
+        angular_intensity = direction_info.get('angular_intensity', 0.0)
+        
+        # 检测运动开始事件
+        is_motion_start = bool(direction_info.get('motion_start', False))
+        
+        # 映射方向字符串到标准化命令
+        command = self._map_direction_to_command(primary_direction, rotation)
+        
+        # 创建 MotionCommand 对象
+        motion_command = MotionCommand(
+            command=command,
+            intensity=float(intensity),
+            angular_intensity=float(angular_intensity),
+            timestamp=datetime.now() if timestamp is None else datetime.fromtimestamp(timestamp),
+            is_motion_start=is_motion_start,
+            raw_direction=str(primary_direction),
+            metadata={
+                'rotation': rotation,
+                'velocity': direction_info.get('velocity', {}),
+                'components': direction_info.get('components', {}),
+                'is_moving': direction_info.get('is_moving', False),
+            }
+        )
+        
+        # 记录计算结果
+        logger.info(
+            f"运动指令 - 命令: {command}, 强度: {intensity:.4f}, "
+            f"角强度: {angular_intensity:.4f}, 运动开始: {is_motion_start}"
+        )
+        
+        # 更新运动状态
+        self._update_motion_state(motion_command)
+        
+        # 发布方向消息到消息代理
+        if publish:
             self._publish_direction_message(motion_command)
+        
+        return motion_command
+    
+    def _create_failure_command(
+        self,
+        error: Exception,
+        sensor_data: Dict[str, Any]
+    ) -> MotionCommand:
+        """
+        记录处理异常并创建对应的错误命令（需在 except 块中调用）
+        
+        Args:
+            error: 处理过程中捕获的异常
+            sensor_data: 原始传感器数据
             
-            return motion_command
-            
-        except KeyError as e:
+        Returns:
+            MotionCommand: 静止命令，包含错误信息
+        """
+        if isinstance(error, KeyError):
             # 缺少必需的传感器数据字段
-            logger.error(f"传感器数据缺少必需字段: {e}")
+            logger.error(f"传感器数据缺少必需字段: {error}")
             return self._create_error_command(
-                f"缺少必需字段: {e}",
+                f"缺少必需字段: {error}",
                 sensor_data
             )
-        except ValueError as e:
+        if isinstance(error, ValueError):
             # 无效的数据类型
-            logger.error(f"传感器数据类型无效: {e}")
-            return self._create_error_command(
-                f"数据类型无效: {e}",
-                sensor_data
-            )
-        except Exception as e:
-            # MotionDirectionCalculator 异常或其他错误
-            logger.error(f"处理传感器数据时发生错误: {e}", exc_info=True)
+            logger.error(f"传感器数据类型无效: {error}")
             return self._create_error_command(
-                f"处理错误: {e}",
+                f"数据类型无效: {error}",
                 sensor_data
             )
+        # MotionDirectionCalculator 异常或其他错误
+        logger.error(f"处理传感器数据时发生错误: {error}", exc_info=True)
+        return self._create_error_command(
+            f"处理错误: {error}",
+            sensor_data
+        )
     
     def _extract_acceleration(self, sensor_data: Dict[str, Any]) -> list:
         """
@@ -259,6 +429,28 @@ class MotionDirectionProcessor:
         Returns:
             str: 标准化命令 ('forward', 'backward', 'turn_left', 'turn_right', 'stationary')
         """
+        key = (direction, rotation)
+        try:
+            command = self._command_cache.get(key)
+        except TypeError:
+            # 计算器返回了不可哈希的值（如列表），不缓存
+            return self._resolve_command(direction, rotation)
+        
+        if command is None:
+            command = self._command_cache[key] = self._resolve_command(direction, rotation)
+        return command
+    
+    def _resolve_command(self, direction: str, rotation: str) -> str:
+        """
+        按映射规则解析方向和旋转字符串（结果由 _map_direction_to_command 缓存）
+        
+        Args:
+            direction: 主要运动方向字符串
+            rotation: 旋转方向字符串
+            
+        Returns:
+            str: 标准化命令
+        """
         # 首先检查旋转（旋转优先级高于线性运动）
         if rotation != '静止' and rotation != '无明显旋转':
             # 检查是否包含Z轴旋转
@@ -340,20 +532,10 @@ class MotionDirectionProcessor:
             # 获取消息代理实例（如果未初始化会自动创建）
             broker = MessageBroker.get_instance()
             
-            # 准备符合 DirectionMessageHandler 要求的消息数据
-            message_data = {
-                'command': motion_command.command,
-                'timestamp': motion_command.timestamp.isoformat(),
-                'intensity': motion_command.intensity,
-                'angular_intensity': motion_command.angular_intensity,
-                # 可选的元数据
-                'is_motion_start': motion_command.is_motion_start,
-                'raw_direction': motion_command.raw_direction,
-                'metadata': motion_command.metadata
-            }
-            
             # 发布方向消息
-            result = broker.publish('direction_result', message_data)
+            result = broker.publish(
+                'direction_result', self._build_direction_message(motion_command)
+            )
             
             if result.success:
                 logger.debug(
@@ -372,6 +554,59 @@ class MotionDirectionProcessor:
                 exc_info=True
             )
     
+    def _publish_direction_messages(self, motion_commands: List[MotionCommand]) -> None:
+        """
+        通过一次批量发布把多条方向消息发布到消息代理
+        
+        Args:
+            motion_commands: 运动指令列表（按时间顺序）
+        """
+        if not motion_commands:
+            return
+        
+        try:
+            broker = MessageBroker.get_instance()
+            results = broker.publish_batch(
+                'direction_result',
+                [self._build_direction_message(command) for command in motion_commands]
+            )
+            
+            failed = [result for result in results if not result.success]
+            if failed:
+                logger.warning(
+                    f"Failed to publish {len(failed)}/{len(results)} direction messages: "
+                    f"{failed[0].errors}"
+                )
+                
+        except Exception as e:
+            # 发布失败不应影响主要处理流程
+            logger.error(
+                f"Error publishing direction messages: {e}",
+                exc_info=True
+            )
+    
+    @staticmethod
+    def _build_direction_message(motion_command: MotionCommand) -> Dict[str, Any]:
+        """
+        准备符合 DirectionMessageHandler 要求的消息数据
+        
+        Args:
+            motion_command: 运动指令对象
+            
+        Returns:
+            Dict[str, Any]: 方向消息数据
+        """
+        return {
+            'command': motion_command.command,
+            'timestamp': motion_command.timestamp.isoformat(),
+            'intensity': motion_command.intensity,
+            'angular_intensity': motion_command.angular_intensity,
+            # 可选的元数据
+            'is_motion_start': motion_command.is_motion_start,
+            'raw_direction': motion_command.raw_direction,
+            'metadata': motion_command.metadata
+        }
+    
     def reset(self) -> None:
         """
         重置处理器状态
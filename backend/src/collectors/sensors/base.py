@@ -16,6 +16,10 @@ from ..enums import CollectionStatus
 class BaseSensorCollector(IDataSource, ABC):
     """传感器采集器基类"""
     
+    # 基类属性使用槽位；子类声明 __slots__ 时实例不再有 __dict__，
+    # 未声明的子类仍照常使用 __dict__
+    __slots__ = ('sensor_id', 'sensor_type', 'config', '_is_connected')
+    
     def __init__(self, sensor_id: str, sensor_type: str, config: Optional[Dict[str, Any]] = None):
         """
         初始化传感器采集器
@@ -12,31 +12,135 @@ JY901 九轴传感器采集器
 """
 
 import asyncio
+import importlib.util
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, Optional, List, Callable, AsyncIterator
+from types import MappingProxyType
+from typing import IO, Any, Dict, Optional, List, Callable, AsyncIterator, Sequence, Tuple
+import struct
+import sys
 import threading
 import time
 import platform
 
-try:
-    import serial
-    from serial import SerialException
-    SERIAL_AVAILABLE = True
-except ImportError:
-    SERIAL_AVAILABLE = False
-    print("警告: pyserial 未安装，实时模式不可用。请运行: pip install pyserial")
+import numpy as np
 
 from .base import BaseSensorCollector
-from ..models import CollectedData
-from ..enums import CollectionStatus
+from .jy901_kernels import parse_quad_i16, parse_triple_i16, read_u16, to_buffer
+from ..models import SENSOR_FRAME_FIELDS, CollectedData, SensorFrame
+from ..enums import CollectionStatus, SensorField
+
+
+# pyserial 只在实时模式打开串口时才导入（回放模式不需要）；这里只检查是否已安装
+SERIAL_AVAILABLE = importlib.util.find_spec('serial') is not None
+if not SERIAL_AVAILABLE:
+    print("警告: pyserial 未安装，实时模式不可用。请运行: pip install pyserial")
+
+_serial_module = None
+
+
+def _get_serial():
+    """
+    按需导入 pyserial
+    
+    Returns:
+        module: serial 模块
+    """
+    global _serial_module
+    if _serial_module is None:
+        import serial
+        _serial_module = serial
+    return _serial_module
+
+
+# WIT 协议数据包从第 3 个字节起为小端 16 位数据
+_INT16_STRUCT = struct.Struct('<h')
+_PAYLOAD_OFFSET = 2
+
+# 16 位原始值满量程，以及与量程无关的换算系数
+_FULL_SCALE = 32768.0
+_QUAT_SCALE = 1.0 / _FULL_SCALE
+_MAG_SCALE = 1.0
+_TEMP_DIVISOR = 100.0
+
+# 数据包长度、包头，以及按类型字节查表的合法类型（0x50-0x5A, 0x5F）
+_PACKET_SIZE = 11
+_PACKET_HEADER = 0x55
+_VALID_PACKET_TYPES = np.zeros(256, dtype=bool)
+_VALID_PACKET_TYPES[0x50:0x5B] = True
+_VALID_PACKET_TYPES[0x5F] = True
+
+# 各数据包在数据帧中写入的位置
+_ACC_SLICE = slice(int(SensorField.ACC_X), SensorField.ACC_Z + 1)
+_GYRO_SLICE = slice(int(SensorField.GYRO_X), SensorField.GYRO_Z + 1)
+_ANGLE_SLICE = slice(int(SensorField.ANGLE_X), SensorField.ANGLE_Z + 1)
+_MAG_SLICE = slice(int(SensorField.MAG_X), SensorField.MAG_Z + 1)
+_QUAT_SLICE = slice(int(SensorField.QUAT_0), SensorField.QUAT_3 + 1)
+_TEMP_INDEX = int(SensorField.TEMPERATURE)
+
+
+def _make_picker(positions: Sequence[int]) -> Callable[[Sequence[Any]], Tuple[Any, ...]]:
+    """
+    创建按位置取值的函数（总是返回元组）
+    
+    Args:
+        positions: 要取出的下标序列
+        
+    Returns:
+        Callable: 接收序列并返回对应元素元组的函数
+    """
+    if not positions:
+        return lambda values: ()
+    if len(positions) == 1:
+        position = positions[0]
+        return lambda values: (values[position],)
+    return itemgetter(*positions)
+
+
+class _PlaybackRows(Sequence):
+    """
+    回放数据的只读行视图
+    
+    数据以列式数组保存，按下标访问时才组装成数据字典，
+    保持旧版 data_list（字典列表）的读取接口。
+    """
+    
+    __slots__ = ('_sensor',)
+    
+    def __init__(self, sensor: 'JY901Sensor'):
+        self._sensor = sensor
+    
+    def __len__(self) -> int:
+        return len(self._sensor._data_array)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("playback row index out of range")
+        return self._sensor._build_row(index)
 
 
 class JY901Sensor(BaseSensorCollector):
     """JY901 九轴传感器采集器"""
     
-    # 数据字段定义
-    DATA_FIELDS = [
+    # 实例属性使用槽位存储（基类的属性由基类的 __slots__ 声明，实例没有 __dict__）
+    __slots__ = (
+        'data_file_path', 'mode', 'interval', 'loop', 'skip_validation',
+        'port', 'baudrate', 'timeout', 'low_latency',
+        '_data_array', '_text_rows', '_row_fields', '_row_picker', '_has_missing',
+        'current_index',
+        'is_running', 'send_thread', 'read_thread', 'data_lock',
+        'current_data', '_frame', '_frame_ts', 'serial_port',
+        '_rx_buf', 'pack_size', '_gyro_scale', '_acc_scale', '_angle_scale',
+        '_reader',
+    )
+    
+    # 数据字段定义（不可变；字段名驻留，与驻留后的表头字段共享同一对象）
+    DATA_FIELDS = tuple(map(sys.intern, (
         '时间', '设备名称', '片上时间()', 
         '加速度X(g)', '加速度Y(g)', '加速度Z(g)',
         '角速度X(°/s)', '角速度Y(°/s)', '角速度Z(°/s)', 
@@ -44,20 +148,19 @@ class JY901Sensor(BaseSensorCollector):
         '磁场X(uT)', '磁场Y(uT)', '磁场Z(uT)', 
         '四元数0()', '四元数1()', '四元数2()', '四元数3()',
         '温度(°C)', '版本号()', '电量(%)'
-    ]
+    )))
+    DATA_FIELDS_SET = frozenset(DATA_FIELDS)
     
-    # 数值字段（需要转换为浮点数）
-    NUMERIC_FIELDS = [
-        '加速度X(g)', '加速度Y(g)', '加速度Z(g)',
-        '角速度X(°/s)', '角速度Y(°/s)', '角速度Z(°/s)',
-        '角度X(°)', '角度Y(°)', '角度Z(°)',
-        '磁场X(uT)', '磁场Y(uT)', '磁场Z(uT)',
-        '四元数0()', '四元数1()', '四元数2()', '四元数3()',
-        '温度(°C)', '电量(%)'
-    ]
+    # 数值字段（需要转换为浮点数）；顺序与 SensorFrame 一致，
+    # 列式数据的一行即是一个数据帧
+    NUMERIC_FIELDS = tuple(map(sys.intern, SENSOR_FRAME_FIELDS))
+    NUMERIC_FIELDS_SET = frozenset(NUMERIC_FIELDS)
     
-    # 数据有效性范围
-    VALUE_RANGES = {
+    # 数值字段 -> 数值数组列下标
+    _NUMERIC_COLUMN = MappingProxyType({field: i for i, field in enumerate(NUMERIC_FIELDS)})
+    
+    # 数据有效性范围（只读映射）
+    VALUE_RANGES = MappingProxyType({
         '加速度X(g)': (-16, 16),
         '加速度Y(g)': (-16, 16),
         '加速度Z(g)': (-16, 16),
@@ -69,7 +172,18 @@ class JY901Sensor(BaseSensorCollector):
         '角度Z(°)': (-180, 180),
         '温度(°C)': (-40, 85),
         '电量(%)': (0, 100)
-    }
+    })
+    
+    # 必需字段
+    REQUIRED_FIELDS = ('加速度X(g)', '加速度Y(g)', '加速度Z(g)')
+    
+    # 范围检查预计算：字段与上下限元组（逐条字典验证），以及对应的数值列
+    # 下标和上下限数组（列式数据整批验证）
+    _RANGE_ITEMS = tuple((field, lo, hi) for field, (lo, hi) in VALUE_RANGES.items())
+    _RANGE_COLUMNS = list(map(_NUMERIC_COLUMN.__getitem__, VALUE_RANGES))
+    _RANGE_LO = np.array([lo for lo, _ in VALUE_RANGES.values()], dtype=np.float64)
+    _RANGE_HI = np.array([hi for _, hi in VALUE_RANGES.values()], dtype=np.float64)
+    _REQUIRED_COLUMNS = list(map(_NUMERIC_COLUMN.__getitem__, REQUIRED_FIELDS))
     
     def __init__(
         self, 
@@ -90,6 +204,8 @@ class JY901Sensor(BaseSensorCollector):
                 - port: 串口名称（实时模式必需，如 '/dev/ttyUSB0' 或 'COM3'）
                 - baudrate: 波特率（默认 9600）
                 - timeout: 串口超时（秒，默认 0.5）
+                - low_latency: 打开串口后启用驱动的 ASYNC_LOW_LATENCY 模式（默认 True，仅 Linux）
+                - skip_validation: 信任数据源，回放时不做有效性过滤（默认 False）
         """
         super().__init__(sensor_id, 'jy901', config)
         
@@ -97,16 +213,26 @@ class JY901Sensor(BaseSensorCollector):
         self.mode = self.config.get('mode', 'realtime')
         self.interval = self.config.get('interval', 0.01)
         self.loop = self.config.get('loop', False)
+        self.skip_validation = self.config.get('skip_validation', False)
         
         # 串口配置（实时模式）
         self.port = self.config.get('port', self._get_default_port())
         self.baudrate = self.config.get('baudrate', 9600)
         self.timeout = self.config.get('timeout', 0.5)
+        self.low_latency = self.config.get('low_latency', True)
         
-        # 数据存储
-        self.data_list: List[Dict[str, Any]] = []
+        # 回放数据（列式存储）：数值字段按 NUMERIC_FIELDS 顺序存为 float64
+        # 二维数组（缺失或无效值为 NaN），文本字段逐行保存
+        self._data_array = np.empty((0, len(self.NUMERIC_FIELDS)))
+        self._text_rows: List[List[Optional[str]]] = []
+        self._row_fields: Tuple[str, ...] = ()
+        self._row_picker: Optional[Callable[[Sequence[Any]], Tuple[Any, ...]]] = None
+        self._has_missing = False
         self.current_index = 0
         
+        # 按模式选定的读取函数（未绑定的方法，connect() 时设置，避免实例引用自身的绑定方法）
+        self._reader: Optional[Callable[['JY901Sensor'], Any]] = None
+        
         # 线程控制
         self.is_running = False
         self.send_thread: Optional[threading.Thread] = None
@@ -116,16 +242,49 @@ class JY901Sensor(BaseSensorCollector):
         # 当前数据缓存
         self.current_data: Optional[Dict[str, Any]] = None
         
+        # 当前数据帧（数值字段按 SensorField 下标排列，与 current_data 同步更新）
+        self._frame = np.full(len(SensorField), np.nan)
+        self._frame_ts = 0.0
+        
         # 串口对象（实时模式）
         self.serial_port = None
         
-        # 协议解析器（实时模式）
-        self.temp_bytes = []
-        self.pack_size = 11
+        # 协议解析器（实时模式）：接收缓冲区只保留尚未组成完整数据包的字节
+        self._rx_buf = bytearray()
+        self.pack_size = _PACKET_SIZE
         self.gyro_range = 2000.0
         self.acc_range = 16.0
         self.angle_range = 180.0
     
+    # 量程属性：设置时预先算好“原始值 -> 物理量”的换算系数，
+    # 解析每个数据包时只做一次乘法（除以 2 的幂，系数是精确值）
+    @property
+    def gyro_range(self) -> float:
+        """角速度量程（°/s）"""
+        return self._gyro_scale * _FULL_SCALE
+    
+    @gyro_range.setter
+    def gyro_range(self, value: float) -> None:
+        self._gyro_scale = value / _FULL_SCALE
+    
+    @property
+    def acc_range(self) -> float:
+        """加速度量程（g）"""
+        return self._acc_scale * _FULL_SCALE
+    
+    @acc_range.setter
+    def acc_range(self, value: float) -> None:
+        self._acc_scale = value / _FULL_SCALE
+    
+    @property
+    def angle_range(self) -> float:
+        """角度量程（°）"""
+        return self._angle_scale * _FULL_SCALE
+    
+    @angle_range.setter
+    def angle_range(self, value: float) -> None:
+        self._angle_scale = value / _FULL_SCALE
+    
     def _get_default_port(self) -> str:
         """获取默认串口名称"""
         system = platform.system().lower()
@@ -148,10 +307,10 @@ class JY901Sensor(BaseSensorCollector):
                 # 加载本地数据文件
                 self._load_data_file()
                 
-                if not self.data_list:
+                if not len(self._data_array):
                     raise ValueError(f"数据文件为空或加载失败: {self.data_file_path}")
                 
-                print(f"JY901 传感器 [{self.sensor_id}] 已加载 {len(self.data_list)} 条数据")
+                print(f"JY901 传感器 [{self.sensor_id}] 已加载 {len(self._data_array)} 条数据")
             
             elif self.mode == 'realtime':
                 if not SERIAL_AVAILABLE:
@@ -168,6 +327,13 @@ class JY901Sensor(BaseSensorCollector):
             else:
                 raise ValueError(f"不支持的模式: {self.mode}")
             
+            # 按模式选定读取函数，之后每次读取不再判断模式
+            cls = type(self)
+            self._reader = (
+                cls._read_playback_data if self.mode == 'playback'
+                else cls._read_realtime_data
+            )
+            
             self._is_connected = True
             return True
             
@@ -191,6 +357,9 @@ class JY901Sensor(BaseSensorCollector):
             self.serial_port.close()
             print(f"串口 {self.port} 已关闭")
         
+        # 恢复通用的按模式分派读取
+        self._reader = None
+        
         self._is_connected = False
         print(f"JY901 传感器 [{self.sensor_id}] 已断开")
     
@@ -198,9 +367,16 @@ class JY901Sensor(BaseSensorCollector):
         """
         读取传感器数据
         
+        connect() 成功后直接调用按模式选定的读取函数，只在未连接时
+        按模式分派（模式无效时抛出 ValueError）。
+        
         Returns:
             Dict[str, Any]: 传感器数据字典
         """
+        reader = self._reader
+        if reader is not None:
+            return await reader(self)
+        
         if self.mode == 'playback':
             return await self._read_playback_data()
         elif self.mode == 'realtime':
@@ -208,7 +384,29 @@ class JY901Sensor(BaseSensorCollector):
         else:
             raise ValueError(f"不支持的模式: {self.mode}")
     
-
+    async def read_sensor_frame(self) -> SensorFrame:
+        """
+        读取传感器数据帧
+        
+        与 read_sensor_data() 读取同一份当前数据，但数值字段以数组返回，
+        按 SensorField 下标访问，不组装中文键字典。
+        
+        Returns:
+            SensorFrame: 当前数据帧（数组为副本，缺失字段为 NaN）
+        """
+        if self.mode == 'playback':
+            if not self.is_running:
+                self._start_data_sender()
+            await self._wait_for_data("等待数据超时")
+        elif self.mode == 'realtime':
+            if not self.is_running:
+                self._start_serial_reader()
+            await self._wait_for_data("等待串口数据超时")
+        else:
+            raise ValueError(f"不支持的模式: {self.mode}")
+        
+        with self.data_lock:
+            return SensorFrame(self._frame.copy(), self._frame_ts)
     
     def get_source_id(self) -> str:
         """
@@ -222,23 +420,9 @@ class JY901Sensor(BaseSensorCollector):
     async def _read_playback_data(self) -> Dict[str, Any]:
         """从本地文件读取数据（回放模式）"""
         if not self.is_running:
-            # 启动数据发送线程
-            self.is_running = True
-            self.send_thread = threading.Thread(
-                target=self._data_sending_loop, 
-                daemon=True
-            )
-            self.send_thread.start()
-        
-        # 等待数据可用
-        max_wait = 10  # 最多等待10秒
-        wait_count = 0
-        while self.current_data is None and wait_count < max_wait * 100:
-            await asyncio.sleep(0.01)
-            wait_count += 1
+            self._start_data_sender()
         
-        if self.current_data is None:
-            raise TimeoutError("等待数据超时")
+        await self._wait_for_data("等待数据超时")
         
         # 返回当前数据的副本
         with self.data_lock:
@@ -249,15 +433,35 @@ class JY901Sensor(BaseSensorCollector):
     async def _read_realtime_data(self) -> Dict[str, Any]:
         """从串口读取实时数据"""
         if not self.is_running:
-            # 启动串口读取线程
-            self.is_running = True
-            self.read_thread = threading.Thread(
-                target=self._serial_read_loop,
-                daemon=True
-            )
-            self.read_thread.start()
+            self._start_serial_reader()
+        
+        await self._wait_for_data("等待串口数据超时")
+        
+        # 返回当前数据的副本
+        with self.data_lock:
+            data = self.current_data.copy() if self.current_data else {}
         
-        # 等待数据可用
+        return data
+    
+    def _start_data_sender(self):
+        """启动回放数据发送线程"""
+        self.is_running = True
+        self.send_thread = threading.Thread(
+            target=self._data_sending_loop, 
+            daemon=True
+        )
+        self.send_thread.start()
+    
+    async def _wait_for_data(self, timeout_message: str) -> None:
+        """
+        等待首条数据可用
+        
+        Args:
+            timeout_message: 超时异常的消息
+            
+        Raises:
+            TimeoutError: 10 秒内没有数据
+        """
         max_wait = 10  # 最多等待10秒
         wait_count = 0
         while self.current_data is None and wait_count < max_wait * 100:
@@ -265,13 +469,12 @@ class JY901Sensor(BaseSensorCollector):
             wait_count += 1
         
         if self.current_data is None:
-            raise TimeoutError("等待串口数据超时")
-        
-        # 返回当前数据的副本
-        with self.data_lock:
-            data = self.current_data.copy() if self.current_data else {}
-        
-        return data
+            raise TimeoutError(timeout_message)
+    
+    @property
+    def data_list(self) -> Sequence[Dict[str, Any]]:
+        """已加载的有效回放数据（只读行视图，按下标组装数据字典）"""
+        return _PlaybackRows(self)
     
     def _load_data_file(self):
         """加载本地数据文件"""
@@ -282,86 +485,262 @@ class JY901Sensor(BaseSensorCollector):
                 raise FileNotFoundError(f"数据文件不存在: {self.data_file_path}")
             
             with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+                self._load_data_stream(f)
             
-            if not lines:
-                raise ValueError("数据文件为空")
+        except Exception as e:
+            print(f"加载数据文件失败: {e}")
+            raise
+    
+    def _load_data_stream(self, stream: IO) -> None:
+        """
+        从文件对象加载回放数据（与文件系统无关，便于直接传入内存数据）
+        
+        Args:
+            stream: 可读的文本或二进制（UTF-8）文件对象，如 open() 或 io.StringIO/io.BytesIO
+        """
+        content = stream.read()
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+        lines = content.splitlines()
+        
+        if not lines:
+            raise ValueError("数据文件为空")
+        
+        # 第一行是表头（驻留字段名，行字典的键与类常量为同一对象）
+        headers = list(map(sys.intern, lines[0].strip().split('\t')))
+        body = [line for line in map(str.strip, lines[1:]) if line]
+        
+        # 格式规整的文件整体批量解析；不规整时逐行解析
+        parsed = self._parse_rows_bulk(headers, body)
+        if parsed is None:
+            parsed = self._parse_rows(headers, body)
+        numeric, text_rows = parsed
+        
+        # 行字段按表头顺序，由“文本列 + 全部数值列”拼接后取出
+        text_headers = [h for h in headers if h not in self.NUMERIC_FIELDS_SET]
+        text_position = {h: k for k, h in enumerate(text_headers)}
+        offset = len(text_headers)
+        self._row_fields = tuple(headers)
+        self._row_picker = _make_picker([
+            offset + self._NUMERIC_COLUMN[h] if h in self.NUMERIC_FIELDS_SET
+            else text_position[h]
+            for h in headers
+        ])
+        self._data_array = numeric
+        self._text_rows = text_rows
+        self._has_missing = bool(np.isnan(numeric).any())
+        
+        # 整批验证数据有效性，只保留有效行（信任数据源时跳过）
+        if not self.skip_validation:
+            valid = self._validate_array(numeric)
+            self._data_array = numeric[valid]
+            self._text_rows = [row for row, ok in zip(text_rows, valid.tolist()) if ok]
+        
+        print(f"成功加载 {len(self._data_array)} 条有效数据")
+    
+    def _build_row(self, index: int) -> Dict[str, Any]:
+        """
+        由列式数据组装一行数据字典
+        
+        Args:
+            index: 行下标
             
-            # 第一行是表头
-            headers = lines[0].strip().split('\t')
+        Returns:
+            Dict[str, Any]: 数据字典（字段顺序与文件表头一致，无效数值为 None）
+        """
+        numeric = self._data_array[index].tolist()
+        if self._has_missing:
+            numeric = [None if value != value else value for value in numeric]
+        return dict(zip(self._row_fields, self._row_picker(self._text_rows[index] + numeric)))
+    
+    def _parse_rows_bulk(
+        self,
+        headers: List[str],
+        body: List[str]
+    ) -> Optional[Tuple[np.ndarray, List[List[Optional[str]]]]]:
+        """
+        批量解析数据行
+        
+        数值列由 numpy.loadtxt 的 C 解析器一次性转换为浮点数，避免逐字段
+        调用 float()；文本列（时间、设备名称等）仍按制表符切分取出。
+        
+        Args:
+            headers: 表头字段列表
+            body: 去除首尾空白后的非空数据行
             
-            # 解析数据行
-            for i in range(1, len(lines)):
-                line = lines[i].strip()
-                if not line:
-                    continue
-                
-                values = line.split('\t')
-                
-                # 创建数据字典
-                data_dict = {}
-                for j in range(min(len(headers), len(values))):
-                    header = headers[j]
-                    value = values[j]
-                    
-                    # 转换数值字段
-                    if header in self.NUMERIC_FIELDS:
-                        try:
-                            data_dict[header] = float(value)
-                        except (ValueError, TypeError):
-                            data_dict[header] = None
-                    else:
-                        data_dict[header] = value
-                
-                # 验证数据有效性
-                if self._validate_data(data_dict):
-                    self.data_list.append(data_dict)
+        Returns:
+            Optional[Tuple[np.ndarray, List]]: (数值数组, 文本行列表)；数值无效、
+            列数不足或表头没有数值字段时返回 None，由调用方改为逐行解析
+        """
+        numeric_idx = [j for j, h in enumerate(headers) if h in self.NUMERIC_FIELDS_SET]
+        text_idx = [j for j, h in enumerate(headers) if h not in self.NUMERIC_FIELDS_SET]
+        if not numeric_idx:
+            return None
+        
+        numeric = np.full((len(body), len(self.NUMERIC_FIELDS)), np.nan)
+        if not body:
+            return numeric, []
+        
+        try:
+            numeric[:, [self._NUMERIC_COLUMN[headers[j]] for j in numeric_idx]] = np.loadtxt(
+                body,
+                dtype=np.float64,
+                delimiter='\t',
+                comments=None,
+                usecols=numeric_idx,
+                ndmin=2
+            )
+            text_rows = [
+                [values[j] for j in text_idx]
+                for values in (line.split('\t') for line in body)
+            ]
+        except (ValueError, IndexError):
+            return None
+        
+        return numeric, text_rows
+    
+    def _parse_rows(
+        self,
+        headers: List[str],
+        body: List[str]
+    ) -> Tuple[np.ndarray, List[List[Optional[str]]]]:
+        """
+        逐行解析数据行（兼容列数不一致、数值无效的文件）
+        
+        Args:
+            headers: 表头字段列表
+            body: 去除首尾空白后的非空数据行
             
-            print(f"成功加载 {len(self.data_list)} 条有效数据")
+        Returns:
+            Tuple[np.ndarray, List]: (数值数组, 文本行列表)；无法转换或缺失的
+            数值为 NaN，缺失的文本字段为 None
+        """
+        numeric = np.full((len(body), len(self.NUMERIC_FIELDS)), np.nan)
+        text_rows = []
+        
+        # 每个表头字段对应的数值列下标（文本字段为 None）
+        columns = [self._NUMERIC_COLUMN.get(h) for h in headers]
+        
+        # 快速路径：完整且数值有效的行用 itemgetter + map(float) 整行转换
+        numeric_columns = [column for column in columns if column is not None]
+        pick_numeric = _make_picker([j for j, c in enumerate(columns) if c is not None])
+        pick_text = _make_picker([j for j, c in enumerate(columns) if c is None])
+        
+        for i, line in enumerate(body):
+            values = line.split('\t')
             
-        except Exception as e:
-            print(f"加载数据文件失败: {e}")
-            raise
+            try:
+                row_numeric = tuple(map(float, pick_numeric(values)))
+                text_values = list(pick_text(values))
+            except (ValueError, IndexError):
+                pass
+            else:
+                numeric[i, numeric_columns] = row_numeric
+                text_rows.append(text_values)
+                continue
+            
+            # 列数不足或含无效数值的行逐字段解析
+            text_values = []
+            for j, column in enumerate(columns):
+                value = values[j] if j < len(values) else None
+                
+                # 转换数值字段
+                if column is not None:
+                    try:
+                        numeric[i, column] = float(value)
+                    except (ValueError, TypeError):
+                        pass
+                else:
+                    text_values.append(value)
+            
+            text_rows.append(text_values)
+        
+        return numeric, text_rows
     
     def _validate_data(self, data: Dict[str, Any]) -> bool:
-        """验证数据有效性"""
+        """
+        验证单条数据的有效性
+        
+        整批数据由 _validate_array 验证，这里只处理单条字典。范围检查直接
+        比较原始浮点值：把数值量化为整数再做打包比较，会在上下限附近
+        （如 16.00001 g）改变判定结果。
+        """
         try:
             # 检查必要字段
-            required_fields = ['加速度X(g)', '加速度Y(g)', '加速度Z(g)']
-            for field in required_fields:
-                if field not in data or data[field] is None:
+            for field in self.REQUIRED_FIELDS:
+                if data.get(field) is None:
                     return False
             
             # 检查数值范围
-            for field, (min_val, max_val) in self.VALUE_RANGES.items():
-                if field in data and data[field] is not None:
-                    value = data[field]
-                    if not (min_val <= value <= max_val):
-                        print(f"数据超出范围: {field}={value}")
-                        return False
+            for field, min_val, max_val in self._RANGE_ITEMS:
+                value = data.get(field)
+                if value is not None and not (min_val <= value <= max_val):
+                    print(f"数据超出范围: {field}={value}")
+                    return False
             
             return True
             
         except Exception:
             return False
     
+    def _validate_array(self, numeric: np.ndarray) -> np.ndarray:
+        """
+        整批验证列式数值数据
+        
+        与 _validate_data 规则一致：NaN 视为缺失，必需字段缺失则无效，
+        其余字段缺失时跳过范围检查。
+        
+        Args:
+            numeric: 按 NUMERIC_FIELDS 排列的二维数值数组
+            
+        Returns:
+            np.ndarray: 每行是否有效的布尔数组
+        """
+        has_required = ~np.isnan(numeric[:, self._REQUIRED_COLUMNS]).any(axis=1)
+        
+        values = numeric[:, self._RANGE_COLUMNS]
+        with np.errstate(invalid='ignore'):
+            in_range = (values >= self._RANGE_LO) & (values <= self._RANGE_HI)
+        in_range |= np.isnan(values)
+        rows_in_range = in_range.all(axis=1)
+        
+        # 与逐条验证一致，输出每个超范围行的第一个越界字段
+        for i in np.flatnonzero(has_required & ~rows_in_range).tolist():
+            k = int(np.argmin(in_range[i]))
+            print(f"数据超出范围: {self._RANGE_ITEMS[k][0]}={values[i, k]}")
+        
+        return has_required & rows_in_range
+    
     def _data_sending_loop(self):
-        """数据发送循环（在独立线程中运行）"""
+        """
+        数据发送循环（在独立线程中运行）
+        
+        回放数据在加载时已整批验证并只保留有效行，
+        因此发送（包括 loop 循环重放）时不再逐行验证。
+        
+        按 time.monotonic() 计算每一行的预定发送时刻，只睡眠到该时刻，
+        睡眠和处理的开销不会逐行累积成漂移；落后超过一个间隔时
+        以当前时刻重新对齐，不集中补发积压的行。
+        """
+        next_due = time.monotonic()
+        
         while self.is_running:
             try:
-                if self.current_index < len(self.data_list):
-                    # 获取当前数据
-                    data = self.data_list[self.current_index]
+                if self.current_index < len(self._data_array):
+                    # 获取当前数据（已验证）
+                    data = self._build_row(self.current_index)
                     
-                    # 更新当前数据缓存
+                    # 更新当前数据缓存（数据帧直接引用列式数据的这一行，读取时复制）
                     with self.data_lock:
                         self.current_data = data
+                        self._frame = self._data_array[self.current_index]
+                        self._frame_ts = time.time()
                     
                     # 更新索引
                     self.current_index += 1
                     
                     # 如果到达末尾
-                    if self.current_index >= len(self.data_list):
+                    if self.current_index >= len(self._data_array):
                         if self.loop:
                             # 循环播放
                             self.current_index = 0
@@ -376,8 +755,13 @@ class JY901Sensor(BaseSensorCollector):
                     self.is_running = False
                     break
                 
-                # 等待指定间隔
-                time.sleep(self.interval)
+                # 等待到下一行的预定发送时刻
+                next_due += self.interval
+                delay = next_due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -self.interval:
+                    next_due = time.monotonic()
                 
             except Exception as e:
                 print(f"数据发送错误: {e}")
@@ -448,10 +832,11 @@ class JY901Sensor(BaseSensorCollector):
     
     def get_progress(self) -> Dict[str, Any]:
         """获取播放进度"""
+        total_count = len(self._data_array)
         return {
             'current_index': self.current_index,
-            'total_count': len(self.data_list),
-            'progress': (self.current_index / len(self.data_list) * 100) if self.data_list else 0
+            'total_count': total_count,
+            'progress': (self.current_index / total_count * 100) if total_count else 0
         }
     
     # ==================== IDataSource 接口实现 ====================
@@ -468,12 +853,7 @@ class JY901Sensor(BaseSensorCollector):
         
         # 启动数据采集线程（仅实时模式需要）
         if self.mode == 'realtime' and not self.is_running:
-            self.is_running = True
-            self.read_thread = threading.Thread(
-                target=self._serial_read_loop,
-                daemon=True
-            )
-            self.read_thread.start()
+            self._start_serial_reader()
             
             # 等待线程启动和初始数据
             await asyncio.sleep(1)
@@ -482,18 +862,17 @@ class JY901Sensor(BaseSensorCollector):
         
         while self._is_connected and self.is_running:
             try:
-                # 获取当前数据
-                with self.data_lock:
-                    current_data = self.current_data.copy() if self.current_data else {}
+                current_time = datetime.now()
                 
-                # 检查是否有新数据
-                if current_data:
-                    current_time = datetime.now()
+                # 距离上次发送超过一定时间才复制当前数据（未到发送时间的轮询不分配新字典）
+                if (last_data_time is None or 
+                    (current_time - last_data_time).total_seconds() >= 0.5):
                     
-                    # 如果是新数据或者距离上次发送超过一定时间，则发送
-                    if (last_data_time is None or 
-                        (current_time - last_data_time).total_seconds() >= 0.5):
-                        
+                    with self.data_lock:
+                        current_data = self.current_data.copy() if self.current_data else {}
+                    
+                    # 检查是否有数据
+                    if current_data:
                         yield CollectedData(
                             source_id=self.sensor_id,
                             timestamp=current_time,
@@ -542,6 +921,7 @@ class JY901Sensor(BaseSensorCollector):
     
     def _open_serial_port(self):
         """打开串口"""
+        serial = _get_serial()
         try:
             if self.serial_port and self.serial_port.is_open:
                 self.serial_port.close()
@@ -554,20 +934,53 @@ class JY901Sensor(BaseSensorCollector):
             
             print(f"串口已打开: {self.port} @ {self.baudrate} bps")
             
-        except SerialException as e:
+            if self.low_latency:
+                self._enable_low_latency()
+            
+        except serial.SerialException as e:
             print(f"打开串口失败: {self.port} @ {self.baudrate} - {e}")
             raise
     
+    def _enable_low_latency(self):
+        """
+        启用串口驱动的低延迟模式（Linux ASYNC_LOW_LATENCY）
+        
+        USB 串口驱动默认按定时器批量上交数据，低延迟模式下收到数据即上交，
+        读取线程能更快拿到完整数据包。平台或驱动不支持时保持默认模式。
+        """
+        set_low_latency_mode = getattr(self.serial_port, 'set_low_latency_mode', None)
+        if set_low_latency_mode is None:
+            return
+        
+        try:
+            set_low_latency_mode(True)
+        except (ValueError, OSError) as e:
+            print(f"串口 {self.port} 不支持低延迟模式: {e}")
+    
+    def _start_serial_reader(self):
+        """启动串口读取线程（串口读取与事件循环中的数据处理并行进行）"""
+        self.is_running = True
+        self.read_thread = threading.Thread(
+            target=self._serial_read_loop,
+            daemon=True
+        )
+        self.read_thread.start()
+    
     def _serial_read_loop(self):
-        """串口读取循环（在独立线程中运行）"""
+        """
+        串口读取循环（在独立线程中运行）
+        
+        阻塞读取：没有数据时在 read() 中等待（最长为串口 timeout，期间释放 GIL），
+        有积压数据时一次读完，不再空转轮询 in_waiting。
+        """
         print(f"串口读取线程已启动: {self.port}")
         
         while self.is_running:
             try:
-                if self.serial_port and self.serial_port.is_open:
-                    # 检查是否有数据可读
-                    if self.serial_port.in_waiting > 0:
-                        data = self.serial_port.read(self.serial_port.in_waiting)
+                port = self.serial_port
+                if port and port.is_open:
+                    data = port.read(port.in_waiting or 1)
+                    if data:
                         self._parse_serial_data(data)
                 else:
                     time.sleep(0.1)
@@ -588,137 +1001,160 @@ class JY901Sensor(BaseSensorCollector):
         - 类型: 0x50-0x5A, 0x5F
         - 数据: 8字节
         - 校验和: 1字节
+        
+        新数据追加到接收缓冲区后整体扫描：用 numpy 一次找出所有包头、
+        类型合法且校验和正确的数据包。同一批数据中后到的包会覆盖
+        先到的同类型包，所以每种类型只解析最后一个。数据包直接按偏移量
+        从缓冲区视图中解析，不为每个包复制出 bytes 对象。
         """
-        for byte in data:
-            self.temp_bytes.append(byte)
-            
-            # 检查包头
-            if self.temp_bytes[0] != 0x55:
-                del self.temp_bytes[0]
-                continue
-            
-            # 检查类型字节
-            if len(self.temp_bytes) > 1:
-                type_byte = self.temp_bytes[1]
-                valid_types = list(range(0x50, 0x5B)) + [0x5F]
-                if type_byte not in valid_types:
-                    del self.temp_bytes[0]
-                    continue
-            
-            # 完整数据包
-            if len(self.temp_bytes) == self.pack_size:
-                # 校验和
-                checksum = sum(self.temp_bytes[:-1]) & 0xFF
-                
-                if checksum == self.temp_bytes[-1]:
-                    # 解析数据包
-                    self._process_data_packet(self.temp_bytes)
-                else:
-                    # 校验失败
-                    del self.temp_bytes[0]
-                
-                # 清空缓冲区
-                self.temp_bytes = []
+        buf = self._rx_buf
+        buf.extend(data)
+        
+        size = len(buf)
+        if size < _PACKET_SIZE:
+            return
+        
+        # 直接在接收缓冲区上建立数组视图（不复制）；缩短缓冲区前需释放该视图
+        raw = np.frombuffer(buf, dtype=np.uint8)
+        
+        # 候选包：包头正确且类型合法
+        starts = np.flatnonzero(raw[:size - _PACKET_SIZE + 1] == _PACKET_HEADER)
+        starts = starts[_VALID_PACKET_TYPES[raw[starts + 1]]]
+        
+        # 校验和：前 10 字节之和的低 8 位等于最后一个字节
+        frames = np.lib.stride_tricks.sliding_window_view(raw, _PACKET_SIZE)[starts]
+        checksum = frames[:, :-1].sum(axis=1, dtype=np.uint32) & 0xFF
+        starts = starts[checksum == frames[:, -1]]
+        
+        # 按顺序选取互不重叠的数据包，记录每种类型最后一个包的位置
+        latest: Dict[int, int] = {}
+        consumed = 0
+        for start in starts.tolist():
+            if start >= consumed:
+                latest[raw[start + 1]] = start
+                consumed = start + _PACKET_SIZE
+        
+        for start in sorted(latest.values()):
+            self._process_data_packet(raw, start)
+        
+        # 保留末尾可能尚未接收完整的数据包
+        del raw
+        del buf[:max(consumed, size - _PACKET_SIZE + 1)]
     
-    def _process_data_packet(self, packet: List[int]):
-        """处理数据包"""
-        packet_type = packet[1]
+    def _process_data_packet(self, packet: Any, offset: int = 0):
+        """
+        处理数据包
+        
+        Args:
+            packet: 包含数据包的缓冲区（bytes 或 uint8 数组）
+            offset: 数据包在缓冲区中的起始位置
+        """
+        packet_type = packet[offset + 1]
         
         with self.data_lock:
             if self.current_data is None:
                 self.current_data = {}
             
             if packet_type == 0x50:  # 时间包
-                self._parse_time_packet(packet)
+                self._parse_time_packet(packet, offset)
             elif packet_type == 0x51:  # 加速度包
-                self._parse_acc_packet(packet)
+                self._parse_acc_packet(packet, offset)
             elif packet_type == 0x52:  # 角速度包
-                self._parse_gyro_packet(packet)
+                self._parse_gyro_packet(packet, offset)
             elif packet_type == 0x53:  # 角度包
-                self._parse_angle_packet(packet)
+                self._parse_angle_packet(packet, offset)
             elif packet_type == 0x54:  # 磁场包
-                self._parse_mag_packet(packet)
+                self._parse_mag_packet(packet, offset)
             elif packet_type == 0x59:  # 四元数包
-                self._parse_quaternion_packet(packet)
+                self._parse_quaternion_packet(packet, offset)
+            else:
+                return
+            
+            self._frame_ts = time.time()
     
-    def _parse_time_packet(self, packet: List[int]):
+    def _parse_time_packet(self, packet: Any, offset: int = 0):
         """解析时间包"""
-        # 提取时间信息
-        year = 2000 + (packet[2])
-        month = packet[3]
-        day = packet[4]
-        hour = packet[5]
-        minute = packet[6]
-        second = packet[7]
-        millisecond = (packet[9] << 8) | packet[8]
+        # 提取时间信息（转换为 bytes 后逐字节取 Python 整数）
+        year, month, day, hour, minute, second, ms_lo, ms_hi = bytes(
+            packet[offset + 2:offset + 10]
+        )
+        year += 2000
+        millisecond = (ms_hi << 8) | ms_lo
         
         time_str = f"{year}-{month:02d}-{day:02d} {hour:02d}:{minute:02d}:{second:02d}.{millisecond:03d}"
         self.current_data['片上时间()'] = time_str
     
-    def _parse_acc_packet(self, packet: List[int]):
+    def _parse_acc_packet(self, packet: Any, offset: int = 0):
         """解析加速度包"""
-        # 提取加速度数据
-        ax = self._bytes_to_int16([packet[2], packet[3]]) / 32768.0 * self.acc_range
-        ay = self._bytes_to_int16([packet[4], packet[5]]) / 32768.0 * self.acc_range
-        az = self._bytes_to_int16([packet[6], packet[7]]) / 32768.0 * self.acc_range
+        # 提取加速度数据和温度（温度为无符号数）
+        buf = to_buffer(packet)
+        offset += _PAYLOAD_OFFSET
+        ax, ay, az = parse_triple_i16(buf, offset, self._acc_scale)
+        temp = read_u16(buf, offset + 6) / _TEMP_DIVISOR
         
-        # 提取温度
-        temp = ((packet[9] << 8) | packet[8]) / 100.0
+        ax, ay, az, temp = round(ax, 4), round(ay, 4), round(az, 4), round(temp, 2)
         
-        self.current_data['加速度X(g)'] = round(ax, 4)
-        self.current_data['加速度Y(g)'] = round(ay, 4)
-        self.current_data['加速度Z(g)'] = round(az, 4)
-        self.current_data['温度(°C)'] = round(temp, 2)
+        self.current_data['加速度X(g)'] = ax
+        self.current_data['加速度Y(g)'] = ay
+        self.current_data['加速度Z(g)'] = az
+        self.current_data['温度(°C)'] = temp
+        self._frame[_ACC_SLICE] = ax, ay, az
+        self._frame[_TEMP_INDEX] = temp
     
-    def _parse_gyro_packet(self, packet: List[int]):
+    def _parse_gyro_packet(self, packet: Any, offset: int = 0):
         """解析角速度包"""
-        gx = self._bytes_to_int16([packet[2], packet[3]]) / 32768.0 * self.gyro_range
-        gy = self._bytes_to_int16([packet[4], packet[5]]) / 32768.0 * self.gyro_range
-        gz = self._bytes_to_int16([packet[6], packet[7]]) / 32768.0 * self.gyro_range
+        gx, gy, gz = parse_triple_i16(
+            to_buffer(packet), offset + _PAYLOAD_OFFSET, self._gyro_scale
+        )
+        
+        gx, gy, gz = round(gx, 4), round(gy, 4), round(gz, 4)
         
-        self.current_data['角速度X(°/s)'] = round(gx, 4)
-        self.current_data['角速度Y(°/s)'] = round(gy, 4)
-        self.current_data['角速度Z(°/s)'] = round(gz, 4)
+        self.current_data['角速度X(°/s)'] = gx
+        self.current_data['角速度Y(°/s)'] = gy
+        self.current_data['角速度Z(°/s)'] = gz
+        self._frame[_GYRO_SLICE] = gx, gy, gz
     
-    def _parse_angle_packet(self, packet: List[int]):
+    def _parse_angle_packet(self, packet: Any, offset: int = 0):
         """解析角度包"""
-        rx = self._bytes_to_int16([packet[2], packet[3]]) / 32768.0 * self.angle_range
-        ry = self._bytes_to_int16([packet[4], packet[5]]) / 32768.0 * self.angle_range
-        rz = self._bytes_to_int16([packet[6], packet[7]]) / 32768.0 * self.angle_range
+        rx, ry, rz = parse_triple_i16(
+            to_buffer(packet), offset + _PAYLOAD_OFFSET, self._angle_scale
+        )
+        
+        rx, ry, rz = round(rx, 3), round(ry, 3), round(rz, 3)
         
-        self.current_data['角度X(°)'] = round(rx, 3)
-        self.current_data['角度Y(°)'] = round(ry, 3)
-        self.current_data['角度Z(°)'] = round(rz, 3)
+        self.current_data['角度X(°)'] = rx
+        self.current_data['角度Y(°)'] = ry
+        self.current_data['角度Z(°)'] = rz
+        self._frame[_ANGLE_SLICE] = rx, ry, rz
     
-    def _parse_mag_packet(self, packet: List[int]):
+    def _parse_mag_packet(self, packet: Any, offset: int = 0):
         """解析磁场包"""
-        mx = self._bytes_to_int16([packet[2], packet[3]])
-        my = self._bytes_to_int16([packet[4], packet[5]])
-        mz = self._bytes_to_int16([packet[6], packet[7]])
+        mx, my, mz = parse_triple_i16(
+            to_buffer(packet), offset + _PAYLOAD_OFFSET, _MAG_SCALE
+        )
         
-        self.current_data['磁场X(uT)'] = float(mx)
-        self.current_data['磁场Y(uT)'] = float(my)
-        self.current_data['磁场Z(uT)'] = float(mz)
+        self.current_data['磁场X(uT)'] = mx
+        self.current_data['磁场Y(uT)'] = my
+        self.current_data['磁场Z(uT)'] = mz
+        self._frame[_MAG_SLICE] = mx, my, mz
     
-    def _parse_quaternion_packet(self, packet: List[int]):
+    def _parse_quaternion_packet(self, packet: Any, offset: int = 0):
         """解析四元数包"""
-        q0 = self._bytes_to_int16([packet[2], packet[3]]) / 32768.0
-        q1 = self._bytes_to_int16([packet[4], packet[5]]) / 32768.0
-        q2 = self._bytes_to_int16([packet[6], packet[7]]) / 32768.0
-        q3 = self._bytes_to_int16([packet[8], packet[9]]) / 32768.0
-        
-        self.current_data['四元数0()'] = round(q0, 5)
-        self.current_data['四元数1()'] = round(q1, 5)
-        self.current_data['四元数2()'] = round(q2, 5)
-        self.current_data['四元数3()'] = round(q3, 5)
-    
-    def _bytes_to_int16(self, bytes_list: List[int]) -> int:
-        """将字节列表转换为有符号16位整数"""
-        value = (bytes_list[1] << 8) | bytes_list[0]
-        # 处理负数
-        if value >= 32768:
-            value -= 65536
-        return value
+        q0, q1, q2, q3 = parse_quad_i16(
+            to_buffer(packet), offset + _PAYLOAD_OFFSET, _QUAT_SCALE
+        )
+        
+        q0, q1, q2, q3 = round(q0, 5), round(q1, 5), round(q2, 5), round(q3, 5)
+        
+        self.current_data['四元数0()'] = q0
+        self.current_data['四元数1()'] = q1
+        self.current_data['四元数2()'] = q2
+        self.current_data['四元数3()'] = q3
+        self._frame[_QUAT_SLICE] = q0, q1, q2, q3
+    
+    def _bytes_to_int16(self, data: bytes) -> int:
+        """将 2 个字节（小端序）转换为有符号16位整数"""
+        return _INT16_STRUCT.unpack_from(data)[0]
     
     # ==================== 串口命令方法 ====================
     
@@ -788,6 +1224,65 @@ class JY901Sensor(BaseSensorCollector):
         print("磁场校准已开始，请以8字形晃动传感器...")
         return True
     
+    async def wait_magnetic_calibration(
+        self,
+        timeout: float = 30.0,
+        settle_time: float = 3.0,
+        poll_interval: float = 0.2,
+        tolerance: float = 1.0
+    ) -> bool:
+        """
+        等待磁场校准的晃动覆盖完成
+        
+        跟踪三个轴磁场读数的最小/最大值：晃动过程中极值不断扩大，
+        极值开始扩大后连续 settle_time 秒没有再扩大超过 tolerance 时，
+        认为各个方向已覆盖完毕，可以提前结束校准。
+        
+        Args:
+            timeout: 最长等待时间（秒）
+            settle_time: 极值保持不变多久视为完成（秒）
+            poll_interval: 读取磁场数据的间隔（秒）
+            tolerance: 视为极值扩大的最小变化量（uT）
+            
+        Returns:
+            bool: 超时前完成返回 True，超时返回 False
+        """
+        async def wait_settled():
+            lows: Optional[List[float]] = None
+            highs: Optional[List[float]] = None
+            last_growth: Optional[float] = None
+            
+            while True:
+                mag = self.get_magnetic()
+                if mag and None not in mag.values():
+                    values = (mag['x'], mag['y'], mag['z'])
+                    now = time.monotonic()
+                    
+                    if lows is None:
+                        lows, highs = list(values), list(values)
+                    else:
+                        grew = False
+                        for axis, value in enumerate(values):
+                            if value < lows[axis] - tolerance:
+                                lows[axis] = value
+                                grew = True
+                            elif value > highs[axis] + tolerance:
+                                highs[axis] = value
+                                grew = True
+                        
+                        if grew:
+                            last_growth = now
+                        elif last_growth is not None and now - last_growth >= settle_time:
+                            return
+                
+                await asyncio.sleep(poll_interval)
+        
+        try:
+            await asyncio.wait_for(wait_settled(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
     def end_magnetic_calibration(self) -> bool:
         """结束磁场校准并保存"""
         if not self.unlock():
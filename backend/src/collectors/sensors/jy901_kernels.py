@@ -0,0 +1,90 @@
+"""
+JY901 数据包解析内核
+
+WIT 协议数据包从第 3 个字节起为小端 16 位数据。安装了 numba 时，
+解析函数由 LLVM 编译为原生代码（串口读取线程中不再占用解释器）；
+未安装时使用基于 struct 的纯 Python 实现，两者返回值相同。
+
+数据包需先经 to_buffer() 转换为对应实现所需的缓冲区类型；uint8 数组
+（如建立在接收缓冲区上的视图）两种实现都可直接读取，不会被复制。
+"""
+
+import struct
+from typing import Any, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+
+    def to_buffer(packet: Sequence[int]) -> np.ndarray:
+        """将数据包转换为 uint8 数组（numba 内核的输入类型）"""
+        if isinstance(packet, np.ndarray):
+            return packet
+        return np.frombuffer(bytes(packet), dtype=np.uint8)
+
+    @njit(cache=True, boundscheck=False)
+    def _read_i16(buf, offset):
+        value = np.int32(buf[offset]) | (np.int32(buf[offset + 1]) << 8)
+        if value >= 0x8000:
+            value -= 0x10000
+        return value
+
+    @njit(cache=True, boundscheck=False)
+    def read_u16(buf, offset):
+        """读取一个小端无符号 16 位整数"""
+        return np.int32(buf[offset]) | (np.int32(buf[offset + 1]) << 8)
+
+    @njit(cache=True, boundscheck=False)
+    def parse_triple_i16(buf, offset, scale):
+        """读取 3 个小端有符号 16 位整数并乘以 scale"""
+        return (
+            _read_i16(buf, offset) * scale,
+            _read_i16(buf, offset + 2) * scale,
+            _read_i16(buf, offset + 4) * scale,
+        )
+
+    @njit(cache=True, boundscheck=False)
+    def parse_quad_i16(buf, offset, scale):
+        """读取 4 个小端有符号 16 位整数并乘以 scale"""
+        return (
+            _read_i16(buf, offset) * scale,
+            _read_i16(buf, offset + 2) * scale,
+            _read_i16(buf, offset + 4) * scale,
+            _read_i16(buf, offset + 6) * scale,
+        )
+
+else:
+
+    _TRIPLE_STRUCT = struct.Struct('<hhh')
+    _QUAD_STRUCT = struct.Struct('<hhhh')
+    _U16_STRUCT = struct.Struct('<H')
+
+    # struct.unpack_from 可直接读取的缓冲区类型
+    _BUFFER_TYPES = (bytes, bytearray, memoryview, np.ndarray)
+    
+    def to_buffer(packet: Sequence[int]) -> Any:
+        """将数据包转换为 struct 可读取的缓冲区（已是缓冲区时直接返回）"""
+        return packet if isinstance(packet, _BUFFER_TYPES) else bytes(packet)
+
+    def read_u16(buf: Any, offset: int) -> int:
+        """读取一个小端无符号 16 位整数"""
+        return _U16_STRUCT.unpack_from(buf, offset)[0]
+
+    def parse_triple_i16(buf: Any, offset: int, scale: float) -> Tuple[float, float, float]:
+        """读取 3 个小端有符号 16 位整数并乘以 scale"""
+        x, y, z = _TRIPLE_STRUCT.unpack_from(buf, offset)
+        return x * scale, y * scale, z * scale
+
+    def parse_quad_i16(
+        buf: Any, offset: int, scale: float
+    ) -> Tuple[float, float, float, float]:
+        """读取 4 个小端有符号 16 位整数并乘以 scale"""
+        q0, q1, q2, q3 = _QUAD_STRUCT.unpack_from(buf, offset)
+        return q0 * scale, q1 * scale, q2 * scale, q3 * scale
@@ -31,6 +31,28 @@ class MockSensorDevice(BaseSensorCollector):
     # 支持的运动模式
     VALID_PATTERNS = ['forward', 'backward', 'turn_left', 'turn_right', 'stationary', 'sequence', 'random']
     
+    # 9 轴数值的量程下限/上限（加速度 3 轴、角速度 3 轴、角度 3 轴）
+    _AXIS_HIGH = np.repeat([ACC_RANGE, GYRO_RANGE, ANGLE_RANGE], 3)
+    _AXIS_LOW = -_AXIS_HIGH
+    
+    # 各基础运动模式的 9 轴基准值（角度Z另加累积角度 current_angle_z）
+    _PATTERN_BASE = {
+        'forward':    np.array([0.2, 0.0, -1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]),
+        'backward':   np.array([-0.2, 0.0, -1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]),
+        'turn_left':  np.array([0.0, 0.0, -1.0, 0.0, 0.0, -20.0, 0.0, 0.0, 0.0]),
+        'turn_right': np.array([0.0, 0.0, -1.0, 0.0, 0.0, 20.0, 0.0, 0.0, 0.0]),
+        'stationary': np.array([0.0, 0.0, -1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]),
+    }
+    
+    # 各基础运动模式的 9 轴噪声幅度（乘以 noise_level 后为高斯噪声标准差）
+    _PATTERN_NOISE = {
+        'forward':    np.array([0.1, 0.02, 0.02, 0.5, 0.5, 0.5, 1.0, 1.0, 0.5]),
+        'backward':   np.array([0.1, 0.02, 0.02, 0.5, 0.5, 0.5, 1.0, 1.0, 0.5]),
+        'turn_left':  np.array([0.05, 0.05, 0.02, 1.0, 1.0, 10.0, 1.0, 1.0, 0.5]),
+        'turn_right': np.array([0.05, 0.05, 0.02, 1.0, 1.0, 10.0, 1.0, 1.0, 0.5]),
+        'stationary': np.array([0.01, 0.01, 0.01, 0.1, 0.1, 0.1, 0.5, 0.5, 0.2]),
+    }
+    
     def __init__(
         self,
         sensor_id: str,
@@ -48,6 +70,9 @@ class MockSensorDevice(BaseSensorCollector):
             config: 配置参数
                 - interval: 数据生成间隔（秒，默认0.1）
                 - noise_level: 噪声标准差（默认0.01）
+                - realtime: 是否按 interval 在后台线程中生成数据（默认 True）；
+                  为 False 时每次读取同步生成一个新样本，读取之间无需等待，
+                  样本的采样时间按 interval 固定步进（见 sample_timestamp）
         """
         super().__init__(sensor_id, 'mock_sensor', config)
         
@@ -67,6 +92,15 @@ class MockSensorDevice(BaseSensorCollector):
             print(f"警告: 无效的噪声级别 {self.noise_level}，使用默认值 0.01")
             self.noise_level = 0.01
         
+        self.realtime = self.config.get('realtime', True)
+        
+        # 按需生成时最近一个样本的采样时间（Unix 时间戳，秒），每个样本前进 interval
+        self.sample_timestamp: Optional[float] = None
+        
+        # 噪声生成：采样时写入预分配的缓冲区
+        self._rng = np.random.default_rng()
+        self._sample_buf = np.empty(9)
+        
         # 线程控制
         self.is_running = False
         self.generation_thread: Optional[threading.Thread] = None
@@ -117,6 +151,17 @@ class MockSensorDevice(BaseSensorCollector):
         Returns:
             Dict[str, Any]: 传感器数据字典
         """
+        if not self.realtime:
+            # 按需生成：每次读取都是一个新样本，采样时间按 interval 固定步进
+            if self.sample_timestamp is None:
+                self.sample_timestamp = time.time()
+            else:
+                self.sample_timestamp += self.interval
+            data = self._generate_sample()
+            with self.data_lock:
+                self.current_data = data
+            return data.copy()
+        
         if not self.is_running:
             # 启动数据生成线程
             self.is_running = True
@@ -153,7 +198,7 @@ class MockSensorDevice(BaseSensorCollector):
             await self.connect()
         
         # Start data generation if not already running
-        if not self.is_running:
+        if self.realtime and not self.is_running:
             self.is_running = True
             self.generation_thread = threading.Thread(
                 target=self._data_generation_loop,
@@ -161,7 +206,7 @@ class MockSensorDevice(BaseSensorCollector):
             )
             self.generation_thread.start()
         
-        while self._is_connected and self.is_running:
+        while self._is_connected and (self.is_running or not self.realtime):
             try:
                 raw_data = await self.read_sensor_data()
                 
@@ -193,7 +238,8 @@ class MockSensorDevice(BaseSensorCollector):
                     }
                 )
                 
-                await asyncio.sleep(self.interval)
+                # 按需生成时不等待，只让出事件循环
+                await asyncio.sleep(self.interval if self.realtime else 0)
                 
             except Exception as e:
                 print(f"collect_stream错误: {e}")
@@ -210,15 +256,23 @@ class MockSensorDevice(BaseSensorCollector):
         """
         return self.sensor_id
     
-    def set_motion_pattern(self, pattern: str) -> None:
+    def set_motion_pattern(self, pattern: str, reset_state: bool = False) -> None:
         """
         设置运动模式
         
         Args:
             pattern: 运动模式
+            reset_state: 是否同时重置运动状态（累积角度、序列/随机模式的阶段计数），
+                使同一个设备切换模式后与新建的设备生成相同的数据
         """
         if pattern in self.VALID_PATTERNS:
             self.motion_pattern = pattern
+            if reset_state:
+                self.current_angle_z = 0.0
+                self.sequence_index = 0
+                self.sequence_counter = 0
+                self.random_counter = 0
+                self.current_random_pattern = 'stationary'
             print(f"运动模式已更改为: {pattern}")
         else:
             print(f"警告: 无效的运动模式 '{pattern}'")
@@ -229,20 +283,7 @@ class MockSensorDevice(BaseSensorCollector):
         
         while self.is_running:
             try:
-                # 获取当前有效的运动模式
-                current_pattern = self._get_current_pattern()
-                
-                # 根据运动模式生成数据
-                if current_pattern == 'forward':
-                    data = self._generate_forward_data()
-                elif current_pattern == 'backward':
-                    data = self._generate_backward_data()
-                elif current_pattern == 'turn_left':
-                    data = self._generate_turn_left_data()
-                elif current_pattern == 'turn_right':
-                    data = self._generate_turn_right_data()
-                else:  # stationary
-                    data = self._generate_stationary_data()
+                data = self._generate_sample()
                 
                 # 更新当前数据缓存
                 with self.data_lock:
@@ -257,6 +298,21 @@ class MockSensorDevice(BaseSensorCollector):
         
         print(f"MockSensorDevice [{self.sensor_id}] 数据生成线程已停止")
     
+    def _generate_sample(self) -> Dict[str, Any]:
+        """按当前有效的运动模式生成一个数据样本"""
+        current_pattern = self._get_current_pattern()
+        
+        if current_pattern == 'forward':
+            return self._generate_forward_data()
+        elif current_pattern == 'backward':
+            return self._generate_backward_data()
+        elif current_pattern == 'turn_left':
+            return self._generate_turn_left_data()
+        elif current_pattern == 'turn_right':
+            return self._generate_turn_right_data()
+        else:  # stationary
+            return self._generate_stationary_data()
+    
     def _get_current_pattern(self) -> str:
         """获取当前有效的运动模式（处理sequence和random模式）"""
         if self.motion_pattern == 'sequence':
@@ -276,7 +332,7 @@ class MockSensorDevice(BaseSensorCollector):
                 self.random_counter = 0
                 # 从5种基础模式中随机选择
                 basic_patterns = ['stationary', 'forward', 'backward', 'turn_left', 'turn_right']
-                self.current_random_pattern = np.random.choice(basic_patterns)
+                self.current_random_pattern = str(self._rng.choice(basic_patterns))
                 print(f"随机模式切换到: {self.current_random_pattern}")
             return self.current_random_pattern
         
@@ -285,182 +341,89 @@ class MockSensorDevice(BaseSensorCollector):
     
     def _generate_forward_data(self) -> Dict[str, Any]:
         """生成前进运动模式数据"""
-        # 前进：X轴正向加速度 (0.1~0.3g)
-        acc_x = 0.2 + self._add_noise(0.1)
-        acc_y = self._add_noise(0.02)
-        acc_z = -1.0 + self._add_noise(0.02)  # 重力
-        
-        # 微小角速度波动
-        gyro_x = self._add_noise(0.5)
-        gyro_y = self._add_noise(0.5)
-        gyro_z = self._add_noise(0.5)
-        
-        # 角度保持稳定
-        angle_x = self._add_noise(1.0)
-        angle_y = self._add_noise(1.0)
-        angle_z = self.current_angle_z + self._add_noise(0.5)
-        
-        return self._create_sensor_data(
-            acc_x, acc_y, acc_z,
-            gyro_x, gyro_y, gyro_z,
-            angle_x, angle_y, angle_z
-        )
+        # 前进：X轴正向加速度 (0.1~0.3g)，微小角速度波动，角度保持稳定
+        return self._create_sensor_data(self._sample_axes('forward'))
     
     def _generate_backward_data(self) -> Dict[str, Any]:
         """生成后退运动模式数据"""
-        # 后退：X轴负向加速度 (-0.3~-0.1g)
-        acc_x = -0.2 + self._add_noise(0.1)
-        acc_y = self._add_noise(0.02)
-        acc_z = -1.0 + self._add_noise(0.02)  # 重力
-        
-        # 微小角速度波动
-        gyro_x = self._add_noise(0.5)
-        gyro_y = self._add_noise(0.5)
-        gyro_z = self._add_noise(0.5)
-        
-        # 角度保持稳定
-        angle_x = self._add_noise(1.0)
-        angle_y = self._add_noise(1.0)
-        angle_z = self.current_angle_z + self._add_noise(0.5)
-        
-        return self._create_sensor_data(
-            acc_x, acc_y, acc_z,
-            gyro_x, gyro_y, gyro_z,
-            angle_x, angle_y, angle_z
-        )
+        # 后退：X轴负向加速度 (-0.3~-0.1g)，微小角速度波动，角度保持稳定
+        return self._create_sensor_data(self._sample_axes('backward'))
     
     def _generate_turn_left_data(self) -> Dict[str, Any]:
         """生成左转运动模式数据"""
-        # 微小线性加速度
-        acc_x = self._add_noise(0.05)
-        acc_y = self._add_noise(0.05)
-        acc_z = -1.0 + self._add_noise(0.02)  # 重力
-        
-        # Z轴负向旋转 (-30~-10°/s)
-        gyro_x = self._add_noise(1.0)
-        gyro_y = self._add_noise(1.0)
-        gyro_z = -20.0 + self._add_noise(10.0)
-        
-        # Z轴角度递减
+        # Z轴负向旋转 (-30~-10°/s)，Z轴角度递减
         self.current_angle_z -= 2.0  # 每次减少2度
         if self.current_angle_z < -180.0:
             self.current_angle_z += 360.0
         
-        angle_x = self._add_noise(1.0)
-        angle_y = self._add_noise(1.0)
-        angle_z = self.current_angle_z + self._add_noise(0.5)
-        
-        return self._create_sensor_data(
-            acc_x, acc_y, acc_z,
-            gyro_x, gyro_y, gyro_z,
-            angle_x, angle_y, angle_z
-        )
+        return self._create_sensor_data(self._sample_axes('turn_left'))
     
     def _generate_turn_right_data(self) -> Dict[str, Any]:
         """生成右转运动模式数据"""
-        # 微小线性加速度
-        acc_x = self._add_noise(0.05)
-        acc_y = self._add_noise(0.05)
-        acc_z = -1.0 + self._add_noise(0.02)  # 重力
-        
-        # Z轴正向旋转 (10~30°/s)
-        gyro_x = self._add_noise(1.0)
-        gyro_y = self._add_noise(1.0)
-        gyro_z = 20.0 + self._add_noise(10.0)
-        
-        # Z轴角度递增
+        # Z轴正向旋转 (10~30°/s)，Z轴角度递增
         self.current_angle_z += 2.0  # 每次增加2度
         if self.current_angle_z > 180.0:
             self.current_angle_z -= 360.0
         
-        angle_x = self._add_noise(1.0)
-        angle_y = self._add_noise(1.0)
-        angle_z = self.current_angle_z + self._add_noise(0.5)
-        
-        return self._create_sensor_data(
-            acc_x, acc_y, acc_z,
-            gyro_x, gyro_y, gyro_z,
-            angle_x, angle_y, angle_z
-        )
+        return self._create_sensor_data(self._sample_axes('turn_right'))
     
     def _generate_stationary_data(self) -> Dict[str, Any]:
         """生成静止运动模式数据"""
-        # 仅重力加速度
-        acc_x = self._add_noise(0.01)
-        acc_y = self._add_noise(0.01)
-        acc_z = -1.0 + self._add_noise(0.01)  # 重力
-        
-        # 接近零的角速度
-        gyro_x = self._add_noise(0.1)
-        gyro_y = self._add_noise(0.1)
-        gyro_z = self._add_noise(0.1)
-        
-        # 角度保持稳定
-        angle_x = self._add_noise(0.5)
-        angle_y = self._add_noise(0.5)
-        angle_z = self.current_angle_z + self._add_noise(0.2)
-        
-        return self._create_sensor_data(
-            acc_x, acc_y, acc_z,
-            gyro_x, gyro_y, gyro_z,
-            angle_x, angle_y, angle_z
-        )
+        # 仅重力加速度，接近零的角速度，角度保持稳定
+        return self._create_sensor_data(self._sample_axes('stationary'))
     
-    def _add_noise(self, scale: float) -> float:
+    def _sample_axes(self, pattern: str) -> np.ndarray:
         """
-        添加高斯噪声
+        生成一个样本的 9 轴数值（基准值 + 高斯噪声，已限制在量程内）
+        
+        9 个轴的噪声由一次 standard_normal 调用生成，写入预分配的缓冲区；
+        噪声幅度每次按当前的 noise_level 计算，运行中修改 noise_level 立即生效。
         
         Args:
-            scale: 噪声幅度
+            pattern: 基础运动模式
             
         Returns:
-            float: 噪声值
+            np.ndarray: [accX, accY, accZ, gyroX, gyroY, gyroZ, angleX, angleY, angleZ]
+            （内部缓冲区，下一次采样时会被覆盖）
         """
-        return np.random.normal(0, self.noise_level * scale)
+        values = self._rng.standard_normal(9, out=self._sample_buf)
+        values *= self._PATTERN_NOISE[pattern]
+        values *= self.noise_level
+        values += self._PATTERN_BASE[pattern]
+        values[8] += self.current_angle_z
+        return np.clip(values, self._AXIS_LOW, self._AXIS_HIGH, out=values)
     
-    def _create_sensor_data(
-        self,
-        acc_x: float, acc_y: float, acc_z: float,
-        gyro_x: float, gyro_y: float, gyro_z: float,
-        angle_x: float, angle_y: float, angle_z: float
-    ) -> Dict[str, Any]:
+    def _create_sensor_data(self, values: np.ndarray) -> Dict[str, Any]:
         """
         创建传感器数据字典
         
         Args:
-            acc_x, acc_y, acc_z: 加速度 (g)
-            gyro_x, gyro_y, gyro_z: 角速度 (°/s)
-            angle_x, angle_y, angle_z: 角度 (°)
+            values: 9 轴数值（加速度 g、角速度 °/s、角度 °，已限制在量程内）
             
         Returns:
             Dict[str, Any]: 传感器数据字典
         """
-        # 确保数值在有效范围内
-        acc_x = np.clip(acc_x, -self.ACC_RANGE, self.ACC_RANGE)
-        acc_y = np.clip(acc_y, -self.ACC_RANGE, self.ACC_RANGE)
-        acc_z = np.clip(acc_z, -self.ACC_RANGE, self.ACC_RANGE)
+        acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z, angle_x, angle_y, angle_z = values.tolist()
         
-        gyro_x = np.clip(gyro_x, -self.GYRO_RANGE, self.GYRO_RANGE)
-        gyro_y = np.clip(gyro_y, -self.GYRO_RANGE, self.GYRO_RANGE)
-        gyro_z = np.clip(gyro_z, -self.GYRO_RANGE, self.GYRO_RANGE)
-        
-        angle_x = np.clip(angle_x, -self.ANGLE_RANGE, self.ANGLE_RANGE)
-        angle_y = np.clip(angle_y, -self.ANGLE_RANGE, self.ANGLE_RANGE)
-        angle_z = np.clip(angle_z, -self.ANGLE_RANGE, self.ANGLE_RANGE)
+        # 按需生成时使用合成的采样时间
+        if self.realtime or self.sample_timestamp is None:
+            sample_time = datetime.now()
+        else:
+            sample_time = datetime.fromtimestamp(self.sample_timestamp)
         
         # 创建数据字典（符合JY901格式）
         return {
-            '时间': datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+            '时间': sample_time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
             '设备名称': self.sensor_id,
-            '加速度X(g)': round(float(acc_x), 4),
-            '加速度Y(g)': round(float(acc_y), 4),
-            '加速度Z(g)': round(float(acc_z), 4),
-            '角速度X(°/s)': round(float(gyro_x), 4),
-            '角速度Y(°/s)': round(float(gyro_y), 4),
-            '角速度Z(°/s)': round(float(gyro_z), 4),
-            '角度X(°)': round(float(angle_x), 3),
-            '角度Y(°)': round(float(angle_y), 3),
-            '角度Z(°)': round(float(angle_z), 3),
+            '加速度X(g)': round(acc_x, 4),
+            '加速度Y(g)': round(acc_y, 4),
+            '加速度Z(g)': round(acc_z, 4),
+            '角速度X(°/s)': round(gyro_x, 4),
+            '角速度Y(°/s)': round(gyro_y, 4),
+            '角速度Z(°/s)': round(gyro_z, 4),
+            '角度X(°)': round(angle_x, 3),
+            '角度Y(°)': round(angle_y, 3),
+            '角度Z(°)': round(angle_z, 3),
             '温度(°C)': 25.0,
             '电量(%)': 100.0,
         }
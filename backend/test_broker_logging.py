@@ -16,6 +16,8 @@ import tempfile
 import json
 from pathlib import Path
 
+import pytest
+
 # Add parent directory to path
 parent_dir = Path(__file__).parent
 if str(parent_dir) not in sys.path:
@@ -27,22 +29,62 @@ try:
         DirectionMessageHandler,
         AngleMessageHandler,
         configure_broker_logging,
+        init_broker_logging,
+        set_broker_log_level,
+        flush_broker_logging,
         get_broker_logger,
         create_message_logger,
         create_subscriber_logger,
+        BinaryBrokerHandler,
+        read_binary_log,
+    )
+    from src.broker.logging_config import (
+        StructuredFormatter,
+        is_record_introspection_enabled,
+        set_record_introspection,
     )
-    from src.broker.logging_config import StructuredFormatter
 except ImportError:
     from broker import (
         MessageBroker,
         DirectionMessageHandler,
         AngleMessageHandler,
         configure_broker_logging,
+        init_broker_logging,
+        set_broker_log_level,
+        flush_broker_logging,
         get_broker_logger,
         create_message_logger,
         create_subscriber_logger,
+        BinaryBrokerHandler,
+        read_binary_log,
+    )
+    from broker.logging_config import (
+        StructuredFormatter,
+        is_record_introspection_enabled,
+        set_record_introspection,
     )
-    from broker.logging_config import StructuredFormatter
+
+
+@pytest.fixture(scope="module", autouse=True)
+def without_record_introspection():
+    """测试不需要调用者/线程信息，关闭以减少每条日志的开销，结束后恢复原设置"""
+    previous = is_record_introspection_enabled()
+    set_record_introspection(False)
+    yield
+    set_record_introspection(previous)
+
+
+# 处理器无状态，所有测试共享同一实例
+_DIRECTION_HANDLER = DirectionMessageHandler()
+_ANGLE_HANDLER = AngleMessageHandler()
+
+
+def _ensure_registered(broker: MessageBroker) -> None:
+    """确保测试使用的消息类型已注册（O(1) 查询，不生成类型列表）"""
+    if not broker.is_type_registered("direction_result"):
+        broker.register_message_type("direction_result", _DIRECTION_HANDLER)
+    if not broker.is_type_registered("angle_value"):
+        broker.register_message_type("angle_value", _ANGLE_HANDLER)
 
 
 def test_basic_logging_configuration():
@@ -68,31 +110,80 @@ def test_configurable_log_levels():
     """测试可配置的日志级别 (Requirement 8.4)"""
     print("\n=== 测试 2: 可配置日志级别 ===")
     
+    # 处理器只构建一次，之后各阶段只调整级别
+    init_broker_logging(log_level="INFO", use_structured=False)
+    handlers = list(logging.getLogger("src.broker").handlers)
+    
     # 测试 DEBUG 级别
     print("\n--- DEBUG 级别 ---")
-    configure_broker_logging(log_level="DEBUG", use_structured=False)
+    set_broker_log_level("DEBUG")
     logger = get_broker_logger("test_debug")
+    assert logger.isEnabledFor(logging.DEBUG)
     logger.debug("DEBUG 级别日志应该显示")
     logger.info("INFO 级别日志应该显示")
     
     # 测试 WARNING 级别
     print("\n--- WARNING 级别 ---")
-    configure_broker_logging(log_level="WARNING", use_structured=False)
+    set_broker_log_level("WARNING")
     logger = get_broker_logger("test_warning")
+    assert not logger.isEnabledFor(logging.INFO)
     logger.info("INFO 级别日志不应显示")
     logger.warning("WARNING 级别日志应该显示")
     logger.error("ERROR 级别日志应该显示")
     
     # 测试 ERROR 级别
     print("\n--- ERROR 级别 ---")
-    configure_broker_logging(log_level="ERROR", use_structured=False)
+    set_broker_log_level("ERROR")
     logger = get_broker_logger("test_error")
+    assert not logger.isEnabledFor(logging.WARNING)
     logger.warning("WARNING 级别日志不应显示")
     logger.error("ERROR 级别日志应该显示")
     
+    # 相同处理器配置再次初始化不会重建处理器
+    init_broker_logging(log_level="INFO", use_structured=False)
+    assert logging.getLogger("src.broker").handlers == handlers
+    assert logging.getLogger("src.broker").level == logging.INFO
+    
     print("\n✓ 可配置日志级别测试通过")
 
 
+def test_filtered_levels_skip_record_creation():
+    """测试被级别过滤的日志不会创建 LogRecord (Requirement 8.4)"""
+    print("\n=== 测试: 过滤级别不创建日志记录 ===")
+    
+    configure_broker_logging(log_level="ERROR", use_structured=False)
+    
+    broker = MessageBroker.get_instance()
+    _ensure_registered(broker)
+    
+    created_levels = []
+    original_factory = logging.getLogRecordFactory()
+    
+    def counting_factory(*args, **kwargs):
+        record = original_factory(*args, **kwargs)
+        created_levels.append(record.levelno)
+        return record
+    
+    logging.setLogRecordFactory(counting_factory)
+    try:
+        logger = get_broker_logger("test_filtered")
+        logger.debug("不应创建记录")
+        logger.info("不应创建记录")
+        logger.warning("不应创建记录")
+        broker.publish("direction_result", {
+            "command": "forward",
+            "timestamp": "2024-01-01T00:00:00"
+        })
+    finally:
+        logging.setLogRecordFactory(original_factory)
+    
+    assert all(level >= logging.ERROR for level in created_levels), (
+        f"低于 ERROR 的日志创建了记录: {created_levels}"
+    )
+    
+    print("\n✓ 过滤级别不创建日志记录测试通过")
+
+
 def test_structured_logging():
     """测试结构化日志（JSON 格式）"""
     print("\n=== 测试 3: 结构化日志 ===")
@@ -124,8 +215,7 @@ def test_message_publish_logging():
     broker = MessageBroker.get_instance()
     
     # 注册消息类型
-    broker.register_message_type("direction_result", DirectionMessageHandler())
-    broker.register_message_type("angle_value", AngleMessageHandler())
+    _ensure_registered(broker)
     
     print("\n--- 发布有效消息 ---")
     result = broker.publish("direction_result", {
@@ -156,8 +246,7 @@ def test_subscription_logging():
     broker = MessageBroker.get_instance()
     
     # 确保消息类型已注册
-    if "direction_result" not in broker.get_registered_types():
-        broker.register_message_type("direction_result", DirectionMessageHandler())
+    _ensure_registered(broker)
     
     print("\n--- 注册订阅者 ---")
     
@@ -191,8 +280,7 @@ def test_error_logging():
     broker = MessageBroker.get_instance()
     
     # 确保消息类型已注册
-    if "direction_result" not in broker.get_registered_types():
-        broker.register_message_type("direction_result", DirectionMessageHandler())
+    _ensure_registered(broker)
     
     print("\n--- 验证错误 ---")
     result = broker.publish("direction_result", {
@@ -222,6 +310,51 @@ def test_error_logging():
     print("\n✓ 错误日志测试通过")
 
 
+def test_lazy_log_formatting():
+    """测试日志参数延迟格式化：级别未启用时不格式化消息内容"""
+    print("\n=== 测试: 日志延迟格式化 ===")
+    
+    try:
+        from src.broker import PassthroughHandler
+    except ImportError:
+        from broker import PassthroughHandler
+    
+    class CountingStr(str):
+        """记录被格式化次数的字符串"""
+        format_calls = 0
+        
+        def __str__(self):
+            CountingStr.format_calls += 1
+            return str.__str__(self)
+        
+        def __format__(self, spec):
+            CountingStr.format_calls += 1
+            return str.__format__(self, spec)
+    
+    configure_broker_logging(log_level="INFO", use_structured=False)
+    broker = MessageBroker.get_instance()
+    broker.register_message_type(
+        "lazy_probe", PassthroughHandler("lazy_probe"), allow_override=True
+    )
+    
+    # 只保留 WARNING 及以上级别，发布路径的 INFO/DEBUG 日志不应格式化参数
+    configure_broker_logging(log_level="WARNING", use_structured=False)
+    message_type = CountingStr("lazy_probe")
+    sub_id = broker.subscribe(message_type, lambda message: None)
+    
+    CountingStr.format_calls = 0
+    result = broker.publish(message_type, {"value": 1})
+    broker.unsubscribe(message_type, sub_id)
+    
+    assert result.success
+    assert CountingStr.format_calls == 0, (
+        f"禁用级别的日志参数被格式化了 {CountingStr.format_calls} 次"
+    )
+    
+    broker.unregister_message_type("lazy_probe")
+    print("\n✓ 日志延迟格式化测试通过")
+
+
 def test_context_loggers():
     """测试上下文日志记录器"""
     print("\n=== 测试 7: 上下文日志记录器 ===")
@@ -266,6 +399,9 @@ def test_file_logging():
         logger.warning("这是警告日志")
         logger.error("这是错误日志")
         
+        # 文件日志由后台线程写入，读取前先写出队列中的记录
+        flush_broker_logging()
+        
         # 读取日志文件
         with open(log_file, 'r', encoding='utf-8') as f:
             content = f.read()
@@ -287,58 +423,293 @@ def test_file_logging():
             os.remove(log_file)
 
 
-def test_high_frequency_logging():
-    """测试高频消息日志性能 (Requirement 8.5)"""
-    print("\n=== 测试 9: 高频消息日志性能 ===")
+def test_file_logging_flushes_when_idle():
+    """测试日志量很小时文件日志也会在空闲后自动写入文件"""
+    print("\n=== 测试 8b: 空闲时写出文件日志 ===")
     
+    import os
+    import time
+    
+    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.log') as f:
+        log_file = f.name
+    
+    try:
+        configure_broker_logging(log_level="INFO", log_file=log_file)
+        get_broker_logger("test_idle").info("空闲时应写入文件的日志")
+        
+        # 不调用 flush_broker_logging()，等待后台线程在空闲后写出
+        deadline = time.monotonic() + 5.0
+        content = ""
+        while time.monotonic() < deadline:
+            with open(log_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+            if "空闲时应写入文件的日志" in content:
+                break
+            time.sleep(0.05)
+        
+        assert "空闲时应写入文件的日志" in content
+        
+        print("\n✓ 空闲时写出文件日志测试通过")
+        
+    finally:
+        configure_broker_logging(log_level="INFO")
+        if os.path.exists(log_file):
+            os.remove(log_file)
+
+
+# 高频测试复用同一个消息数据（broker 不会修改调用方传入的字典）
+_HIGH_FREQUENCY_PAYLOAD = {
+    "command": "forward",
+    "timestamp": "2024-01-01T00:00:00",
+    "intensity": 0.5
+}
+
+
+def _run_high_frequency_publish(use_structured: bool) -> int:
+    """发布100条消息并返回总耗时（纳秒）"""
     # 配置日志
-    configure_broker_logging(log_level="INFO", use_structured=False)
+    configure_broker_logging(log_level="INFO", use_structured=use_structured)
     
     # 创建消息代理
     broker = MessageBroker.get_instance()
     
     # 确保消息类型已注册
-    if "direction_result" not in broker.get_registered_types():
-        broker.register_message_type("direction_result", DirectionMessageHandler())
+    _ensure_registered(broker)
     
     import time
     
     print("\n--- 发布100条消息 ---")
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     
     for i in range(100):
-        broker.publish("direction_result", {
-            "command": "forward",
-            "timestamp": "2024-01-01T00:00:00",
-            "intensity": 0.5
-        })
+        broker.publish("direction_result", _HIGH_FREQUENCY_PAYLOAD)
     
-    elapsed = time.time() - start_time
-    print(f"发布100条消息耗时: {elapsed:.4f}秒")
-    print(f"平均每条消息: {elapsed/100*1000:.2f}毫秒")
+    elapsed_ns = time.perf_counter_ns() - start_ns
+    print(f"发布100条消息耗时: {elapsed_ns / 1e9:.4f}秒")
+    print(f"平均每条消息: {elapsed_ns / 100 / 1e6:.2f}毫秒")
+    
+    # 复用的消息数据不应被 broker 修改
+    assert _HIGH_FREQUENCY_PAYLOAD == {
+        "command": "forward",
+        "timestamp": "2024-01-01T00:00:00",
+        "intensity": 0.5
+    }
+    
+    return elapsed_ns
+
+
+def test_high_frequency_logging():
+    """测试高频消息日志性能 (Requirement 8.5)"""
+    print("\n=== 测试 9: 高频消息日志性能 ===")
     
     # 性能应该合理（每条消息不超过10ms）
-    assert elapsed / 100 < 0.01, "日志性能不佳"
+    assert _run_high_frequency_publish(use_structured=False) < 100 * 10_000_000, "日志性能不佳"
     
     print("\n✓ 高频消息日志性能测试通过")
 
 
+def test_high_frequency_structured_logging():
+    """测试高频消息结构化日志性能 (Requirement 8.5)"""
+    print("\n=== 测试 10: 高频消息结构化日志性能 ===")
+    
+    # 结构化日志同样不应超过每条 10ms
+    assert _run_high_frequency_publish(use_structured=True) < 100 * 10_000_000, "结构化日志性能不佳"
+    
+    print("\n✓ 高频消息结构化日志性能测试通过")
+
+
+def test_high_frequency_binary_logging():
+    """测试高频消息二进制日志 (Requirement 8.5)"""
+    print("\n=== 测试 11: 高频消息二进制日志 ===")
+    
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.bin') as f:
+        binary_log_file = f.name
+    
+    try:
+        configure_broker_logging(
+            log_level="INFO",
+            use_structured=False,
+            binary_log_file=binary_log_file
+        )
+        
+        broker = MessageBroker.get_instance()
+        _ensure_registered(broker)
+        
+        message_ids = set()
+        for i in range(100):
+            result = broker.publish("direction_result", _HIGH_FREQUENCY_PAYLOAD)
+            message_ids.add(int(result.message_id.replace("-", "")[-16:], 16))
+        
+        # 重新配置会关闭二进制处理器并写出缓冲
+        configure_broker_logging(log_level="INFO", use_structured=False)
+        
+        records = [
+            r for r in read_binary_log(binary_log_file)
+            if r["message_type"] == "direction_result"
+        ]
+        print(f"二进制日志记录数: {len(records)}")
+        
+        assert len(records) == 100
+        assert {r["message_id"] for r in records} == message_ids
+        assert all(r["level"] == "INFO" for r in records)
+        
+        print("\n✓ 高频消息二进制日志测试通过")
+        
+    finally:
+        import os
+        for path in (binary_log_file, binary_log_file + ".types"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def test_binary_log_type_table(monkeypatch):
+    """测试二进制日志的类型表：不依赖写入进程的类型ID，追加写入时按偏移解码"""
+    print("\n=== 测试 12: 二进制日志类型表 ===")
+    
+    import os
+    
+    logging_config = sys.modules[BinaryBrokerHandler.__module__]
+    
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.bin') as f:
+        binary_log_file = f.name
+    
+    def write_records(type_ids, message_types, mode):
+        """模拟一个按 type_ids 分配类型ID的进程写入日志"""
+        monkeypatch.setattr(logging_config, "get_message_type_id", type_ids.__getitem__)
+        handler = BinaryBrokerHandler(binary_log_file, mode=mode)
+        for message_type in message_types:
+            record = logging.LogRecord(
+                "src.broker", logging.INFO, __file__, 1, "published", None, None
+            )
+            record.message_type = message_type
+            handler.emit(record)
+        handler.close()
+    
+    try:
+        # 第一个进程：direction_result=1；第二个进程追加写入：angle_value=1, direction_result=2
+        write_records({"direction_result": 1}, ["direction_result"], "wb")
+        write_records(
+            {"angle_value": 1, "direction_result": 2},
+            ["angle_value", "direction_result"],
+            "ab",
+        )
+        
+        records = read_binary_log(binary_log_file)
+        assert [r["message_type"] for r in records] == [
+            "direction_result", "angle_value", "direction_result"
+        ]
+        
+        print("\n✓ 二进制日志类型表测试通过")
+        
+    finally:
+        for path in (binary_log_file, binary_log_file + ".types"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def test_structured_formatter_output():
+    """测试结构化格式化器输出合法 JSON"""
+    print("\n=== 测试 13: 结构化格式化器输出 ===")
+    
+    record = logging.LogRecord(
+        name="src.broker.test",
+        level=logging.INFO,
+        pathname=__file__,
+        lineno=1,
+        msg="消息 %s 已发布",
+        args=("msg_123",),
+        exc_info=None,
+    )
+    record.message_type = "direction_result"
+    
+    log_data = json.loads(StructuredFormatter().format(record))
+    
+    assert log_data["message"] == "消息 msg_123 已发布"
+    assert log_data["level"] == "INFO"
+    assert log_data["logger"] == "src.broker.test"
+    assert log_data["message_type"] == "direction_result"
+    
+    # extra 字段与基础字段同名时覆盖基础字段（如验证错误日志的 timestamp）
+    record.timestamp = "2024-01-01T00:00:00"
+    log_data = json.loads(StructuredFormatter().format(record))
+    assert log_data["timestamp"] == "2024-01-01T00:00:00"
+    assert log_data["message"] == "消息 msg_123 已发布"
+    
+    print("\n✓ 结构化格式化器输出测试通过")
+
+
+def test_caller_info_setting():
+    """测试调用者信息采集只在显式指定时修改，关闭后结构化日志不输出调用者字段"""
+    print("\n=== 测试 14: 调用者信息采集 ===")
+    
+    previous = is_record_introspection_enabled()
+    try:
+        # 默认不修改整个进程的 logging 设置
+        set_record_introspection(True)
+        configure_broker_logging(log_level="INFO")
+        assert is_record_introspection_enabled()
+        
+        record = logging.getLogger("uvicorn.test").makeRecord(
+            "uvicorn.test", logging.INFO, __file__, 42, "请求完成", None, None,
+            func="handle"
+        )
+        log_data = json.loads(StructuredFormatter().format(record))
+        assert log_data["function"] == "handle"
+        assert log_data["line"] == 42
+        
+        # 显式关闭后，记录不再带调用者信息，结构化输出省略这些字段
+        configure_broker_logging(log_level="INFO", include_caller_info=False)
+        assert not is_record_introspection_enabled()
+        
+        records = []
+        capture = logging.Handler()
+        capture.emit = records.append
+        test_logger = logging.getLogger("uvicorn.test")
+        test_logger.addHandler(capture)
+        try:
+            test_logger.warning("请求完成")
+        finally:
+            test_logger.removeHandler(capture)
+        
+        log_data = json.loads(StructuredFormatter().format(records[0]))
+        assert log_data["message"] == "请求完成"
+        assert not {"module", "function", "line"} & log_data.keys()
+        
+        # extra 字段覆盖基础字段时走完整字典序列化，同样省略调用者字段
+        records[0].timestamp = "2024-01-01T00:00:00"
+        log_data = json.loads(StructuredFormatter().format(records[0]))
+        assert not {"module", "function", "line"} & log_data.keys()
+    finally:
+        set_record_introspection(previous)
+    
+    print("\n✓ 调用者信息采集测试通过")
+
+
 def run_all_tests():
     """运行所有测试"""
     print("=" * 60)
     print("消息代理日志功能测试")
     print("=" * 60)
     
+    set_record_introspection(False)
+    
     try:
         test_basic_logging_configuration()
         test_configurable_log_levels()
+        test_filtered_levels_skip_record_creation()
         test_structured_logging()
         test_message_publish_logging()
         test_subscription_logging()
         test_error_logging()
+        test_lazy_log_formatting()
         test_context_loggers()
         test_file_logging()
+        test_file_logging_flushes_when_idle()
         test_high_frequency_logging()
+        test_high_frequency_structured_logging()
+        test_high_frequency_binary_logging()
+        test_structured_formatter_output()
+        test_caller_info_setting()
         
         print("\n" + "=" * 60)
         print("✓ 所有测试通过！")
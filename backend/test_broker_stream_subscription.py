@@ -9,11 +9,50 @@
 4. 断开连接时正确清理订阅
 """
 
+import array
 import asyncio
+import functools
 import json
 import logging
-from datetime import datetime
-import websockets
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    _json_loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
+
+try:
+    import ormsgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# 帧解码失败时可能抛出的异常
+_DECODE_ERRORS = (_JSONDecodeError, ormsgpack.MsgpackDecodeError) if MSGPACK_AVAILABLE else (_JSONDecodeError,)
+
+
+def _decode_frame(frame):
+    """解码消息帧：二进制帧为 MessagePack，文本帧为 JSON"""
+    if isinstance(frame, bytes):
+        return ormsgpack.unpackb(frame)
+    return _json_loads(frame)
+
+
+@functools.cache
+def _websockets():
+    """按需导入 websockets（仅接收任务需要）"""
+    import websockets
+    return websockets
+
+
+@functools.cache
+def _aiohttp():
+    """按需导入 aiohttp（仅发布任务需要）"""
+    import aiohttp
+    return aiohttp
+
 
 # 配置日志
 logging.basicConfig(
@@ -24,106 +63,110 @@ logger = logging.getLogger(__name__)
 
 # 配置
 BACKEND_URL = "ws://localhost:8000/api/broker/stream"
+# 安装了 ormsgpack 时请求 MessagePack 二进制帧（更小、解码更快）
+STREAM_URL = f"{BACKEND_URL}?fmt=msgpack" if MSGPACK_AVAILABLE else BACKEND_URL
 TEST_DURATION = 30  # 测试持续时间（秒）
+MAX_MESSAGE_SIZE = 2 ** 22  # 单条消息最大 4MB（摄像头列表较大时）
+
+_BAR = "=" * 60
+
+# 统计的消息类型及其计数下标
+MESSAGE_TYPES = ("current_state", "direction_result", "angle_value", "ai_alert")
+_TYPE_IDX = {name: idx for idx, name in enumerate(MESSAGE_TYPES)}
+
+
+def _log_message_details(message, message_type, cameras):
+    """以 DEBUG 级别输出消息详情"""
+    logger.debug("消息ID: %s", message.get("message_id", "N/A"))
+    logger.debug("时间戳: %s", message.get("timestamp", "N/A"))
+    
+    # 显示数据内容
+    data = message.get("data", {})
+    if message_type == "current_state":
+        logger.debug("方向映射: %s", list(data.get("directions", {}).keys()))
+        logger.debug("角度范围数: %d", len(data.get("angle_ranges", [])))
+    elif message_type == "direction_result":
+        logger.debug("方向命令: %s", data.get("command"))
+        logger.debug("强度: %.2f", data.get("intensity", 0))
+        logger.debug("角度强度: %.2f", data.get("angular_intensity", 0))
+    elif message_type == "angle_value":
+        logger.debug("角度: %s°", data.get("angle"))
+    elif message_type == "ai_alert":
+        logger.debug("报警类型: %s", data.get("alert_type"))
+        logger.debug("严重程度: %s", data.get("severity"))
+    
+    # 显示摄像头列表
+    if cameras:
+        if isinstance(cameras[0], dict):
+            # 详细的摄像头信息
+            for i, cam in enumerate(cameras[:3], 1):  # 只显示前3个
+                logger.debug(
+                    "  摄像头 %d: %s (%s) - %s",
+                    i, cam.get("name"), cam.get("status"), cam.get("url")
+                )
+            if len(cameras) > 3:
+                logger.debug("  ... 还有 %d 个摄像头", len(cameras) - 3)
+        else:
+            # 简单的摄像头ID列表
+            logger.debug("  摄像头IDs: %s", cameras[:5])
+            if len(cameras) > 5:
+                logger.debug("  ... 还有 %d 个", len(cameras) - 5)
 
 
 async def test_websocket_subscription():
     """测试 WebSocket 订阅机制"""
     
-    logger.info("=" * 60)
+    logger.info(_BAR)
     logger.info("测试 WebSocket /stream 订阅机制")
-    logger.info("=" * 60)
+    logger.info(_BAR)
     
-    received_messages = {
-        "current_state": 0,
-        "direction_result": 0,
-        "angle_value": 0,
-        "ai_alert": 0
-    }
+    # 按 _TYPE_IDX 下标计数，total_received 为累计总数
+    received_counts = array.array('Q', [0] * len(MESSAGE_TYPES))
+    total_received = 0
     
     try:
         # 连接到 WebSocket
-        logger.info(f"连接到 {BACKEND_URL}...")
-        async with websockets.connect(BACKEND_URL) as websocket:
+        logger.info(f"连接到 {STREAM_URL}...")
+        # 关闭 permessage-deflate 压缩，避免每帧的 zlib 解压开销
+        async with _websockets().connect(
+            STREAM_URL,
+            compression=None,
+            max_size=MAX_MESSAGE_SIZE
+        ) as websocket:
             logger.info("✓ WebSocket 连接成功")
             
-            # 设置超时
-            start_time = asyncio.get_event_loop().time()
-            
-            while True:
-                # 检查是否超时
-                elapsed = asyncio.get_event_loop().time() - start_time
-                if elapsed > TEST_DURATION:
-                    logger.info(f"\n测试时间到 ({TEST_DURATION}秒)，结束测试")
-                    break
-                
-                try:
-                    # 接收消息（设置超时）
-                    message_str = await asyncio.wait_for(
-                        websocket.recv(),
-                        timeout=5.0
-                    )
-                    
-                    # 解析消息
-                    message = json.loads(message_str)
-                    message_type = message.get("type")
-                    
-                    # 统计消息
-                    if message_type in received_messages:
-                        received_messages[message_type] += 1
-                    
-                    # 显示消息详情
-                    logger.info(f"\n{'=' * 60}")
-                    logger.info(f"收到消息 #{sum(received_messages.values())}")
-                    logger.info(f"{'=' * 60}")
-                    logger.info(f"类型: {message_type}")
-                    logger.info(f"消息ID: {message.get('message_id', 'N/A')}")
-                    logger.info(f"时间戳: {message.get('timestamp', 'N/A')}")
-                    
-                    # 显示数据内容
-                    data = message.get("data", {})
-                    if message_type == "current_state":
-                        logger.info(f"方向映射: {list(data.get('directions', {}).keys())}")
-                        logger.info(f"角度范围数: {len(data.get('angle_ranges', []))}")
-                    elif message_type == "direction_result":
-                        logger.info(f"方向命令: {data.get('command')}")
-                        logger.info(f"强度: {data.get('intensity', 0):.2f}")
-                        logger.info(f"角度强度: {data.get('angular_intensity', 0):.2f}")
-                    elif message_type == "angle_value":
-                        logger.info(f"角度: {data.get('angle')}°")
-                    elif message_type == "ai_alert":
-                        logger.info(f"报警类型: {data.get('alert_type')}")
-                        logger.info(f"严重程度: {data.get('severity')}")
-                    
-                    # 显示摄像头列表
-                    cameras = message.get("cameras", [])
-                    logger.info(f"摄像头数量: {len(cameras)}")
-                    
-                    if cameras:
-                        if isinstance(cameras[0], dict):
-                            # 详细的摄像头信息
-                            for i, cam in enumerate(cameras[:3], 1):  # 只显示前3个
-                                logger.info(
-                                    f"  摄像头 {i}: {cam.get('name')} "
-                                    f"({cam.get('status')}) - {cam.get('url')}"
-                                )
-                            if len(cameras) > 3:
-                                logger.info(f"  ... 还有 {len(cameras) - 3} 个摄像头")
-                        else:
-                            # 简单的摄像头ID列表
-                            logger.info(f"  摄像头IDs: {cameras[:5]}")
-                            if len(cameras) > 5:
-                                logger.info(f"  ... 还有 {len(cameras) - 5} 个")
-                    
-                except asyncio.TimeoutError:
-                    # 超时是正常的，继续等待
-                    logger.debug("等待消息...")
-                    continue
-                except json.JSONDecodeError as e:
-                    logger.error(f"JSON 解析错误: {e}")
-                    continue
-    
-    except websockets.exceptions.WebSocketException as e:
+            # 在总时长内持续接收消息，超时后统一结束
+            try:
+                async with asyncio.timeout(TEST_DURATION):
+                    async for frame in websocket:
+                        # 解析消息
+                        try:
+                            message = _decode_frame(frame)
+                        except _DECODE_ERRORS as e:
+                            logger.error(f"消息解析错误: {e}")
+                            continue
+                        
+                        message_type = message.get("type")
+                        
+                        # 统计消息
+                        idx = _TYPE_IDX.get(message_type)
+                        if idx is not None:
+                            received_counts[idx] += 1
+                            total_received += 1
+                        
+                        # 每帧一行摘要，详情仅在 DEBUG 级别输出
+                        cameras = message.get("cameras", [])
+                        logger.info(
+                            "收到消息 #%d: 类型=%s, 摄像头数量=%d",
+                            total_received, message_type, len(cameras)
+                        )
+                        if logger.isEnabledFor(logging.DEBUG):
+                            _log_message_details(message, message_type, cameras)
+                        
+            except TimeoutError:
+                logger.info(f"\n测试时间到 ({TEST_DURATION}秒)，结束测试")
+    
+    except _websockets().exceptions.WebSocketException as e:
         logger.error(f"WebSocket 错误: {e}")
         return False
     except Exception as e:
@@ -132,23 +175,43 @@ async def test_websocket_subscription():
     
     finally:
         # 显示统计信息
-        logger.info(f"\n{'=' * 60}")
+        logger.info("\n%s", _BAR)
         logger.info("测试统计")
-        logger.info(f"{'=' * 60}")
-        logger.info(f"current_state 消息: {received_messages['current_state']}")
-        logger.info(f"direction_result 消息: {received_messages['direction_result']}")
-        logger.info(f"angle_value 消息: {received_messages['angle_value']}")
-        logger.info(f"ai_alert 消息: {received_messages['ai_alert']}")
-        logger.info(f"总消息数: {sum(received_messages.values())}")
-        logger.info(f"{'=' * 60}")
+        logger.info(_BAR)
+        for name, count in zip(MESSAGE_TYPES, received_counts):
+            logger.info(f"{name} 消息: {count}")
+        logger.info(f"总消息数: {total_received}")
+        logger.info(_BAR)
     
     return True
 
 
+PUBLISH_URL = "http://localhost:8000/api/broker/test/publish"
+PUBLISH_CONCURRENCY = 4  # 并发发布上限，避免压垮 broker
+
+
+async def _post_test_message(session, semaphore, msg_type, data):
+    """发布单条测试消息"""
+    async with semaphore:
+        try:
+            params = {"message_type": msg_type}
+            
+            async with session.post(PUBLISH_URL, params=params, json=data) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    logger.info(
+                        f"✓ 发布 {msg_type}: {data}, "
+                        f"通知 {result.get('subscribers_notified')} 个订阅者"
+                    )
+                else:
+                    logger.error(f"✗ 发布失败: {response.status}")
+                    
+        except Exception as e:
+            logger.error(f"发布消息错误: {e}")
+
+
 async def publish_test_messages():
-    """发布测试消息到 broker"""
-    import aiohttp
-    
+    """发布测试消息到 broker（复用连接池并发发送）"""
     logger.info("\n发布测试消息...")
     
     test_messages = [
@@ -160,27 +223,13 @@ async def publish_test_messages():
         ("angle_value", {"angle": 180.0}),
     ]
     
-    async with aiohttp.ClientSession() as session:
-        for msg_type, data in test_messages:
-            try:
-                url = f"http://localhost:8000/api/broker/test/publish"
-                params = {"message_type": msg_type}
-                
-                async with session.post(url, params=params, json=data) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        logger.info(
-                            f"✓ 发布 {msg_type}: {data}, "
-                            f"通知 {result.get('subscribers_notified')} 个订阅者"
-                        )
-                    else:
-                        logger.error(f"✗ 发布失败: {response.status}")
-                
-                # 等待一下再发送下一条
-                await asyncio.sleep(2)
-                
-            except Exception as e:
-                logger.error(f"发布消息错误: {e}")
+    semaphore = asyncio.Semaphore(PUBLISH_CONCURRENCY)
+    
+    async with _aiohttp().ClientSession() as session:
+        await asyncio.gather(*(
+            _post_test_message(session, semaphore, msg_type, data)
+            for msg_type, data in test_messages
+        ))
 
 
 async def main():
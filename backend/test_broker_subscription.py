@@ -8,6 +8,9 @@ This script tests:
 4. Thread-safe protection
 """
 
+import contextlib
+import io
+import queue
 import sys
 import threading
 import time
@@ -21,23 +24,36 @@ from broker.broker import MessageBroker
 from broker.handlers import DirectionMessageHandler, AngleMessageHandler
 from broker.models import MessageData
 
+# Number of publisher threads in the thread safety test
+PUBLISH_WORKERS = 4
 
-def reset_broker():
-    """Reset the broker singleton for testing"""
-    # Clear the singleton instance
-    MessageBroker._instance = None
+# Handlers are stateless; all tests share one instance of each
+_DIRECTION_HANDLER = DirectionMessageHandler()
+_ANGLE_HANDLER = AngleMessageHandler()
+
+
+def setup_module():
+    """Register the message types once for all tests"""
+    broker = MessageBroker.get_instance()
+    if not broker.is_type_registered("direction_result"):
+        broker.register_message_type("direction_result", _DIRECTION_HANDLER)
+    if not broker.is_type_registered("angle_value"):
+        broker.register_message_type("angle_value", _ANGLE_HANDLER)
+
+
+def get_clean_broker() -> MessageBroker:
+    """Return the shared broker with all subscribers cleared"""
+    broker = MessageBroker.get_instance()
+    broker.clear_subscribers()
+    return broker
 
 
 def test_basic_subscription():
     """Test basic subscription and notification"""
     print("\n=== Test 1: Basic Subscription ===")
     
-    reset_broker()
-    broker = MessageBroker.get_instance()
-    
-    # Register message types
-    broker.register_message_type("direction_result", DirectionMessageHandler())
-    broker.register_message_type("angle_value", AngleMessageHandler())
+    broker = get_clean_broker()
+    ts = datetime.now().isoformat()
     
     # Track received messages
     received_messages = []
@@ -54,7 +70,7 @@ def test_basic_subscription():
     result = broker.publish("direction_result", {
         "command": "forward",
         "intensity": 0.8,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": ts
     })
     
     print(f"  Publish result: success={result.success}, notified={result.subscribers_notified}")
@@ -71,9 +87,8 @@ def test_multiple_subscribers():
     """Test multiple subscribers receive the same message"""
     print("\n=== Test 2: Multiple Subscribers ===")
     
-    reset_broker()
-    broker = MessageBroker.get_instance()
-    broker.register_message_type("direction_result", DirectionMessageHandler())
+    broker = get_clean_broker()
+    ts = datetime.now().isoformat()
     
     # Track received messages for each subscriber
     received_1 = []
@@ -101,7 +116,7 @@ def test_multiple_subscribers():
     result = broker.publish("direction_result", {
         "command": "turn_left",
         "intensity": 0.5,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": ts
     })
     
     print(f"  Publish result: notified={result.subscribers_notified}")
@@ -122,9 +137,8 @@ def test_subscriber_error_isolation():
     """Test that one subscriber's error doesn't affect others"""
     print("\n=== Test 3: Subscriber Error Isolation ===")
     
-    reset_broker()
-    broker = MessageBroker.get_instance()
-    broker.register_message_type("angle_value", AngleMessageHandler())
+    broker = get_clean_broker()
+    ts = datetime.now().isoformat()
     
     received_good_1 = []
     received_good_2 = []
@@ -151,7 +165,7 @@ def test_subscriber_error_isolation():
     # Publish a message
     result = broker.publish("angle_value", {
         "angle": 45.0,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": ts
     })
     
     print(f"  Publish result: notified={result.subscribers_notified}")
@@ -169,10 +183,8 @@ def test_message_type_isolation():
     """Test that subscribers only receive messages of their subscribed type"""
     print("\n=== Test 4: Message Type Isolation ===")
     
-    reset_broker()
-    broker = MessageBroker.get_instance()
-    broker.register_message_type("direction_result", DirectionMessageHandler())
-    broker.register_message_type("angle_value", AngleMessageHandler())
+    broker = get_clean_broker()
+    ts = datetime.now().isoformat()
     
     direction_messages = []
     angle_messages = []
@@ -193,13 +205,13 @@ def test_message_type_isolation():
     broker.publish("direction_result", {
         "command": "backward",
         "intensity": 0.6,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": ts
     })
     
     # Publish angle message
     broker.publish("angle_value", {
         "angle": 90.0,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": ts
     })
     
     print(f"  Direction messages received: {len(direction_messages)}")
@@ -217,9 +229,8 @@ def test_thread_safety():
     """Test thread-safe publishing and subscription"""
     print("\n=== Test 5: Thread Safety ===")
     
-    reset_broker()
-    broker = MessageBroker.get_instance()
-    broker.register_message_type("direction_result", DirectionMessageHandler())
+    broker = get_clean_broker()
+    ts = datetime.now().isoformat()
     
     received_messages = []
     lock = threading.Lock()
@@ -231,25 +242,41 @@ def test_thread_safety():
     # Subscribe
     broker.subscribe("direction_result", thread_safe_callback)
     
-    print(f"  Starting 10 threads to publish messages concurrently")
+    print(f"  Starting {PUBLISH_WORKERS} worker threads to publish 10 messages concurrently")
     
-    # Publish from multiple threads
-    threads = []
-    for i in range(10):
-        def publish_message(index):
-            broker.publish("direction_result", {
-                "command": "forward",
-                "intensity": 0.5 + (index * 0.01),
-                "timestamp": datetime.now().isoformat()
-            })
-        
-        thread = threading.Thread(target=publish_message, args=(i,))
-        threads.append(thread)
-        thread.start()
+    # Fixed worker pool draining a shared queue; None stops a worker
+    work_queue = queue.Queue()
+    
+    def publish_worker():
+        while True:
+            item = work_queue.get()
+            try:
+                if item is None:
+                    return
+                broker.publish("direction_result", item)
+            finally:
+                work_queue.task_done()
+    
+    workers = [
+        threading.Thread(target=publish_worker)
+        for _ in range(PUBLISH_WORKERS)
+    ]
+    for worker in workers:
+        worker.start()
     
-    # Wait for all threads
-    for thread in threads:
-        thread.join()
+    for i in range(10):
+        work_queue.put({
+            "command": "forward",
+            "intensity": 0.5 + (i * 0.01),
+            "timestamp": ts
+        })
+    
+    # Wait for all messages, then stop the workers
+    work_queue.join()
+    for _ in workers:
+        work_queue.put(None)
+    for worker in workers:
+        worker.join()
     
     print(f"  All threads completed")
     print(f"  Messages received: {len(received_messages)}")
@@ -263,9 +290,8 @@ def test_unsubscribe():
     """Test unsubscribe functionality"""
     print("\n=== Test 6: Unsubscribe ===")
     
-    reset_broker()
-    broker = MessageBroker.get_instance()
-    broker.register_message_type("direction_result", DirectionMessageHandler())
+    broker = get_clean_broker()
+    ts = datetime.now().isoformat()
     
     received_messages = []
     
@@ -280,7 +306,7 @@ def test_unsubscribe():
     broker.publish("direction_result", {
         "command": "forward",
         "intensity": 0.7,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": ts
     })
     
     print(f"  Messages received after first publish: {len(received_messages)}")
@@ -295,7 +321,7 @@ def test_unsubscribe():
     broker.publish("direction_result", {
         "command": "backward",
         "intensity": 0.8,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": ts
     })
     
     print(f"  Messages received after second publish: {len(received_messages)}")
@@ -304,6 +330,17 @@ def test_unsubscribe():
     print("  ✓ Test passed! Unsubscribe works correctly")
 
 
+def run_buffered(test):
+    """Run one test with its output buffered, writing it out once at the end"""
+    buffer = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buffer):
+            test()
+    finally:
+        sys.stdout.write(buffer.getvalue())
+        sys.stdout.flush()
+
+
 def main():
     """Run all tests"""
     print("=" * 60)
@@ -311,12 +348,16 @@ def main():
     print("=" * 60)
     
     try:
-        test_basic_subscription()
-        test_multiple_subscribers()
-        test_subscriber_error_isolation()
-        test_message_type_isolation()
-        test_thread_safety()
-        test_unsubscribe()
+        setup_module()
+        for test in (
+            test_basic_subscription,
+            test_multiple_subscribers,
+            test_subscriber_error_isolation,
+            test_message_type_isolation,
+            test_thread_safety,
+            test_unsubscribe,
+        ):
+            run_buffered(test)
         
         print("\n" + "=" * 60)
         print("✓ All tests passed!")
@@ -10,11 +10,16 @@
 """
 
 import asyncio
+import collections
 import json
 import logging
 from datetime import datetime
 from unittest.mock import MagicMock, AsyncMock
 
+# 每个模拟客户端保留的最近消息数
+MAX_MOCK_MESSAGES = 1024
+
+
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,6 +28,7 @@ try:
     from src.broker.broker import MessageBroker
     from src.broker.models import MessageData
     from src.api.broker import broker_stream, connection_manager, _initialize_broker
+    from fastapi import WebSocketDisconnect
 except ImportError as e:
     logger.error(f"Import error: {e}")
     logger.error("Make sure you're running from the backend directory")
@@ -35,27 +41,34 @@ class MockWebSocket:
     def __init__(self, name: str):
         self.name = name
         self.client = ('127.0.0.1', 12345)
+        self.query_params = {}
         self.accepted = False
-        self.messages = []
+        self.messages = collections.deque(maxlen=MAX_MOCK_MESSAGES)
         self.closed = False
+        self._disconnect = asyncio.Event()
         
     async def accept(self):
         self.accepted = True
-        logger.info(f"✓ {self.name}: WebSocket accepted")
+        logger.info("✓ %s: WebSocket accepted", self.name)
         
     async def send_json(self, data):
         if not self.closed:
             self.messages.append(data)
-            logger.info(f"✓ {self.name}: Received message type '{data.get('type')}'")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("✓ %s: Received message type '%s'", self.name, data.get('type'))
         
     async def receive_text(self):
-        # 模拟客户端保持连接一段时间后断开
-        await asyncio.sleep(0.5)
-        raise Exception("Client disconnected")
+        # 保持连接直到测试调用 disconnect()
+        await self._disconnect.wait()
+        raise WebSocketDisconnect()
+    
+    def disconnect(self):
+        """模拟客户端断开连接"""
+        self._disconnect.set()
     
     async def close(self, code=None, reason=None):
         self.closed = True
-        logger.info(f"✓ {self.name}: WebSocket closed")
+        logger.info("✓ %s: WebSocket closed", self.name)
 
 
 async def test_websocket_basic_functionality():
@@ -65,9 +78,13 @@ async def test_websocket_basic_functionality():
     # 创建模拟 WebSocket
     mock_ws = MockWebSocket("Client1")
     
+    # 在后台运行 WebSocket 处理器，让出一次调度后断开客户端
+    stream_task = asyncio.create_task(broker_stream(mock_ws))
+    await asyncio.sleep(0.01)
+    mock_ws.disconnect()
+    
     try:
-        # 测试 WebSocket 处理器
-        await broker_stream(mock_ws)
+        await stream_task
     except Exception as e:
         # 预期会因为客户端断开而出现异常
         logger.info(f"✓ WebSocket handler completed (expected: {type(e).__name__})")
@@ -95,28 +112,36 @@ async def test_message_broadcasting():
     # 创建多个模拟 WebSocket 客户端
     clients = [MockWebSocket(f"Client{i}") for i in range(3)]
     
-    # 模拟连接到连接管理器
-    for client in clients:
-        await connection_manager.connect(client)
+    # 模拟连接到连接管理器（并发连接所有客户端）
+    await asyncio.gather(*(connection_manager.connect(client) for client in clients))
     
     logger.info(f"✓ Connected {len(clients)} WebSocket clients")
     
-    # 发布一条方向消息
+    # 广播期间只输出警告及以上日志，避免每条消息的日志开销
+    root_logger = logging.getLogger()
+    previous_level = root_logger.level
+    root_logger.setLevel(logging.WARNING)
+    
     try:
-        result = broker.publish("direction_result", {
-            "command": "forward",
-            "intensity": 0.8,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        logger.info(f"✓ Published direction message: {result.success}")
-        logger.info(f"✓ Subscribers notified: {result.subscribers_notified}")
+        # 发布一条方向消息
+        try:
+            result = broker.publish("direction_result", {
+                "command": "forward",
+                "intensity": 0.8,
+                "timestamp": datetime.now().isoformat()
+            })
+            
+            logger.info(f"✓ Published direction message: {result.success}")
+            logger.info(f"✓ Subscribers notified: {result.subscribers_notified}")
+            
+        except Exception as e:
+            logger.error(f"✗ Failed to publish message: {e}")
         
-    except Exception as e:
-        logger.error(f"✗ Failed to publish message: {e}")
-    
-    # 等待广播处理
-    await asyncio.sleep(0.2)
+        # 让出控制权给广播任务
+        await asyncio.sleep(0)
+    finally:
+        # 测试失败或被取消时也恢复日志级别
+        root_logger.setLevel(previous_level)
     
     # 验证所有客户端都收到了广播消息
     broadcast_received = 0
@@ -131,8 +156,7 @@ async def test_message_broadcasting():
     logger.info(f"✓ Broadcast messages received: {broadcast_received}/{len(clients)}")
     
     # 清理连接
-    for client in clients:
-        await connection_manager.disconnect(client)
+    await asyncio.gather(*(connection_manager.disconnect(client) for client in clients))
 
 
 async def test_angle_message_broadcasting():
@@ -157,8 +181,8 @@ async def test_angle_message_broadcasting():
     except Exception as e:
         logger.error(f"✗ Failed to publish angle message: {e}")
     
-    # 等待广播处理
-    await asyncio.sleep(0.2)
+    # 让出控制权给广播任务
+    await asyncio.sleep(0)
     
     # 验证客户端收到了角度消息
     angle_received = False
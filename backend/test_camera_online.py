@@ -3,10 +3,22 @@
 import sys
 import requests
 import json
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from http_test_utils import create_session
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 BASE_URL = "http://localhost:8000"
 
+# Shared session so all requests reuse keep-alive connections
+SESSION = create_session(pool_maxsize=8)
+
 
 def print_section(title: str):
     """Print a section header."""
@@ -15,36 +27,66 @@ def print_section(title: str):
     print(f"{'='*60}\n")
 
 
-def check_single_camera(camera_id: str) -> Optional[dict]:
-    """Check status of a single camera."""
-    print(f"检查摄像头: {camera_id}")
+def fetch_camera_status(camera_id: str) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    Request the status check of a single camera.
     
+    Returns:
+        (status data, None) on success, or (None, error description) on failure
+    """
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/api/cameras/{camera_id}/check-status",
             timeout=30
         )
-        
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✓ 摄像头名称: {data['camera_name']}")
-            print(f"  URL: {data['url']}")
-            print(f"  之前状态: {data['previous_status']}")
-            print(f"  当前状态: {data['current_status']}")
-            print(f"  在线: {'是' if data['is_online'] else '否'}")
-            print(f"  状态改变: {'是' if data['status_changed'] else '否'}")
-            return data
-        else:
-            print(f"✗ 错误 {response.status_code}: {response.text}")
-            return None
-            
     except requests.exceptions.ConnectionError:
-        print("✗ 无法连接到后端服务器")
-        print(f"  请确保后端服务正在运行: {BASE_URL}")
-        return None
+        return None, f"无法连接到后端服务器: {BASE_URL}"
     except Exception as e:
-        print(f"✗ 错误: {e}")
+        return None, f"{type(e).__name__}: {e}"
+    
+    if response.status_code != 200:
+        return None, f"错误 {response.status_code}: {response.text}"
+    
+    try:
+        return _loads(response.content), None
+    except ValueError as e:
+        return None, f"无效的响应: {e}"
+
+
+def check_single_camera(camera_id: str) -> Optional[dict]:
+    """Check status of a single camera."""
+    print(f"检查摄像头: {camera_id}")
+    
+    data, error = fetch_camera_status(camera_id)
+    if data is None:
+        print(f"✗ {error}")
         return None
+    
+    print(f"✓ 摄像头名称: {data['camera_name']}")
+    print(f"  URL: {data['url']}")
+    print(f"  之前状态: {data['previous_status']}")
+    print(f"  当前状态: {data['current_status']}")
+    print(f"  在线: {'是' if data['is_online'] else '否'}")
+    print(f"  状态改变: {'是' if data['status_changed'] else '否'}")
+    return data
+
+
+def check_cameras_parallel(camera_ids: List[str], workers: int = 8) -> List[Optional[dict]]:
+    """Check the status of several cameras concurrently."""
+    print(f"并行检查 {len(camera_ids)} 个摄像头 (workers={workers})...")
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(fetch_camera_status, camera_ids))
+    
+    # Print in input order after all checks have finished
+    for camera_id, (data, error) in zip(camera_ids, outcomes):
+        if data is None:
+            print(f"✗ {camera_id:20s} | 检查失败: {error}")
+        else:
+            status_icon = "✓" if data['is_online'] else "✗"
+            print(f"{status_icon} {camera_id:20s} | {data['current_status']}")
+    
+    return [data for data, _ in outcomes]
 
 
 def check_all_cameras() -> Optional[dict]:
@@ -52,13 +94,13 @@ def check_all_cameras() -> Optional[dict]:
     print("检查所有摄像头...")
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/api/cameras/check-all-status",
             timeout=60
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = _loads(response.content)
             print(f"\n摄像头总数: {data['total_cameras']}")
             print(f"在线数量: {data['online_count']}")
             print(f"离线数量: {data['offline_count']}")
@@ -101,9 +143,9 @@ def check_all_cameras() -> Optional[dict]:
 def get_all_cameras() -> Optional[list]:
     """Get list of all cameras."""
     try:
-        response = requests.get(f"{BASE_URL}/api/cameras", timeout=10)
+        response = SESSION.get(f"{BASE_URL}/api/cameras", timeout=10)
         if response.status_code == 200:
-            return response.json()
+            return _loads(response.content)
         return None
     except Exception:
         return None
@@ -111,12 +153,15 @@ def get_all_cameras() -> Optional[list]:
 
 def main():
     """Main test function."""
+    # --parallel: also check every camera individually (test 3)
+    parallel = '--parallel' in sys.argv[1:]
+    
     print_section("摄像头在线检查测试")
     
     # Check if backend is running
     print("检查后端服务...")
     try:
-        response = requests.get(f"{BASE_URL}/api/cameras", timeout=5)
+        response = SESSION.get(f"{BASE_URL}/api/cameras", timeout=5)
         print(f"✓ 后端服务运行正常 ({BASE_URL})")
     except requests.exceptions.ConnectionError:
         print(f"✗ 无法连接到后端服务器: {BASE_URL}")
@@ -146,6 +191,12 @@ def main():
         print_section("测试 2: 检查单个摄像头状态")
         first_camera_id = cameras[0]['id']
         check_single_camera(first_camera_id)
+        
+        # Test 3: Check every camera individually in parallel.
+        # Each check updates the camera's stored status, so only run on request.
+        if parallel:
+            print_section("测试 3: 并行检查各摄像头状态")
+            check_cameras_parallel([camera['id'] for camera in cameras])
     
     print_section("测试完成")
     print("所有测试已完成！\n")
@@ -8,42 +8,78 @@ from pathlib import Path
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
+import database
 from database import init_db, get_db, DATABASE_PATH, engine
-from sqlalchemy import inspect
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+
+def _use_engine(new_engine):
+    """Point the database module at another engine and return the previous one."""
+    previous = database.engine
+    database.engine = new_engine
+    database.SessionLocal.configure(bind=new_engine)
+    return previous
 
 
 def test_database_initialization():
-    """Test that database can be initialized."""
+    """Test that database can be initialized (in-memory, no file IO)."""
     print("Testing database initialization...")
     
-    # Initialize database
+    # A single shared connection keeps the in-memory database alive
+    memory_engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    previous_engine = _use_engine(memory_engine)
+    
+    try:
+        # Initialize database
+        init_db()
+        print("✓ Database initialized (in-memory)")
+        
+        # Check tables were created
+        with memory_engine.connect() as conn:
+            tables = memory_engine.dialect.get_table_names(conn)
+        assert tables, "Tables should be created"
+        print(f"✓ Tables created: {tables}")
+        
+        # Check we can get a database session
+        db_gen = get_db()
+        db = next(db_gen)
+        assert db is not None, "Should be able to get database session"
+        db.close()
+        print("✓ Database session works")
+    finally:
+        _use_engine(previous_engine)
+        memory_engine.dispose()
+
+
+def test_database_file_persistence():
+    """Test that the on-disk database file is created."""
+    print("Testing on-disk database...")
+    
     init_db()
-    print("✓ Database initialized")
     
     # Check database file exists
     assert DATABASE_PATH.exists(), "Database file should exist"
     print(f"✓ Database file exists at: {DATABASE_PATH}")
     
-    # Check we can get a database session
-    db_gen = get_db()
-    db = next(db_gen)
-    assert db is not None, "Should be able to get database session"
-    db.close()
-    print("✓ Database session works")
-    
-    # Check inspector works
-    inspector = inspect(engine)
-    tables = inspector.get_table_names()
+    # Check table listing works
+    with engine.connect() as conn:
+        tables = engine.dialect.get_table_names(conn)
     print(f"✓ Database inspector works (tables: {tables})")
-    
-    print("\n" + "=" * 60)
-    print("All database setup tests passed!")
-    print("=" * 60)
 
 
 if __name__ == "__main__":
     try:
         test_database_initialization()
+        test_database_file_persistence()
+        
+        print("\n" + "=" * 60)
+        print("All database setup tests passed!")
+        print("=" * 60)
     except Exception as e:
         print(f"\n✗ Test failed: {e}")
         sys.exit(1)
@@ -13,15 +13,20 @@ import pytest
 from typing import Dict, Any
 from datetime import datetime
 
-from src.broker.broker import MessageBroker
 from src.broker.handlers import MessageTypeHandler
 from src.broker.models import ValidationResult, ProcessedMessage, MessageData
 from src.broker.errors import MessageTypeError
 
 
+# 总是通过的验证结果，broker 只读取不修改，可共享
+_ALWAYS_VALID = ValidationResult(valid=True, errors=[], warnings=[])
+
+
 class CustomMessageHandler(MessageTypeHandler):
     """自定义消息处理器用于测试"""
     
+    __slots__ = ()
+    
     def validate(self, data: Dict[str, Any]) -> ValidationResult:
         """自定义验证规则"""
         errors = []
@@ -61,8 +66,10 @@ class CustomMessageHandler(MessageTypeHandler):
 class AnotherCustomHandler(MessageTypeHandler):
     """另一个自定义处理器"""
     
+    __slots__ = ()
+    
     def validate(self, data: Dict[str, Any]) -> ValidationResult:
-        return ValidationResult(valid=True, errors=[], warnings=[])
+        return _ALWAYS_VALID
     
     def process(self, data: Dict[str, Any]) -> ProcessedMessage:
         message = MessageData(
@@ -82,9 +89,9 @@ class AnotherCustomHandler(MessageTypeHandler):
         return "another_custom_type"
 
 
-def test_register_new_message_type():
+def test_register_new_message_type(broker_instance):
     """测试注册新消息类型 (Requirement 6.1)"""
-    broker = MessageBroker.get_instance()
+    broker = broker_instance
     handler = CustomMessageHandler()
     
     # 注册新类型
@@ -215,9 +222,9 @@ def test_backward_compatibility(broker_instance):
     assert len(messages_received) == 2
 
 
-def test_prevent_duplicate_registration():
+def test_prevent_duplicate_registration(broker_instance):
     """测试防止重复注册（不使用 allow_override）"""
-    broker = MessageBroker.get_instance()
+    broker = broker_instance
     handler = CustomMessageHandler()
     
     # 首次注册
@@ -314,19 +321,5 @@ def test_multiple_types_isolation(broker_instance):
     assert type_b_messages[0].type == "type_b"
 
 
-# Fixtures
-
-@pytest.fixture
-def broker_instance():
-    """创建一个新的 broker 实例用于测试"""
-    # 重置单例以获得干净的实例
-    MessageBroker._instance = None
-    broker = MessageBroker.get_instance()
-    yield broker
-    # 清理
-    broker.shutdown()
-    MessageBroker._instance = None
-
-
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
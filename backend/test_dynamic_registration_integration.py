@@ -6,29 +6,34 @@ with the entire broker system including existing message types.
 """
 
 import pytest
+import threading
+from collections import Counter
 from typing import Dict, Any
 from datetime import datetime
 
-from src.broker.broker import MessageBroker
 from src.broker.handlers import (
     MessageTypeHandler,
     DirectionMessageHandler,
     AngleMessageHandler,
-    AIAlertMessageHandler
+    AIAlertMessageHandler,
+    build_validator
 )
 from src.broker.models import ValidationResult, ProcessedMessage, MessageData
 
 
+# Shared pass result for accept-all handlers; the broker only reads it
+_ALWAYS_VALID = ValidationResult(valid=True, errors=[], warnings=[])
+
+
 class WeatherMessageHandler(MessageTypeHandler):
     """Weather sensor message handler for testing"""
     
-    def validate(self, data: Dict[str, Any]) -> ValidationResult:
-        errors = []
-        if 'temperature' not in data:
-            errors.append("Missing temperature")
-        if 'humidity' not in data:
-            errors.append("Missing humidity")
-        return ValidationResult(valid=len(errors) == 0, errors=errors, warnings=[])
+    __slots__ = ()
+    
+    validate = staticmethod(build_validator({
+        'temperature': {'required': True, 'missing_error': "Missing temperature"},
+        'humidity': {'required': True, 'missing_error': "Missing humidity"},
+    }))
     
     def process(self, data: Dict[str, Any]) -> ProcessedMessage:
         message = MessageData(
@@ -48,11 +53,39 @@ class WeatherMessageHandler(MessageTypeHandler):
         return "weather_sensor"
 
 
-def test_integration_with_existing_types():
+class DynamicHandler(MessageTypeHandler):
+    """Accept-all handler for a numbered dynamic message type"""
+    
+    __slots__ = ('type_id',)
+    
+    def __init__(self, type_id: int):
+        self.type_id = type_id
+    
+    def validate(self, data: Dict[str, Any]) -> ValidationResult:
+        return _ALWAYS_VALID
+    
+    def process(self, data: Dict[str, Any]) -> ProcessedMessage:
+        message = MessageData(
+            type=self.get_type_name(),
+            data=data,
+            timestamp=datetime.now()
+        )
+        return ProcessedMessage(
+            original=message,
+            validated=True,
+            cameras=[],
+            processing_time=0.0,
+            errors=[]
+        )
+    
+    def get_type_name(self) -> str:
+        return f"dynamic_type_{self.type_id}"
+
+
+def test_integration_with_existing_types(broker_instance):
     """Test that dynamic registration works alongside existing types"""
-    # Reset broker
-    MessageBroker._instance = None
-    broker = MessageBroker.get_instance()
+    broker = broker_instance
+    now_iso = datetime.now().isoformat()
     
     # Register existing types
     broker.register_message_type("direction_result", DirectionMessageHandler())
@@ -80,11 +113,11 @@ def test_integration_with_existing_types():
     # Publish to existing types
     broker.publish("direction_result", {
         "command": "forward",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso
     })
     broker.publish("angle_value", {
         "angle": 45.0,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso
     })
     
     assert len(direction_messages) == 1
@@ -98,11 +131,11 @@ def test_integration_with_existing_types():
     # Publish to all types
     broker.publish("direction_result", {
         "command": "backward",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso
     })
     broker.publish("angle_value", {
         "angle": 90.0,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso
     })
     broker.publish("weather_sensor", {
         "temperature": 22.5,
@@ -118,16 +151,11 @@ def test_integration_with_existing_types():
     assert direction_messages[0].type == "direction_result"
     assert angle_messages[0].type == "angle_value"
     assert weather_messages[0].type == "weather_sensor"
-    
-    # Cleanup
-    broker.shutdown()
-    MessageBroker._instance = None
 
 
-def test_runtime_handler_replacement():
+def test_runtime_handler_replacement(broker_instance):
     """Test replacing a handler at runtime"""
-    MessageBroker._instance = None
-    broker = MessageBroker.get_instance()
+    broker = broker_instance
     
     # Register initial handler
     handler1 = WeatherMessageHandler()
@@ -147,9 +175,11 @@ def test_runtime_handler_replacement():
     
     # Replace handler
     class NewWeatherHandler(MessageTypeHandler):
+        __slots__ = ()
+        
         def validate(self, data):
             # More lenient validation
-            return ValidationResult(valid=True, errors=[], warnings=[])
+            return _ALWAYS_VALID
         
         def process(self, data):
             message = MessageData(
@@ -177,52 +207,21 @@ def test_runtime_handler_replacement():
     })
     assert result2.success
     assert len(messages) == 2
-    
-    # Cleanup
-    broker.shutdown()
-    MessageBroker._instance = None
 
 
-def test_multiple_dynamic_registrations():
+def test_multiple_dynamic_registrations(broker_instance):
     """Test registering multiple types dynamically"""
-    MessageBroker._instance = None
-    broker = MessageBroker.get_instance()
+    broker = broker_instance
     
     # Create multiple handlers
     handlers = {}
     for i in range(5):
-        class DynamicHandler(MessageTypeHandler):
-            def __init__(self, type_id):
-                self.type_id = type_id
-            
-            def validate(self, data):
-                return ValidationResult(valid=True, errors=[], warnings=[])
-            
-            def process(self, data):
-                message = MessageData(
-                    type=self.get_type_name(),
-                    data=data,
-                    timestamp=datetime.now()
-                )
-                return ProcessedMessage(
-                    original=message,
-                    validated=True,
-                    cameras=[],
-                    processing_time=0.0,
-                    errors=[]
-                )
-            
-            def get_type_name(self):
-                return f"dynamic_type_{self.type_id}"
-        
         handler = DynamicHandler(i)
         handlers[f"dynamic_type_{i}"] = handler
         broker.register_message_type(f"dynamic_type_{i}", handler)
     
     # Verify all registered
-    registered = broker.get_registered_types()
-    for i in range(5):
-        assert f"dynamic_type_{i}" in registered
+    assert all(broker.is_type_registered(f"dynamic_type_{i}") for i in range(5))
     
     # Subscribe and publish to each
     message_counts = {f"dynamic_type_{i}": [] for i in range(5)}
@@ -241,15 +240,19 @@ def test_multiple_dynamic_registrations():
     for i in range(5):
         assert len(message_counts[f"dynamic_type_{i}"]) == 1
     
-    # Cleanup
-    broker.shutdown()
-    MessageBroker._instance = None
+    # Publish several messages of one type in a single batch
+    results = broker.publish_batch(
+        "dynamic_type_0",
+        [{"data": f"batch_{n}"} for n in range(3)]
+    )
+    assert all(result.success for result in results)
+    assert len(message_counts["dynamic_type_0"]) == 4
+    assert len(message_counts["dynamic_type_1"]) == 1
 
 
-def test_error_handling_with_dynamic_types():
+def test_error_handling_with_dynamic_types(broker_instance):
     """Test error handling works correctly with dynamically registered types"""
-    MessageBroker._instance = None
-    broker = MessageBroker.get_instance()
+    broker = broker_instance
     
     # Register type with strict validation
     broker.register_message_type("strict_type", WeatherMessageHandler())
@@ -265,15 +268,18 @@ def test_error_handling_with_dynamic_types():
     assert "humidity" in result.errors[0].lower()
     
     # Test subscriber error isolation
-    error_count = [0]
-    success_count = [0]
+    # Lock-guarded counts stay exact if subscribers are dispatched concurrently
+    counts = Counter()
+    counts_lock = threading.Lock()
     
     def failing_callback(msg):
-        error_count[0] += 1
+        with counts_lock:
+            counts["errors"] += 1
         raise Exception("Subscriber error")
     
     def working_callback(msg):
-        success_count[0] += 1
+        with counts_lock:
+            counts["successes"] += 1
     
     broker.subscribe("strict_type", failing_callback)
     broker.subscribe("strict_type", working_callback)
@@ -286,12 +292,8 @@ def test_error_handling_with_dynamic_types():
     
     # Should succeed despite one subscriber failing
     assert result.success
-    assert error_count[0] == 1
-    assert success_count[0] == 1
-    
-    # Cleanup
-    broker.shutdown()
-    MessageBroker._instance = None
+    assert counts["errors"] == 1
+    assert counts["successes"] == 1
 
 
 if __name__ == "__main__":
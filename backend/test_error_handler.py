@@ -5,8 +5,14 @@ Test script for ErrorHandler implementation
 1. 验证错误处理
 2. 数据库错误处理（重试机制）
 3. 订阅者错误处理
+
+各测试互不依赖（每个测试自行注册所需的消息类型），可以直接运行本脚本，
+也可以用 pytest-xdist 并行运行，使重试退避的等待与其他测试重叠：
+    pytest -n auto test_error_handler.py
+xdist 的每个 worker 是独立进程，各自拥有自己的 MessageBroker 单例。
 """
 
+import itertools
 import sys
 import time
 from datetime import datetime
@@ -22,16 +28,36 @@ from broker import (
 )
 from broker.models import MessageData, ValidationResult
 
+# 测试所需的消息类型及其处理器
+_REQUIRED_TYPES = (
+    ("direction_result", DirectionMessageHandler),
+    ("angle_value", AngleMessageHandler),
+)
+
+
+def _ensure_types() -> MessageBroker:
+    """
+    获取 broker 并注册尚未注册的消息类型
+    
+    只在类型缺失时注册，已注册的处理器不会被 allow_override 反复替换。
+    每个测试开始时调用一次：其他测试文件可能重置 broker 单例，
+    所以不能只在模块导入时注册。
+    
+    Returns:
+        MessageBroker: broker 单例
+    """
+    broker = MessageBroker.get_instance()
+    for message_type, handler_cls in _REQUIRED_TYPES:
+        if not broker.is_type_registered(message_type):
+            broker.register_message_type(message_type, handler_cls())
+    return broker
+
 
 def test_validation_error_handling():
     """测试验证错误处理"""
     print("\n=== Test 1: Validation Error Handling ===")
     
-    broker = MessageBroker.get_instance()
-    
-    # 注册消息类型（使用 allow_override 以防已注册）
-    broker.register_message_type("direction_result", DirectionMessageHandler(), allow_override=True)
-    broker.register_message_type("angle_value", AngleMessageHandler(), allow_override=True)
+    broker = _ensure_types()
     
     # 测试无效的方向消息（缺少 command 字段）
     print("\n1. Testing invalid direction message (missing command)...")
@@ -73,15 +99,15 @@ def test_database_error_handling():
     
     error_handler = ErrorHandler()
     
-    # 模拟数据库操作失败然后成功
-    attempt_count = [0]
+    # 模拟数据库操作失败然后成功（next() 在 C 层原子递增，并发调用也不会丢计数）
+    attempts = itertools.count(1)
     
     def flaky_operation():
         """模拟不稳定的数据库操作"""
-        attempt_count[0] += 1
-        if attempt_count[0] < 2:
-            raise Exception(f"Database connection failed (attempt {attempt_count[0]})")
-        return {"data": "success", "attempt": attempt_count[0]}
+        attempt = next(attempts)
+        if attempt < 2:
+            raise Exception(f"Database connection failed (attempt {attempt})")
+        return {"data": "success", "attempt": attempt}
     
     print("\n1. Testing retry mechanism with flaky operation...")
     result = error_handler.handle_database_error(
@@ -89,13 +115,13 @@ def test_database_error_handling():
         operation_name="test_flaky_query",
         error=Exception("Initial failure"),
         max_retries=3,
-        initial_delay=0.05  # 短延迟用于测试
+        initial_delay=0.001  # 短延迟用于测试（可配合 BROKER_SPIN_BACKOFF=true）
     )
     
     assert result is not None, "Should succeed after retry"
     assert result["data"] == "success", "Should return correct data"
-    assert attempt_count[0] == 2, "Should succeed on second attempt"
-    print(f"✓ Operation succeeded after {attempt_count[0]} attempts: {result}")
+    assert result["attempt"] == 2, "Should succeed on second attempt"
+    print(f"✓ Operation succeeded after {result['attempt']} attempts: {result}")
     
     # 测试所有重试都失败的情况
     print("\n2. Testing all retries fail (should return cached/None)...")
@@ -109,7 +135,7 @@ def test_database_error_handling():
         operation_name="test_permanent_failure",
         error=Exception("Initial failure"),
         max_retries=2,
-        initial_delay=0.05
+        initial_delay=0.001
     )
     
     assert result is None, "Should return None when all retries fail"
@@ -138,12 +164,32 @@ def test_database_error_handling():
         operation_name="test_cache",
         error=Exception("Failure"),
         max_retries=1,
-        initial_delay=0.05
+        initial_delay=0.001
     )
     
     assert result == {"cached": "data"}, "Should return cached data"
     print(f"✓ Returned cached data after failure: {result}")
     
+    # 缓存在 ttl 内有效时，不再调用操作
+    call_count = 0
+    
+    def counted_fail():
+        nonlocal call_count
+        call_count += 1
+        raise Exception("Should not be called")
+    
+    result = error_handler.handle_database_error(
+        operation=counted_fail,
+        operation_name="test_cache",
+        error=Exception("Failure"),
+        max_retries=1,
+        ttl_seconds=60.0
+    )
+    
+    assert result == {"cached": "data"}, "Should return fresh cached data"
+    assert call_count == 0, "Should skip retries while cache is fresh"
+    print("✓ Returned fresh cached data without retrying")
+    
     print("\n✓ Database error handling test passed!")
 
 
@@ -151,11 +197,8 @@ def test_subscriber_error_handling():
     """测试订阅者错误处理（错误隔离）"""
     print("\n=== Test 3: Subscriber Error Handling (Isolation) ===")
     
-    broker = MessageBroker.get_instance()
-    
-    # 确保消息类型已注册
-    if "direction_result" not in broker.get_registered_types():
-        broker.register_message_type("direction_result", DirectionMessageHandler())
+    # 确保消息类型已注册（不依赖其他测试的执行顺序）
+    broker = _ensure_types()
     
     # 记录回调执行情况
     callback_results = []
@@ -249,7 +292,7 @@ def test_error_handler_direct():
     
     # 测试缓存清理
     print("\n3. Testing cache clear...")
-    error_handler._cache["test_key"] = "test_value"
+    error_handler._cache["test_key"] = (0.0, "test_value")
     assert "test_key" in error_handler._cache
     error_handler.clear_cache()
     assert len(error_handler._cache) == 0
@@ -15,6 +15,19 @@ import sys
 import platform
 
 
+# 数据行输出模板（格式只解析一次；缺失的一组数值输出对应宽度的 N/A）
+ACC_FMT = "{:8.3f} | {:8.3f} | {:8.3f}".format
+ACC_NA = "   N/A   |    N/A   |    N/A  "
+GYRO_FMT = "{:10.2f} | {:10.2f} | {:10.2f}".format
+GYRO_NA = "    N/A    |     N/A    |     N/A   "
+TEMP_FMT = "{:8.1f}".format
+TEMP_NA = "   N/A  "
+ROW_FMT = "{:5d} | {} | {} | {}\n".format
+
+# 每累积多少行写一次标准输出
+FLUSH_EVERY = 64
+
+
 def get_default_port():
     """获取默认串口"""
     system = platform.system().lower()
@@ -70,25 +83,42 @@ async def test_realtime_sensor(port: str, count: int = 50):
           f"{'温度(°C)':>8}")
     print("-" * 100)
     
-    # 采集数据
+    # 采集数据（输出行先缓存，批量写入标准输出）
     collected = 0
+    pending = []
+    
+    def flush_rows():
+        if pending:
+            sys.stdout.write(''.join(pending))
+            sys.stdout.flush()
+            pending.clear()
+    
     try:
-        async for data in sensor.collect():
-            collected += 1
-            
-            acc = sensor.get_acceleration()
-            gyro = sensor.get_gyroscope()
-            temp = sensor.get_temperature()
-            
-            # 格式化输出
-            acc_str = f"{acc['x']:8.3f} | {acc['y']:8.3f} | {acc['z']:8.3f}" if acc else "   N/A   |    N/A   |    N/A  "
-            gyro_str = f"{gyro['x']:10.2f} | {gyro['y']:10.2f} | {gyro['z']:10.2f}" if gyro else "    N/A    |     N/A    |     N/A   "
-            temp_str = f"{temp:8.1f}" if temp is not None else "   N/A  "
-            
-            print(f"{collected:5d} | {acc_str} | {gyro_str} | {temp_str}")
-            
-            if collected >= count:
-                break
+        try:
+            async for data in sensor.collect():
+                collected += 1
+                
+                # 三组数值取自同一份数据快照：读取线程会在多次 get_* 调用之间
+                # 更新 current_data，逐个调用 getter 可能混合不同数据包的数值
+                row = data.metadata.get('data') or {}
+                
+                # 格式化输出
+                if row:
+                    acc_str = ACC_FMT(row.get('加速度X(g)'), row.get('加速度Y(g)'), row.get('加速度Z(g)'))
+                    gyro_str = GYRO_FMT(row.get('角速度X(°/s)'), row.get('角速度Y(°/s)'), row.get('角速度Z(°/s)'))
+                else:
+                    acc_str, gyro_str = ACC_NA, GYRO_NA
+                temp = row.get('温度(°C)')
+                temp_str = TEMP_FMT(temp) if temp is not None else TEMP_NA
+                
+                pending.append(ROW_FMT(collected, acc_str, gyro_str, temp_str))
+                if len(pending) >= FLUSH_EVERY:
+                    flush_rows()
+                
+                if collected >= count:
+                    break
+        finally:
+            flush_rows()
     
     except KeyboardInterrupt:
         print(f"\n\n⚠ 用户中断 (已采集 {collected} 条数据)")
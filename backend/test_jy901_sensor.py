@@ -16,6 +16,7 @@ JY901 传感器完整测试套件
 """
 
 import asyncio
+import io
 import pytest
 import tempfile
 import os
@@ -25,10 +26,12 @@ from datetime import datetime
 import threading
 import time
 
+import numpy as np
+
 # 导入被测试的模块
 from src.collectors.sensors.jy901 import JY901Sensor
-from src.collectors.models import CollectedData
-from src.collectors.enums import CollectionStatus
+from src.collectors.models import CollectedData, SensorFrame
+from src.collectors.enums import CollectionStatus, SensorField
 
 
 class TestJY901SensorBasic:
@@ -163,6 +166,23 @@ class TestJY901SensorDataValidation:
         }
         
         assert self.sensor._validate_data(invalid_data) == False
+    
+    def test_validate_array_matches_validate_data(self):
+        """测试整批验证与逐条验证结果一致"""
+        rows = [
+            {'加速度X(g)': 1.0, '加速度Y(g)': 0.5, '加速度Z(g)': 9.8, '温度(°C)': 25.0},
+            {'加速度X(g)': 20.0, '加速度Y(g)': 0.5, '加速度Z(g)': 9.8},
+            {'加速度X(g)': None, '加速度Y(g)': 0.5, '加速度Z(g)': 9.8},
+            {'加速度X(g)': 1.0, '加速度Y(g)': 0.5, '加速度Z(g)': 9.8, '电量(%)': None},
+            {'加速度X(g)': 1.0, '加速度Y(g)': 0.5, '加速度Z(g)': 9.8, '角度Z(°)': -181.0},
+        ]
+        numeric = np.array([
+            [np.nan if row.get(f) is None else row[f] for f in JY901Sensor.NUMERIC_FIELDS]
+            for row in rows
+        ])
+        
+        expected = [self.sensor._validate_data(row) for row in rows]
+        assert self.sensor._validate_array(numeric).tolist() == expected
 
 
 class TestJY901SensorPlaybackMode:
@@ -225,6 +245,32 @@ class TestJY901SensorPlaybackMode:
         
         await self.sensor.disconnect()
     
+    @pytest.mark.asyncio
+    async def test_connect_binds_read_method(self):
+        """测试连接时按模式选定读取函数，断开后恢复；实例不保留 __dict__"""
+        assert not hasattr(self.sensor, '__dict__')
+        
+        await self.sensor.connect()
+        assert self.sensor._reader is JY901Sensor._read_playback_data
+        
+        await self.sensor.disconnect()
+        assert self.sensor._reader is None
+    
+    def test_skip_validation_keeps_all_rows(self):
+        """测试信任数据源时不过滤超出范围的数据"""
+        headers = '\t'.join(JY901Sensor.NUMERIC_FIELDS)
+        rows = ['\t'.join(['1.0'] * len(JY901Sensor.NUMERIC_FIELDS)),
+                '\t'.join(['99.0'] * len(JY901Sensor.NUMERIC_FIELDS))]
+        content = '\n'.join([headers] + rows)
+        
+        sensor = JY901Sensor('test')
+        sensor._load_data_stream(io.StringIO(content))
+        assert len(sensor.data_list) == 1
+        
+        trusting = JY901Sensor('test', config={'skip_validation': True})
+        trusting._load_data_stream(io.StringIO(content))
+        assert len(trusting.data_list) == 2
+    
     @pytest.mark.asyncio
     async def test_connect_file_not_found(self):
         """测试文件不存在的情况"""
@@ -254,6 +300,31 @@ class TestJY901SensorPlaybackMode:
         
         await self.sensor.disconnect()
     
+    @pytest.mark.asyncio
+    async def test_read_sensor_frame(self):
+        """测试读取数据帧（按下标访问，可转换为数据字典）"""
+        await self.sensor.connect()
+        
+        frame = await self.sensor.read_sensor_frame()
+        
+        assert isinstance(frame, SensorFrame)
+        assert frame.arr.shape == (len(SensorField),)
+        assert frame.arr[SensorField.ACC_X] == 1.0
+        assert frame.arr[SensorField.ACC_Y] == 0.5
+        assert frame.arr[SensorField.ACC_Z] == 9.8
+        assert frame.arr[SensorField.TEMPERATURE] == 25.0
+        assert frame.ts > 0
+        
+        legacy = frame.as_legacy_dict()
+        assert legacy['加速度X(g)'] == 1.0
+        assert legacy['温度(°C)'] == 25.0
+        
+        # 返回的是副本，修改不影响回放数据
+        frame.arr[SensorField.ACC_X] = 99.0
+        assert self.sensor.data_list[0]['加速度X(g)'] == 1.0
+        
+        await self.sensor.disconnect()
+    
     @pytest.mark.asyncio
     async def test_collect_stream_playback(self):
         """测试回放模式数据流采集"""
@@ -390,6 +461,31 @@ class TestJY901SensorDataAccess:
         assert self.sensor.get_quaternion() is None
         assert self.sensor.get_temperature() is None
         assert self.sensor.get_battery() is None
+    
+    @pytest.mark.asyncio
+    async def test_wait_magnetic_calibration(self):
+        """测试磁场读数不再扩展后提前结束等待"""
+        async def sweep():
+            for value in (100.0, 150.0, 50.0, 200.0):
+                self.sensor.current_data['磁场X(uT)'] = value
+                await asyncio.sleep(0.02)
+        
+        sweeper = asyncio.create_task(sweep())
+        done = await self.sensor.wait_magnetic_calibration(
+            timeout=2.0, settle_time=0.1, poll_interval=0.01
+        )
+        await sweeper
+        
+        assert done is True
+    
+    @pytest.mark.asyncio
+    async def test_wait_magnetic_calibration_timeout(self):
+        """测试读数一直没有扩展时等待到超时"""
+        done = await self.sensor.wait_magnetic_calibration(
+            timeout=0.1, settle_time=0.01, poll_interval=0.01
+        )
+        
+        assert done is False
 
 
 class TestJY901SensorSerialProtocol:
@@ -403,22 +499,22 @@ class TestJY901SensorSerialProtocol:
     def test_bytes_to_int16_positive(self):
         """测试字节转换为正整数"""
         # 测试正数: 0x1234 = 4660
-        bytes_list = [0x34, 0x12]  # 小端序
-        result = self.sensor._bytes_to_int16(bytes_list)
+        data = bytes([0x34, 0x12])  # 小端序
+        result = self.sensor._bytes_to_int16(data)
         assert result == 4660
     
     def test_bytes_to_int16_negative(self):
         """测试字节转换为负整数"""
         # 测试负数: 0x8000 = -32768
-        bytes_list = [0x00, 0x80]  # 小端序
-        result = self.sensor._bytes_to_int16(bytes_list)
+        data = bytes([0x00, 0x80])  # 小端序
+        result = self.sensor._bytes_to_int16(data)
         assert result == -32768
     
     def test_parse_acc_packet(self):
         """测试解析加速度数据包"""
         # 构造加速度数据包
         # 0x55 0x51 [ax_low ax_high] [ay_low ay_high] [az_low az_high] [temp_low temp_high] [checksum]
-        packet = [0x55, 0x51, 0x00, 0x10, 0x00, 0x08, 0x00, 0x20, 0x64, 0x00, 0x00]
+        packet = bytes([0x55, 0x51, 0x00, 0x10, 0x00, 0x08, 0x00, 0x20, 0x64, 0x00, 0x00])
         
         self.sensor._parse_acc_packet(packet)
         
@@ -435,7 +531,7 @@ class TestJY901SensorSerialProtocol:
     
     def test_parse_gyro_packet(self):
         """测试解析角速度数据包"""
-        packet = [0x55, 0x52, 0x00, 0x10, 0x00, 0x08, 0x00, 0x20, 0x00, 0x00, 0x00]
+        packet = bytes([0x55, 0x52, 0x00, 0x10, 0x00, 0x08, 0x00, 0x20, 0x00, 0x00, 0x00])
         
         self.sensor._parse_gyro_packet(packet)
         
@@ -449,7 +545,7 @@ class TestJY901SensorSerialProtocol:
     
     def test_parse_angle_packet(self):
         """测试解析角度数据包"""
-        packet = [0x55, 0x53, 0x00, 0x40, 0x00, 0x20, 0x00, 0x80, 0x00, 0x00, 0x00]
+        packet = bytes([0x55, 0x53, 0x00, 0x40, 0x00, 0x20, 0x00, 0x80, 0x00, 0x00, 0x00])
         
         self.sensor._parse_angle_packet(packet)
         
@@ -463,7 +559,7 @@ class TestJY901SensorSerialProtocol:
     
     def test_parse_mag_packet(self):
         """测试解析磁场数据包"""
-        packet = [0x55, 0x54, 0x64, 0x00, 0xC8, 0x00, 0x2C, 0x01, 0x00, 0x00, 0x00]
+        packet = bytes([0x55, 0x54, 0x64, 0x00, 0xC8, 0x00, 0x2C, 0x01, 0x00, 0x00, 0x00])
         
         self.sensor._parse_mag_packet(packet)
         
@@ -478,7 +574,7 @@ class TestJY901SensorSerialProtocol:
     def test_parse_quaternion_packet(self):
         """测试解析四元数数据包"""
         # 使用正数值: 0x4000 = 16384, 16384/32768 = 0.5
-        packet = [0x55, 0x59, 0x00, 0x40, 0x00, 0x20, 0x00, 0x10, 0x00, 0x08, 0x00]
+        packet = bytes([0x55, 0x59, 0x00, 0x40, 0x00, 0x20, 0x00, 0x10, 0x00, 0x08, 0x00])
         
         self.sensor._parse_quaternion_packet(packet)
         
@@ -492,6 +588,51 @@ class TestJY901SensorSerialProtocol:
         assert abs(self.sensor.current_data['四元数2()'] - 0.125) < 0.001
         assert abs(self.sensor.current_data['四元数3()'] - 0.0625) < 0.001
 
+    def test_parse_serial_data_stream(self):
+        """测试批量解析串口字节流（含噪声、分段到达和坏校验和）"""
+        def make_packet(payload):
+            packet = bytes([0x55]) + bytes(payload)
+            return packet + bytes([sum(packet) & 0xFF])
+        
+        first_acc = make_packet([0x51, 0x00, 0x08, 0x00, 0x08, 0x00, 0x08, 0x64, 0x00])
+        last_acc = make_packet([0x51, 0x00, 0x10, 0x00, 0x08, 0x00, 0x20, 0x64, 0x00])
+        gyro = make_packet([0x52, 0x00, 0x10, 0x00, 0x08, 0x00, 0x20, 0x00, 0x00])
+        bad_angle = bytearray(make_packet([0x53, 0x00, 0x40, 0x00, 0x20, 0x00, 0x80, 0x00, 0x00]))
+        bad_angle[-1] ^= 0xFF
+        
+        stream = b'\x00\x55\x13' + first_acc + bytes(bad_angle) + last_acc + gyro
+        split = len(stream) - 5
+        
+        self.sensor._parse_serial_data(stream[:split])
+        assert '角速度X(°/s)' not in self.sensor.current_data
+        
+        self.sensor._parse_serial_data(stream[split:])
+        
+        # 同类型的后一个包覆盖前一个包，坏校验和的包被丢弃
+        assert abs(self.sensor.current_data['加速度X(g)'] - 2.0) < 0.01
+        assert abs(self.sensor.current_data['加速度Z(g)'] - 4.0) < 0.01
+        assert abs(self.sensor.current_data['角速度X(°/s)'] - 250.0) < 0.1
+        assert '角度X(°)' not in self.sensor.current_data
+        assert len(self.sensor._rx_buf) < self.sensor.pack_size
+        
+        # 数据帧与数据字典同步更新，未收到的字段为 NaN
+        assert self.sensor._frame[SensorField.ACC_X] == self.sensor.current_data['加速度X(g)']
+        assert self.sensor._frame[SensorField.GYRO_X] == self.sensor.current_data['角速度X(°/s)']
+        assert np.isnan(self.sensor._frame[SensorField.ANGLE_X])
+
+    def test_enable_low_latency(self):
+        """测试启用串口低延迟模式（驱动不支持时不报错）"""
+        self.sensor.serial_port = Mock()
+        self.sensor._enable_low_latency()
+        self.sensor.serial_port.set_low_latency_mode.assert_called_once_with(True)
+        
+        self.sensor.serial_port.set_low_latency_mode.side_effect = ValueError("unsupported")
+        self.sensor._enable_low_latency()
+        
+        # 没有该方法的串口对象（非 Linux 平台）直接跳过
+        self.sensor.serial_port = object()
+        self.sensor._enable_low_latency()
+
 
 
 class TestJY901SensorRealtime:
@@ -649,54 +790,73 @@ def create_performance_test_data(count: int = 1000) -> str:
     return temp_file.name
 
 
+@pytest.fixture(scope='module')
+def perf_data_file():
+    """性能测试数据文件（整个模块只生成一次）"""
+    path = create_performance_test_data(1000)
+    yield path
+    os.unlink(path)
+
+
+@pytest.fixture
+def perf_sensor(perf_data_file):
+    """使用性能测试数据文件的回放传感器"""
+    return JY901Sensor(
+        'perf_test',
+        data_file_path=perf_data_file,
+        config={
+            'mode': 'playback',
+            'interval': 0.001,  # 1ms 间隔
+            'loop': False
+        }
+    )
+
+
 class TestJY901SensorPerformance:
     """JY901 传感器性能测试"""
     
-    def setup_method(self):
-        """测试前准备"""
-        self.test_data_file = create_performance_test_data(1000)
-        
-        self.sensor = JY901Sensor(
-            'perf_test',
-            data_file_path=self.test_data_file,
-            config={
-                'mode': 'playback',
-                'interval': 0.001,  # 1ms 间隔
-                'loop': False
-            }
-        )
-    
-    def teardown_method(self):
-        """测试后清理"""
-        if hasattr(self, 'test_data_file'):
-            os.unlink(self.test_data_file)
-    
     @pytest.mark.asyncio
-    async def test_data_loading_performance(self):
+    async def test_data_loading_performance(self, perf_sensor):
         """测试数据加载性能"""
         start_time = time.time()
         
-        await self.sensor.connect()
+        await perf_sensor.connect()
         
         load_time = time.time() - start_time
         
-        assert self.sensor._is_connected == True
-        assert len(self.sensor.data_list) == 1000
+        assert perf_sensor._is_connected == True
+        assert len(perf_sensor.data_list) == 1000
         assert load_time < 1.0  # 应该在1秒内完成加载
         
         print(f"加载 1000 条数据耗时: {load_time:.3f} 秒")
         
-        await self.sensor.disconnect()
+        await perf_sensor.disconnect()
+    
+    def test_data_parsing_performance(self, perf_data_file):
+        """测试数据解析性能（从内存读取，不含文件 I/O）"""
+        with open(perf_data_file, 'rb') as f:
+            content = f.read()
+        
+        sensor = JY901Sensor('perf_test')
+        
+        start_time = time.time()
+        sensor._load_data_stream(io.BytesIO(content))
+        parse_time = time.time() - start_time
+        
+        assert len(sensor.data_list) == 1000
+        assert parse_time < 1.0
+        
+        print(f"解析 1000 条数据耗时: {parse_time:.3f} 秒")
     
     @pytest.mark.asyncio
-    async def test_data_streaming_performance(self):
+    async def test_data_streaming_performance(self, perf_sensor):
         """测试数据流性能"""
-        await self.sensor.connect()
+        await perf_sensor.connect()
         
         start_time = time.time()
         count = 0
         
-        async for data in self.sensor.collect_stream():
+        async for data in perf_sensor.collect_stream():
             count += 1
             if count >= 100:  # 测试前100条数据
                 break
@@ -711,7 +871,7 @@ class TestJY901SensorPerformance:
         if count > 0:
             print(f"平均每条数据处理时间: {stream_time/count*1000:.2f} ms")
         
-        await self.sensor.disconnect()
+        await perf_sensor.disconnect()
 
 
 def run_manual_tests():
@@ -757,7 +917,7 @@ def run_manual_tests():
     sensor.current_data = {}
     
     # 测试加速度包解析
-    acc_packet = [0x55, 0x51, 0x00, 0x10, 0x00, 0x08, 0x00, 0x20, 0x64, 0x00, 0x00]
+    acc_packet = bytes([0x55, 0x51, 0x00, 0x10, 0x00, 0x08, 0x00, 0x20, 0x64, 0x00, 0x00])
     sensor._parse_acc_packet(acc_packet)
     print(f"✓ 加速度解析: X={sensor.current_data.get('加速度X(g)', 'N/A')}")
     
@@ -13,6 +13,9 @@ import asyncio
 import sys
 from src.collectors.sensors.jy901 import JY901Sensor
 
+# 数据流测试每累积多少行写一次标准输出（约 5 秒的数据）
+FLUSH_EVERY = 10
+
 
 async def test_sensor_connection():
     """测试传感器连接"""
@@ -134,9 +137,13 @@ async def test_sensor_calibration():
             if user_input.lower() != 'skip':
                 if sensor.start_magnetic_calibration():
                     print("✓ 磁场校准已开始")
-                    print("请以8字形晃动传感器30秒...")
+                    print("请以8字形晃动传感器（最长30秒）...")
                     
-                    await asyncio.sleep(30)
+                    # 磁场读数覆盖各方向后提前结束，最多等待 30 秒
+                    if await sensor.wait_magnetic_calibration(timeout=30):
+                        print("✓ 磁场读数已覆盖各方向")
+                    else:
+                        print("⚠ 已到 30 秒上限")
                     
                     if sensor.end_magnetic_calibration():
                         print("✓ 磁场校准完成")
@@ -173,6 +180,15 @@ async def test_data_stream():
         print("按 Ctrl+C 停止采集")
         
         count = 0
+        # 每条数据的输出行先缓存，每 FLUSH_EVERY 行批量写出一次
+        lines: list[str] = []
+        
+        def flush_lines():
+            if lines:
+                sys.stdout.write("\n".join(lines) + "\n")
+                sys.stdout.flush()
+                lines.clear()
+        
         try:
             async for data in sensor.collect_stream():
                 count += 1
@@ -184,14 +200,20 @@ async def test_data_stream():
                 
                 if acc and gyro:
                     temp_str = f"{temp:5.1f}°C" if temp is not None else "  N/A"
-                    print(f"[{count:3d}] Acc: ({acc['x']:6.3f}, {acc['y']:6.3f}, {acc['z']:6.3f}) "
-                          f"Gyro: ({gyro['x']:7.2f}, {gyro['y']:7.2f}, {gyro['z']:7.2f}) ")
+                    lines.append(
+                        f"[{count:3d}] Acc: ({acc['x']:6.3f}, {acc['y']:6.3f}, {acc['z']:6.3f}) "
+                        f"Gyro: ({gyro['x']:7.2f}, {gyro['y']:7.2f}, {gyro['z']:7.2f}) "
+                    )
+                    if len(lines) >= FLUSH_EVERY:
+                        flush_lines()
                 
                 if count >= 50:  # 最多采集50条数据
                     break
                     
         except KeyboardInterrupt:
-            print(f"\n用户中断，已采集 {count} 条数据")
+            lines.append(f"\n用户中断，已采集 {count} 条数据")
+        finally:
+            flush_lines()
         
         await sensor.disconnect()
         print(f"数据流测试完成，总共采集 {count} 条数据")
@@ -8,10 +8,14 @@ import asyncio
 import sys
 from pathlib import Path
 
+import numpy as np
+
 # Add backend/src and parent directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 sys.path.insert(0, str(Path(__file__).parent.parent))  # For datahandler
 
+from collectors.enums import SensorField
+from collectors.models import SensorFrame
 from collectors.sensors.mock_sensor import MockSensorDevice
 from collectors.processors.motion_processor import MotionDirectionProcessor
 
@@ -30,25 +34,28 @@ async def test_motion_processor():
     # 测试不同的运动模式
     patterns = ['forward', 'backward', 'turn_left', 'turn_right', 'stationary']
     
+    # 创建模拟传感器（所有运动模式共用一个设备，切换模式时重置运动状态）
+    # 按需生成样本，采样时间按 0.1 秒固定步进，无需真实等待
+    sensor = MockSensorDevice(
+        sensor_id='test_sensor',
+        motion_pattern=patterns[0],
+        config={'realtime': False, 'interval': 0.1, 'noise_level': 0.01}
+    )
+    
+    # 连接传感器
+    connected = await sensor.connect()
+    if not connected:
+        print(f"✗ 无法连接传感器")
+        return
+    
+    print(f"✓ 传感器已连接")
+    
     for pattern in patterns:
         print(f"\n{'=' * 60}")
         print(f"测试运动模式: {pattern}")
         print(f"{'=' * 60}")
         
-        # 创建模拟传感器
-        sensor = MockSensorDevice(
-            sensor_id=f'test_sensor_{pattern}',
-            motion_pattern=pattern,
-            config={'interval': 0.1, 'noise_level': 0.01}
-        )
-        
-        # 连接传感器
-        connected = await sensor.connect()
-        if not connected:
-            print(f"✗ 无法连接传感器")
-            continue
-        
-        print(f"✓ 传感器已连接")
+        sensor.set_motion_pattern(pattern, reset_state=True)
         
         # 读取并处理5个数据样本
         for i in range(5):
@@ -56,8 +63,8 @@ async def test_motion_processor():
                 # 读取传感器数据
                 sensor_data = await sensor.read_sensor_data()
                 
-                # 处理数据
-                motion_command = processor.process(sensor_data)
+                # 处理数据（传入合成的采样时间，运动计算器按 0.1 秒积分）
+                motion_command = processor.process(sensor_data, timestamp=sensor.sample_timestamp)
                 
                 # 显示结果
                 print(f"\n样本 {i+1}:")
@@ -67,21 +74,18 @@ async def test_motion_processor():
                 print(f"  运动开始: {motion_command.is_motion_start}")
                 print(f"  原始方向: {motion_command.raw_direction}")
                 
-                # 等待一小段时间
-                await asyncio.sleep(0.15)
-                
             except Exception as e:
                 print(f"✗ 处理数据时出错: {e}")
                 import traceback
                 traceback.print_exc()
         
-        # 断开传感器
-        await sensor.disconnect()
-        print(f"\n✓ 传感器已断开")
-        
         # 重置处理器状态
         processor.reset()
     
+    # 断开传感器
+    await sensor.disconnect()
+    print(f"\n✓ 传感器已断开")
+    
     print(f"\n{'=' * 60}")
     print("测试完成")
     print(f"{'=' * 60}")
@@ -127,6 +131,20 @@ async def test_error_handling():
     print(f"  命令: {command.command}")
     print(f"  错误: {command.metadata.get('error', 'None')}")
     
+    # 测试批量处理（无效样本得到与逐条处理相同的错误命令）
+    print("\n测试 3: 批量处理包含无效样本")
+    commands = processor.process_batch([incomplete_data, invalid_data])
+    for command in commands:
+        print(f"  命令: {command.command}, 错误: {command.metadata.get('error', 'None')}")
+    
+    # 测试数据帧缺少字段（NaN）
+    print("\n测试 4: 数据帧缺少字段")
+    frame = SensorFrame(np.full(len(SensorField), np.nan), 0.0)
+    frame.arr[SensorField.ACC_X:SensorField.ACC_Z + 1] = 0.1, 0.0, 1.0
+    command = processor.process_frame(frame)
+    print(f"  命令: {command.command}")
+    print(f"  错误: {command.metadata.get('error', 'None')}")
+    
     print("\n✓ 错误处理测试完成")
 
 
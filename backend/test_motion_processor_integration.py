@@ -58,11 +58,11 @@ async def test_integration():
         print(f"测试运动模式: {pattern}")
         print(f"{'=' * 40}")
         
-        # 创建模拟传感器
+        # 创建模拟传感器（按需生成样本，采样时间按 0.15 秒固定步进）
         sensor = MockSensorDevice(
             sensor_id=f'test_sensor_{pattern}',
             motion_pattern=pattern,
-            config={'interval': 0.1, 'noise_level': 0.01}
+            config={'realtime': False, 'interval': 0.15, 'noise_level': 0.01}
         )
         
         # 连接传感器
@@ -76,22 +76,23 @@ async def test_integration():
         # 处理3个数据样本
         messages_before = len(received_messages)
         
-        for i in range(3):
-            try:
-                # 读取传感器数据
-                sensor_data = await sensor.read_sensor_data()
-                
-                # 处理数据（这会自动发布消息到代理）
-                motion_command = processor.process(sensor_data)
-                
+        try:
+            # 读取传感器数据及其合成的采样时间
+            samples = []
+            timestamps = []
+            for _ in range(3):
+                samples.append(await sensor.read_sensor_data())
+                timestamps.append(sensor.sample_timestamp)
+            
+            # 批量处理数据（整批方向消息通过一次 publish_batch 发布到代理）
+            motion_commands = processor.process_batch(samples, timestamps)
+            
+            for i, motion_command in enumerate(motion_commands):
                 print(f"  样本 {i+1}: {motion_command.command} "
                       f"(强度: {motion_command.intensity:.4f})")
                 
-                # 等待一小段时间
-                await asyncio.sleep(0.1)
-                
-            except Exception as e:
-                print(f"✗ 处理数据时出错: {e}")
+        except Exception as e:
+            print(f"✗ 处理数据时出错: {e}")
         
         # 断开传感器
         await sensor.disconnect()
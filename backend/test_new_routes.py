@@ -1,38 +1,54 @@
 #!/usr/bin/env python3
 """测试新添加的路由"""
 
-import requests
+import asyncio
+
+import aiohttp
 
 BASE_URL = "http://127.0.0.1:8000"
 
-def test_route(path, description):
-    """测试单个路由"""
+# 各路由互不依赖，并发请求（总耗时约为最慢的一个请求）
+ROUTES = [
+    ("/", "根路径"),
+    ("/health", "健康检查"),
+    ("/test", "测试页面索引"),
+    ("/test/websocket", "WebSocket 测试页面"),
+]
+
+async def test_route(session, path, description):
+    """测试单个路由，返回测试结果文本（并发请求时按路由顺序统一输出）"""
     url = f"{BASE_URL}{path}"
-    print(f"\n测试: {description}")
-    print(f"URL: {url}")
+    lines = [f"\n测试: {description}", f"URL: {url}"]
     try:
-        response = requests.get(url, timeout=5)
-        print(f"状态码: {response.status_code}")
-        if response.status_code == 200:
-            print("✓ 成功")
-            if 'html' in response.headers.get('content-type', '').lower():
-                print(f"返回 HTML 页面 ({len(response.text)} 字符)")
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+            text = await response.text()
+            lines.append(f"状态码: {response.status}")
+            if response.status == 200:
+                lines.append("✓ 成功")
+                if 'html' in response.headers.get('content-type', '').lower():
+                    lines.append(f"返回 HTML 页面 ({len(text)} 字符)")
+                else:
+                    lines.append(f"返回: {text[:100]}...")
             else:
-                print(f"返回: {response.text[:100]}...")
-        else:
-            print(f"✗ 失败: {response.text[:200]}")
+                lines.append(f"✗ 失败: {text[:200]}")
     except Exception as e:
-        print(f"✗ 错误: {e}")
+        lines.append(f"✗ 错误: {e}")
+    return "\n".join(lines)
+
+async def main():
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(
+            *(test_route(session, path, description) for path, description in ROUTES)
+        )
+    for result in results:
+        print(result)
 
 if __name__ == "__main__":
     print("=" * 60)
     print("测试新添加的后端路由")
     print("=" * 60)
     
-    test_route("/", "根路径")
-    test_route("/health", "健康检查")
-    test_route("/test", "测试页面索引")
-    test_route("/test/websocket", "WebSocket 测试页面")
+    asyncio.run(main())
     
     print("\n" + "=" * 60)
     print("测试完成")
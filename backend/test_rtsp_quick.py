@@ -2,13 +2,12 @@
 """
 快速测试 RTSP 服务是否可以启动
 """
-import requests
-import time
+from http_test_utils import SESSION, poll_until
 
 def test_backend_health():
     """测试后端是否运行"""
     try:
-        response = requests.get('http://127.0.0.1:8000/health', timeout=3)
+        response = SESSION.get('http://127.0.0.1:8000/health', timeout=3)
         if response.ok:
             print("✓ 后端服务运行正常")
             return True
@@ -24,7 +23,7 @@ def test_rtsp_api():
     """测试 RTSP API 是否可用"""
     try:
         # 测试启动流
-        response = requests.post(
+        response = SESSION.post(
             'http://127.0.0.1:8000/rtsp/streams/start',
             json={
                 'stream_id': 'test-camera',
@@ -36,17 +35,16 @@ def test_rtsp_api():
         if response.ok:
             print("✓ RTSP 流启动成功")
             
-            # 等待一下
-            time.sleep(2)
-            
-            # 测试获取流信息
-            info_response = requests.get('http://127.0.0.1:8000/rtsp/streams/test-camera', timeout=5)
-            if info_response.ok:
-                data = info_response.json()
+            # 测试获取流信息（轮询到流已打开并有帧率为止，不固定等待）
+            data = poll_until(
+                'http://127.0.0.1:8000/rtsp/streams/test-camera',
+                lambda d: d.get('is_opened') and d.get('fps', 0) > 0
+            )
+            if data is not None:
                 print(f"✓ 流信息: {data['width']}x{data['height']} @ {data['fps']}fps")
             
             # 停止流
-            stop_response = requests.post('http://127.0.0.1:8000/rtsp/streams/stop/test-camera', timeout=5)
+            stop_response = SESSION.post('http://127.0.0.1:8000/rtsp/streams/stop/test-camera', timeout=5)
             if stop_response.ok:
                 print("✓ RTSP 流停止成功")
             
@@ -3,8 +3,7 @@
 简单的 RTSP 流测试脚本
 测试启动、连接和停止 RTSP 流
 """
-import requests
-import time
+from http_test_utils import SESSION, poll_until
 
 API_BASE = 'http://127.0.0.1:8000/rtsp'
 STREAM_ID = 'main-camera'
@@ -14,7 +13,7 @@ def test_start_stream():
     """测试启动流"""
     print(f"🚀 启动 RTSP 流: {STREAM_ID}")
     try:
-        response = requests.post(
+        response = SESSION.post(
             f'{API_BASE}/streams/start',
             json={
                 'stream_id': STREAM_ID,
@@ -38,7 +37,7 @@ def test_list_streams():
     """测试列出所有流"""
     print(f"\n📋 列出所有活动流")
     try:
-        response = requests.get(f'{API_BASE}/streams', timeout=5)
+        response = SESSION.get(f'{API_BASE}/streams', timeout=5)
         
         if response.ok:
             data = response.json()
@@ -58,7 +57,7 @@ def test_get_stream_info():
     """测试获取流信息"""
     print(f"\n📊 获取流信息: {STREAM_ID}")
     try:
-        response = requests.get(f'{API_BASE}/streams/{STREAM_ID}', timeout=5)
+        response = SESSION.get(f'{API_BASE}/streams/{STREAM_ID}', timeout=5)
         
         if response.ok:
             data = response.json()
@@ -79,7 +78,7 @@ def test_stop_stream():
     """测试停止流"""
     print(f"\n⏹️  停止 RTSP 流: {STREAM_ID}")
     try:
-        response = requests.post(f'{API_BASE}/streams/stop/{STREAM_ID}', timeout=5)
+        response = SESSION.post(f'{API_BASE}/streams/stop/{STREAM_ID}', timeout=5)
         
         if response.ok:
             data = response.json()
@@ -105,9 +104,13 @@ def main():
         print("  3. 网络连接是否正常")
         return
     
-    # 等待流初始化
+    # 等待流初始化：轮询流信息，流已打开并有帧率时立即继续
     print("\n⏳ 等待流初始化...")
-    time.sleep(2)
+    if poll_until(
+        f'{API_BASE}/streams/{STREAM_ID}',
+        lambda d: d.get('is_opened') and d.get('fps', 0) > 0
+    ) is None:
+        print("⚠️  等待流就绪超时")
     
     # 测试列出流
     test_list_streams()
@@ -115,16 +118,16 @@ def main():
     # 测试获取流信息
     test_get_stream_info()
     
-    # 等待一段时间
-    print("\n⏳ 流运行中，5秒后停止...")
-    time.sleep(5)
-    
     # 测试停止流
     test_stop_stream()
     
-    # 验证流已停止
+    # 验证流已停止：轮询流列表，流消失后立即继续
     print("\n🔍 验证流已停止...")
-    time.sleep(1)
+    if poll_until(
+        f'{API_BASE}/streams',
+        lambda d: all(stream.get('stream_id') != STREAM_ID for stream in d.get('streams', []))
+    ) is None:
+        print("⚠️  等待流停止超时")
     test_list_streams()
     
     print("\n" + "=" * 60)
@@ -5,9 +5,17 @@
 
 import asyncio
 import logging
+import logging.handlers
 from src.collectors.sensors.jy901 import JY901Sensor
 
-logging.basicConfig(level=logging.INFO)
+# 日志先缓存在内存中，攒满 64 条、出现错误或显式 flush 时才写到终端，
+# 采集循环中的逐条日志不会每条都触发一次终端写入
+_console_handler = logging.StreamHandler()
+_console_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+_log_buffer = logging.handlers.MemoryHandler(
+    capacity=64, flushLevel=logging.ERROR, target=_console_handler
+)
+logging.basicConfig(level=logging.INFO, handlers=[_log_buffer])
 logger = logging.getLogger(__name__)
 
 async def test_sensor_api_logic():
@@ -79,6 +87,8 @@ async def test_sensor_api_logic():
                 logger.info("测试完成，收到足够的数据")
                 break
         
+        _log_buffer.flush()
+        
         await sensor_device.disconnect()
         logger.info("传感器已断开")
         
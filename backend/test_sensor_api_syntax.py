@@ -5,6 +5,8 @@ Test script to verify sensor API syntax and imports
 验证传感器 API 语法和导入（不运行完整功能）
 """
 
+import ast
+import re
 import sys
 from pathlib import Path
 
@@ -12,6 +14,16 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 sys.path.insert(0, str(Path(__file__).parent.parent))  # For datahandler
 
+# 需要在 sensors.py 中出现的集成代码标记：(标记, 找到时的输出, 未找到时的输出)
+INTEGRATION_MARKERS = (
+    ("MessageBroker.get_instance()", "✓ MessageBroker 集成代码已添加", "✗ MessageBroker 集成代码未找到"),
+    ('broker.publish("angle_value"', "✓ 角度消息发布代码已添加", "✗ 角度消息发布代码未找到"),
+    ("Requirements 3.1, 3.3", "✓ 需求注释已添加", "✗ 需求注释未找到"),
+)
+
+# 所有标记合并为一个正则，源码只扫描一遍
+_MARKER_PATTERN = re.compile("|".join(re.escape(marker) for marker, _, _ in INTEGRATION_MARKERS))
+
 def main():
     """主测试函数"""
     print("=" * 60)
@@ -53,28 +65,16 @@ def main():
         # Test that the sensor API code can be parsed (syntax check)
         sensor_api_path = Path(__file__).parent / 'src' / 'api' / 'sensors.py'
         
-        with open(sensor_api_path, 'r', encoding='utf-8') as f:
-            sensor_code = f.read()
+        sensor_code = sensor_api_path.read_text(encoding='utf-8')
         
         # Check if our integration code is present
-        if "MessageBroker.get_instance()" in sensor_code:
-            print("✓ MessageBroker 集成代码已添加")
-        else:
-            print("✗ MessageBroker 集成代码未找到")
-            
-        if 'broker.publish("angle_value"' in sensor_code:
-            print("✓ 角度消息发布代码已添加")
-        else:
-            print("✗ 角度消息发布代码未找到")
-            
-        if "Requirements 3.1, 3.3" in sensor_code:
-            print("✓ 需求注释已添加")
-        else:
-            print("✗ 需求注释未找到")
+        found = {match.group(0) for match in _MARKER_PATTERN.finditer(sensor_code)}
+        for marker, found_message, missing_message in INTEGRATION_MARKERS:
+            print(found_message if marker in found else missing_message)
         
-        # Try to compile the code to check syntax
+        # Parse the code to check syntax (AST only, no bytecode generation)
         try:
-            compile(sensor_code, sensor_api_path, 'exec')
+            ast.parse(sensor_code, filename=str(sensor_api_path))
             print("✓ 传感器API代码语法正确")
         except SyntaxError as e:
             print(f"✗ 传感器API代码语法错误: {e}")